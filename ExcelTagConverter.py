@@ -1,14 +1,43 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
 from pathlib import Path
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-import re
+import multiprocessing
 import subprocess
 import os
+import queue
 import sys
+import threading
+import time
+
+# Only light modules here: pandas and openpyxl load on a background thread once the window is up (see preload)
+from tag_converter import ColumnConfig, ConversionCancelled, ProgressReporter, preload
+from tag_converter.constants import ALL_SHEETS
+
+# How often the GUI drains log/progress events from the worker thread
+EVENT_POLL_MS = 100
+
+INPUT_FILETYPES = [
+    ("Tag lists", "*.xlsx *.xlsm *.xls *.csv *.txt *.tsv *.parquet *.feather"),
+    ("Excel files", "*.xlsx *.xlsm *.xls"),
+    ("CSV files", "*.csv *.txt *.tsv"),
+    ("Parquet / Feather files", "*.parquet *.feather *.arrow"),
+    ("All files", "*.*"),
+]
+STAGE_LABELS = {'read': "📖 Reading", 'write': "📝 Writing", 'save': "💾 Saving workbook", 'export': "📤 Exporting",
+                'batch': "📚 Converting files"}
+# What a stage's progress counts, when not rows
+STAGE_UNITS = {'batch': 'files'}
+# Files converted at once in a batch, each in its own worker process
+BATCH_JOBS = min(4, os.cpu_count() or 1)
+MERGED_FILENAME = "merged_SCADA_SIGNAL.xlsx"
+# Worker processes parsing the sheets of a multi-sheet input at once
+SHEET_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
 
 class ExcelTagConverter:
     def __init__(self, root):
@@ -21,27 +50,31 @@ class ExcelTagConverter:
         self.mapping_file = None
         self.data_type_mapping = {}
         
-        # Color palette 
-        self.area_colors = [
-    "FF4472C4",
-    "FF70AD47",
-    "FFED7D31",
-    "FF5B9BD5",
-    "FFA5A5A5",
-    "FFB38600",
-    "FFB88A90",
-    "FF8FB296",
-    "FFB8A96F",
-    "FF9AA4C4",
-    "FF9FB19A",
-    "FFBFA89E",
-    "FF9FAFC6",
-    "FFB07D5D",
-    "FF6F94B8",
-]
+        # Worker thread state; the worker only talks to Tk through self.events
+        self.events = queue.Queue()
+        self.worker = None
+        self.cancel_event = None
+        self.progress_stage = None
+        self.stage_started = (0.0, 0)
         
         self.setup_styles()
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(EVENT_POLL_MS, self.drain_events)
+        # Start loading the conversion engine once the window has been drawn
+        self.root.after_idle(self.start_preload)
+    
+    def start_preload(self):
+        """Import pandas/openpyxl and the engine in the background while the user picks files"""
+        self.preload_thread = threading.Thread(target=self.preload_engine, daemon=True)
+        self.preload_thread.start()
+    
+    def preload_engine(self):
+        try:
+            preload()
+        except Exception as e:
+            # The same import fails again, with its error shown, when a conversion starts
+            self.log(f"⚠️ Could not load the conversion engine: {str(e)}")
     
     def setup_styles(self):
         """Configure custom styles"""
@@ -130,6 +163,16 @@ class ExcelTagConverter:
         self.comments_col = self.create_column_input(col_frame, "Comments:", "Comments", 9)
         self.origin_col = self.create_column_input(col_frame, "Origin:", "Origin", 10)
         
+        # Input sheets
+        sheets_label = ttk.Label(col_frame, text="Input Sheets:", style='Header.TLabel')
+        sheets_label.grid(row=11, column=0, columnspan=2, sticky="w", pady=(15, 10))
+        
+        self.sheets_entry = self.create_column_input(col_frame, "Sheets:", "", 12)
+        sheets_hint = ttk.Label(col_frame, style='Info.TLabel',
+                                text="Blank: first sheet, *: all sheets, or names separated by commas.\n"
+                                     "Set Origin to 'Source Sheet' to fill it with each row's sheet name.")
+        sheets_hint.grid(row=13, column=0, columnspan=2, sticky="w", padx=5)
+        
         col_frame.columnconfigure(1, weight=1)
         
         # Info Card
@@ -162,13 +205,27 @@ class ExcelTagConverter:
         scrollbar.pack(side="right", fill="y")
         self.log_text.config(yscrollcommand=scrollbar.set)
         
+        # Progress
+        progress_frame = tk.Frame(main_container, bg='#f0f0f0')
+        progress_frame.pack(fill="x", pady=(15, 0))
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate')
+        self.progress_bar.pack(fill="x")
+        
+        self.status_label = tk.Label(progress_frame, text="Ready", bg='#f0f0f0', fg='#555555',
+                                     font=('Segoe UI', 9), anchor="w")
+        self.status_label.pack(fill="x", pady=(5, 0))
+        
         # Process Button
         bottom_frame = tk.Frame(main_container, bg='#f0f0f0', height=70)
-        bottom_frame.pack(fill="x", pady=(15, 0))
+        bottom_frame.pack(fill="x", pady=(10, 0))
         bottom_frame.pack_propagate(False)
         
+        button_row = tk.Frame(bottom_frame, bg='#f0f0f0')
+        button_row.pack(expand=True)
+        
         self.process_btn = tk.Button(
-            bottom_frame, 
+            button_row, 
             text="🚀 Process and Convert", 
             command=self.process_file,
             bg='#28a745', 
@@ -182,7 +239,56 @@ class ExcelTagConverter:
             activeforeground='white',
             width=15
         )
-        self.process_btn.pack(expand=True)
+        self.process_btn.pack(side="left", padx=(0, 10))
+        
+        self.preview_btn = tk.Button(
+            button_row,
+            text="🔍 Preview",
+            command=self.preview_file,
+            bg='#5c6bc0',
+            fg='white',
+            font=('Segoe UI', 11, 'bold'),
+            relief='flat',
+            padx=20,
+            pady=10,
+            cursor='hand2',
+            activebackground='#3f51b5',
+            activeforeground='white'
+        )
+        self.preview_btn.pack(side="left", padx=(0, 10))
+        
+        self.batch_btn = tk.Button(
+            button_row,
+            text="📚 Batch",
+            command=self.batch_files,
+            bg='#5c6bc0',
+            fg='white',
+            font=('Segoe UI', 11, 'bold'),
+            relief='flat',
+            padx=20,
+            pady=10,
+            cursor='hand2',
+            activebackground='#3f51b5',
+            activeforeground='white'
+        )
+        self.batch_btn.pack(side="left", padx=(0, 10))
+        
+        self.cancel_btn = tk.Button(
+            button_row,
+            text="⏹ Cancel",
+            command=self.cancel_processing,
+            bg='#dc3545',
+            fg='white',
+            font=('Segoe UI', 11, 'bold'),
+            relief='flat',
+            padx=20,
+            pady=10,
+            cursor='hand2',
+            activebackground='#c82333',
+            activeforeground='white',
+            state="disabled"
+        )
+        self.cancel_btn.pack(side="left")
     
     def create_column_input(self, parent, label_text, default_value, row):
         """Helper to create column input fields"""
@@ -196,14 +302,99 @@ class ExcelTagConverter:
         return entry
     
     def log(self, message):
-        self.log_text.insert("end", message + "\n")
-        self.log_text.see("end")
-        self.root.update()
+        """Queue a log line; safe to call from the worker thread"""
+        self.events.put(('log', message))
+    
+    def drain_events(self):
+        """Apply all queued log/progress events in one batch, then reschedule"""
+        lines = []
+        latest_progress = None
+        finished = None
+        try:
+            while True:
+                event = self.events.get_nowait()
+                if event[0] == 'log':
+                    lines.append(event[1])
+                elif event[0] == 'progress':
+                    latest_progress = event[1:]
+                else:
+                    finished = event
+        except queue.Empty:
+            pass
+        
+        if lines:
+            self.log_text.insert("end", "\n".join(lines) + "\n")
+            self.log_text.see("end")
+        if latest_progress and not finished:
+            self.show_progress(*latest_progress)
+        if finished and finished[0] == 'mapped':
+            self.finish_mapping(*finished[1:])
+        elif finished and finished[0] == 'planned':
+            self.finish_preview(*finished[1:])
+        elif finished and finished[0] == 'batched':
+            self.finish_batch(*finished[1:])
+        elif finished:
+            self.finish_processing(*finished[1:])
+        self.root.after(EVENT_POLL_MS, self.drain_events)
+    
+    def show_progress(self, stage, done, total):
+        now = time.monotonic()
+        if stage != self.progress_stage:
+            # Rates are measured from the first update of a stage the GUI sees
+            self.progress_stage = stage
+            self.stage_started = (now, done)
+        label = STAGE_LABELS.get(stage, stage)
+        
+        if stage == 'save':
+            # Saving has no row count; just show activity
+            self.progress_bar.config(mode='indeterminate')
+            self.progress_bar.start(15)
+            self.status_label.config(text=f"{label}...")
+            return
+        
+        started, started_done = self.stage_started
+        elapsed = now - started
+        rate = (done - started_done) / elapsed if elapsed > 0 else 0
+        unit = STAGE_UNITS.get(stage, 'rows')
+        text = f"{label}: {done:,} / {total:,} {unit}" if total else f"{label}: {done:,} {unit}"
+        if rate:
+            eta = f", ~{format_duration((total - done) / rate)} left" if total and done < total else ""
+            # A few files per second still needs a decimal
+            rate_text = f"{rate:,.1f}" if unit == 'files' else f"{rate:,.0f}"
+            text += f" ({rate_text} {unit}/s{eta})"
+        if total:
+            self.progress_bar.config(mode='determinate', maximum=total, value=min(done, total))
+        self.status_label.config(text=text)
+    
+    def set_running(self, running):
+        state = "disabled" if running else "normal"
+        self.process_btn.config(state=state)
+        self.preview_btn.config(state=state)
+        self.batch_btn.config(state=state)
+        self.input_btn.config(state=state)
+        self.mapping_btn.config(state=state)
+        self.cancel_btn.config(state="normal" if running else "disabled")
+        self.progress_stage = None
+        self.progress_bar.stop()
+        self.progress_bar.config(mode='determinate', value=0)
+    
+    def cancel_processing(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_btn.config(state="disabled")
+            self.status_label.config(text="Cancelling...")
+    
+    def on_close(self):
+        if self.worker is not None and self.worker.is_alive():
+            self.cancel_event.set()
+            # Give the worker a moment to stop and clean up its temporary file
+            self.worker.join(timeout=2)
+        self.root.destroy()
     
     def select_input(self):
         file = filedialog.askopenfilename(
-            title="Select Input Excel",
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            title="Select Input Tag List",
+            filetypes=INPUT_FILETYPES
         )
         if file:
             self.input_file = file
@@ -212,8 +403,8 @@ class ExcelTagConverter:
     
     def select_mapping(self):
         file = filedialog.askopenfilename(
-            title="Select Data Type Mapping Excel",
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            title="Select Data Type Mapping",
+            filetypes=INPUT_FILETYPES
         )
         if file:
             self.mapping_file = file
@@ -222,209 +413,58 @@ class ExcelTagConverter:
             self.load_mapping_file()
     
     def load_mapping_file(self):
-        """Load the UDT type to signal type mapping"""
+        """Load the UDT type to signal type mapping on a worker thread, keeping the window responsive"""
+        self.data_type_mapping = {}
+        # Loading cannot be cancelled; the event only lets on_close wait for it like for a conversion
+        self.cancel_event = threading.Event()
+        self.set_running(True)
+        self.cancel_btn.config(state="disabled")
+        self.status_label.config(text="Loading mapping...")
+        self.worker = threading.Thread(target=self.run_load_mapping, args=(self.mapping_file,), daemon=True)
+        self.worker.start()
+    
+    def run_load_mapping(self, mapping_file):
+        """Worker thread body of a mapping load; reports back only through the event queue"""
         try:
-            df_mapping = pd.read_excel(self.mapping_file)
-            
-            required_cols = ['UDT Type', 'Signal Type']
-            missing_cols = [col for col in required_cols if col not in df_mapping.columns]
-            
-            if missing_cols:
-                raise ValueError(f"Mapping file must have 'UDT Type', 'Signal Type', and 'Data Type' columns.\nMissing: {', '.join(missing_cols)}")
-            
-            if 'Data Type' not in df_mapping.columns:
-                raise ValueError("Mapping file must have 'Data Type' column")
-            
-            self.data_type_mapping = {}
-            for _, row in df_mapping.iterrows():
-                udt_type = str(row['UDT Type']).strip()
-                signal_type = str(row['Signal Type']).strip()
-                mapped_data_type = str(row['Data Type']).strip() if pd.notna(row['Data Type']) else ''
-                
-                array_info = self.parse_array_type(udt_type)
-                base_type = array_info['base_type']
-                
-                if base_type not in self.data_type_mapping:
-                    self.data_type_mapping[base_type] = {
-                        'signals': [],
-                        'is_array': array_info['is_array'],
-                        'array_start': array_info['array_start'],
-                        'array_end': array_info['array_end'],
-                        'data_types': {}
-                    }
-                self.data_type_mapping[base_type]['signals'].append(signal_type)
-                self.data_type_mapping[base_type]['data_types'][signal_type] = mapped_data_type
-            
-            self.log(f"✓ Loaded mapping for {len(self.data_type_mapping)} UDT types")
-            for udt, info in self.data_type_mapping.items():
-                array_str = f" [ARRAY {info['array_start']}..{info['array_end']}]" if info['is_array'] else ""
-                self.log(f"  → {udt}{array_str}: {', '.join(info['signals'])}")
-                
+            from tag_converter import load_mapping
+            self.events.put(('mapped', load_mapping(mapping_file, self.log), None))
         except Exception as e:
-            self.log(f"✗ Error loading mapping file: {str(e)}")
-            messagebox.showerror("Error", f"Failed to load mapping file:\n{str(e)}")
-            self.data_type_mapping = {}
-    
-    def parse_array_type(self, udt_type):
-        """Parse array type like 'ARRAY[0..16] OF ANL' and return base type and array info"""
-        array_match = re.match(r'ARRAY\[(\d+)\.\.(\d+)\]\s+OF\s+(.+)', udt_type, re.IGNORECASE)
-        
-        if array_match:
-            return {
-                'is_array': True,
-                'array_start': int(array_match.group(1)),
-                'array_end': int(array_match.group(2)),
-                'base_type': array_match.group(3).strip()
-            }
-        else:
-            return {
-                'is_array': False,
-                'array_start': None,
-                'array_end': None,
-                'base_type': udt_type
-            }
-    
-    def parse_data_type_array(self, data_type):
-        """Parse data type array like 'ARRAY[0..1] of BOOL' and return (indices, base_type) or (None, data_type)"""
-        array_match = re.match(r'ARRAY\[(\d+)\.\.(\d+)\]\s+of\s+(.+)', str(data_type), re.IGNORECASE)
-        
-        if array_match:
-            array_start = int(array_match.group(1))
-            array_end = int(array_match.group(2))
-            base_type = array_match.group(3).strip().upper()
-            indices = list(range(array_start, array_end + 1))
-            return (indices, base_type)
-        else:
-            return (None, str(data_type).upper() if data_type else '')
+            self.events.put(('mapped', None, e))
     
-    def extract_numeric_indices(self, scada_tag_path):
-        """Extract all numeric indices from a scada tag path for proper numeric sorting"""
-        indices = re.findall(r'\[(\d+)\]', str(scada_tag_path))
-        return tuple(int(idx) for idx in indices) if indices else (0,)
-    
-    def extract_base_tag_path(self, scada_tag_path):
-        """Extract base tag path without array indices"""
-        return re.sub(r'\[\d+\]', '', str(scada_tag_path))
-
-    def format_signal_label(self, signal_type):
-        """Format signal type: replace underscores, insert spaces before uppercase, collapse spaces, uppercase."""
-        if not signal_type:
-            return ''
-        s = str(signal_type)
-        if s.replace('_', '').isupper():
-            return s.replace('_', '').upper()
-
-        s = s.replace('_', ' ')
-        s = re.sub(r'(?<!^)(?=[A-Z])', ' ', s)
-        s = ' '.join(s.split())
-        s = s.upper()
-        s = re.sub(r'\bHI\s+HI\b', 'HIHI', s)
-        s = re.sub(r'\bLO\s+LO\b', 'LOLO', s)
-        return s
-    
-    def get_signal_type_category(self, udt_type, description='', data_block='', area=''):
-        """Determine signal type category (ANALOG, DIGITAL, COMM, CALCULATED) based on UDT type, description, data block, and area"""
-        udt_lower = str(udt_type).lower().strip()
-        desc_lower = str(description).lower().strip()
-        data_block_lower = str(data_block).lower().strip()
-        area_lower = str(area).lower().strip()
-        
-        # Check for COMM type FIRST - if COMM is in DB, write COMM in Signal Type
-        if 'comm' in data_block_lower:
-            return 'COMM'
-        
-        comm_keywords_desc = ['deif', 'automaskin', 'mtu', 'consilium','nmea','modbus','gps']
-        
-        for keyword in comm_keywords_desc:
-            if keyword in data_block_lower:
-                return 'COMM'
-            
-        for keyword in comm_keywords_desc:
-            if keyword in desc_lower:
-                return 'COMM'
-        comm_keywords_udt = ['deif', 'automaskin', 'mtu', 'consilium','nmea','modbus','gps']
-        for keyword in comm_keywords_udt:
-            if keyword in udt_lower:
-                return 'COMM'
-        
-        # Check for CALCULATED type
-        if 'position failure' in desc_lower or area_lower == 'diagnostics':
-            return 'CALCULATED'
-        if 'setpoint' in desc_lower or area_lower == 'diagnostics':
-            return 'CALCULATED'
-        if '_sp' in desc_lower or area_lower == 'diagnostics':
-            return 'CALCULATED'
-        
-        # Check for ANALOG
-        if udt_lower in ['tank','anl', 'anl_tank','analog','comm_analog','deif_analog'] or 'anl' in udt_lower or 'analog' in udt_lower:
-            return 'ANALOG'
-        
-        # Check for DIGITAL
-        digital_keywords = ['dig_alr', 'dig_alr_wo_inh', 'pump', 'bilge', 'valve', 'int', 'bool']
-        for keyword in digital_keywords:
-            if keyword in udt_lower:
-                return 'DIGITAL'
-        
-        return ''
+    def finish_mapping(self, data_type_mapping, error):
+        """Runs on the Tk thread once the mapping is loaded"""
+        self.set_running(False)
+        self.worker = None
+        
+        if error is not None:
+            self.status_label.config(text="Ready")
+            self.log(f"✗ Error loading mapping file: {str(error)}")
+            messagebox.showerror("Error", f"Failed to load mapping file:\n{str(error)}")
+            return
+        
+        self.data_type_mapping = data_type_mapping
+        self.status_label.config(text=f"Mapping loaded: {len(data_type_mapping):,} UDT types")
     
-    def format_worksheet(self, ws, is_scada=False, area_color=None, area_rows=None):
-        """Apply professional formatting to worksheet"""
-        header_fill = PatternFill(start_color='0078d4', end_color='0078d4', fill_type='solid')
-        scada_header_fill = PatternFill(start_color='28a745', end_color='28a745', fill_type='solid')
-        alt_row_fill = PatternFill(start_color='f0f8ff', end_color='f0f8ff', fill_type='solid')
-        
-        if area_color:
-            header_fill = PatternFill(start_color=area_color, end_color=area_color, fill_type='solid')
-        
-        header_font = Font(name='Calibri', size=11, bold=True, color='FFFFFF')
-        cell_font = Font(name='Calibri', size=10)
-        
-        thin_border = Border(
-            left=Side(style='thin', color='d0d0d0'),
-            right=Side(style='thin', color='d0d0d0'),
-            top=Side(style='thin', color='d0d0d0'),
-            bottom=Side(style='thin', color='d0d0d0')
+    def get_column_config(self):
+        """Collect the column names currently entered in the configuration fields"""
+        return ColumnConfig(
+            tag_name=self.tag_name_col.get(),
+            data_block=self.data_block_col.get(),
+            description=self.desc_col.get(),
+            udt_type=self.type_col.get(),
+            area=self.area_col.get(),
+            comments=self.comments_col.get(),
+            origin=self.origin_col.get(),
         )
-        
-        for cell in ws[1]:
-            cell.fill = scada_header_fill if is_scada else header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = thin_border
-        
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2), start=2):
-            row_fill = alt_row_fill
-            if is_scada and area_rows:
-                for area_name, area_info in area_rows.items():
-                    if row_idx >= area_info['start'] and row_idx <= area_info['end']:
-                        area_color_hex = area_info['color']
-                        row_fill = PatternFill(start_color=area_color_hex, end_color=area_color_hex, fill_type='solid')
-                        break
-            elif row_idx % 2 == 0:
-                row_fill = alt_row_fill
-            
-            for cell in row:
-                cell.font = cell_font
-                cell.border = thin_border
-                cell.alignment = Alignment(vertical='center')
-                cell.fill = row_fill
-        
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            
-            for cell in column:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        ws.auto_filter.ref = ws.dimensions
-        ws.freeze_panes = 'A2'
+    
+    def get_sheets(self):
+        """Sheets to read from the Sheets field: None for the first sheet, ALL_SHEETS or a list of names"""
+        text = self.sheets_entry.get().strip()
+        if not text:
+            return None
+        if text == ALL_SHEETS:
+            return ALL_SHEETS
+        return [name.strip() for name in text.split(',') if name.strip()]
     
     def process_file(self):
         if not self.input_file:
@@ -445,358 +485,206 @@ class ExcelTagConverter:
             self.log("✗ Output file selection cancelled")
             return
         
-        output_folder = str(Path(output_file).parent)
+        self.cancel_event = threading.Event()
+        reporter = ProgressReporter(lambda *update: self.events.put(('progress',) + update), self.cancel_event)
+        self.set_running(True)
+        self.status_label.config(text="Starting...")
+        self.worker = threading.Thread(
+            target=self.run_conversion,
+            args=(self.input_file, self.data_type_mapping, output_file, self.get_column_config(), self.get_sheets(),
+                  reporter),
+            daemon=True
+        )
+        self.worker.start()
+    
+    def preview_file(self):
+        """Dry run: count the signals, sheets and unmapped tags a conversion would produce, without writing it"""
+        if not self.input_file:
+            messagebox.showerror("Error", "Please select an input file")
+            return
         
+        plan_file = Path(self.input_file).with_name(f"{Path(self.input_file).stem}_tagged.plan.json")
+        self.cancel_event = threading.Event()
+        reporter = ProgressReporter(lambda *update: self.events.put(('progress',) + update), self.cancel_event)
+        self.set_running(True)
+        self.status_label.config(text="Planning...")
+        self.worker = threading.Thread(
+            target=self.run_preview,
+            args=(self.input_file, self.data_type_mapping, plan_file, self.get_column_config(), self.get_sheets(),
+                  reporter),
+            daemon=True
+        )
+        self.worker.start()
+    
+    def run_preview(self, input_file, data_type_mapping, plan_file, column_config, sheets, reporter):
+        """Worker thread body of a preview; reports back only through the event queue"""
         try:
-            self.log("\n" + "="*70)
-            self.log("🚀 Starting processing...")
-            self.process_btn.config(state="disabled")
-            
-            self.log(f"📖 Reading {Path(self.input_file).name}...")
-            df = pd.read_excel(self.input_file)
-            
-            tag_name_col = self.tag_name_col.get()
-            data_block_col = self.data_block_col.get()
-            desc_col = self.desc_col.get()
-            type_col = self.type_col.get()
-            area_col = self.area_col.get()
-            comments_col = self.comments_col.get()
-            origin_col = self.origin_col.get()
-            
-            required_cols = [tag_name_col, data_block_col, desc_col, type_col, area_col]
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            if missing_cols:
-                raise ValueError(f"Required columns not found: {', '.join(missing_cols)}\nAvailable: {', '.join(df.columns)}")
-            
-            # Create empty columns for optional fields if they don't exist
-            if comments_col not in df.columns:
-                df[comments_col] = ''
-                self.log(f"ℹ️ Created empty '{comments_col}' column")
-            if origin_col not in df.columns:
-                df[origin_col] = ''
-                self.log(f"ℹ️ Created empty '{origin_col}' column")
-            
-            self.log(f"✓ Found {len(df)} rows to process")
-            
-            output_columns = []
-            column_mapping = {}
-            
-            column_mapping['Data Block'] = data_block_col
-            column_mapping['Tag Name'] = tag_name_col
-            column_mapping['UDT Type'] = type_col
-            column_mapping['Area'] = area_col
-            column_mapping['Description'] = desc_col
-            
-            output_columns = ['Data Block', 'Tag Name', 'UDT Type', 'Area']
-
-            if comments_col in df.columns:
-                column_mapping['Comments'] = comments_col
-                output_columns.append('Comments')
-            if origin_col in df.columns:
-                column_mapping['Origin'] = origin_col
-                output_columns.append('Origin')
-
-            output_columns.append('Description')
-            comments_present = comments_col in df.columns
-            origin_present = origin_col in df.columns
-            
-            df_output = pd.DataFrame()
-            for col in output_columns:
-                df_output[col] = df[column_mapping[col]]
-
-            # Ensure exporter-friendly columns exist on area tabs
-            if 'Origin' not in df_output.columns:
-                df_output['Origin'] = df[origin_col] if origin_col in df.columns else ''
-            if 'Signal Type' not in df_output.columns:
-                df_output['Signal Type'] = ''
-            if 'Is Alarm' not in df_output.columns:
-                df_output['Is Alarm'] = False
-            if 'Alarm Priority' not in df_output.columns:
-                df_output['Alarm Priority'] = 0
-            if 'Tag History' not in df_output.columns:
-                df_output['Tag History'] = False
-            
-            # Populate Signal Type for all rows
-            for idx, row in df_output.iterrows():
-                udt_type = row['UDT Type']
-                description = row['Description']
-                data_block = row['Data Block']
-                area = row['Area']
-                signal_type_category = self.get_signal_type_category(udt_type, description, data_block, area)
-                df_output.at[idx, 'Signal Type'] = signal_type_category
-            
-            self.log(f"\n📝 Creating formatted Excel output...")
-            output_file = Path(output_file)
-            
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                areas = sorted(df[area_col].unique())
-                
-                for idx, area in enumerate(areas):
-                    area_df = df_output[df_output['Area'] == area].copy()
-                    
-                    sheet_name = str(area)[:31]
-                    for char in ['/', '\\', '*', '?', '[', ']', ':']:
-                        sheet_name = sheet_name.replace(char, '_')
-                    
-                    # Enforce requested tagged columns order
-                    desired_order = ['Data Block', 'Tag Name', 'UDT Type', 'Signal Type', 'Comments', 'Is Alarm', 'Alarm Priority', 'Tag History', 'Origin', 'Description']
-                    cols_present = [c for c in desired_order if c in area_df.columns]
-                    if 'Description' in area_df.columns and 'Description' not in cols_present:
-                        cols_present.append('Description')
-                    if cols_present:
-                        area_df = area_df[cols_present]
-
-                        # Ensure area tab has exporter columns present and in a stable order
-                        if 'Origin' not in area_df.columns:
-                            area_df['Origin'] = df[origin_col] if origin_col in df.columns else ''
-                        if 'Signal Type' not in area_df.columns:
-                            area_df['Signal Type'] = ''
-                        if 'Is Alarm' not in area_df.columns:
-                            area_df['Is Alarm'] = False
-
-                    area_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    self.log(f"  ✓ Created '{sheet_name}' with {len(area_df)} rows")
-                
-                if self.data_type_mapping:
-                    self.log("\n🔧 Generating SCADA SIGNAL tab...")
-                    scada_rows = []
-                    
-                    for _, row in df.iterrows():
-                        tag_name = row[tag_name_col] 
-                        data_block = row[data_block_col]
-                        description = row[desc_col]
-                        area = row[area_col]
-                        udt_type = str(row[type_col]).strip()
-                        
-                        
-                        
-                        array_type_match = re.match(r'ARRAY\[(\d+)\.\.(\d+)\]\s+OF\s+(.+)', udt_type, re.IGNORECASE)
-                        
-                        if array_type_match:
-                            array_type_start = int(array_type_match.group(1))
-                            array_type_end = int(array_type_match.group(2))
-                            base_type = array_type_match.group(3).strip()
-
-                            indices = list(range(array_type_start, array_type_end + 1))
-                            if base_type in self.data_type_mapping:
-                                signal_types = self.data_type_mapping[base_type]['signals']
-                                signal_type_category = self.get_signal_type_category(base_type, description, data_block, area)
-                                # For each index in the array, output a row for each signal type
-                                for index in indices:
-                                    for signal_type in signal_types:
-                                        mapped_data_type = self.data_type_mapping[base_type]['data_types'].get(signal_type, '')
-                                        # If mapped_data_type is an array type (e.g., 'ARRAY[0..1] of BOOL'), extract the base type
-                                        array_type_match2 = re.match(r'ARRAY\[\d+\.\.\d+\]\s+of\s+(.+)', mapped_data_type, re.IGNORECASE) if mapped_data_type else None
-                                        if array_type_match2:
-                                            data_type_col = array_type_match2.group(1).strip().upper()
-                                        else:
-                                            data_type_col = mapped_data_type.upper() if mapped_data_type else signal_type.upper()
-                                        # If the data type is BOOL or base type is BOOL, always output BOOL
-                                        if data_type_col == 'BOOL' or signal_type.upper() == 'BOOL':
-                                            data_type_col = 'BOOL'
-                                        scada_tag_path = f"{data_block}.{tag_name}[{index}]"
-                                        scada_rows.append({
-                                            'Area': area,
-                                            'DB': data_block,
-                                            'Scada Tag Path': scada_tag_path,
-                                            'Type': signal_type,
-                                            'Signal Type': signal_type_category,
-                                            'Data Type': data_type_col,
-                                            'Description': description,
-                                            'Comments': (row[comments_col] if comments_present and pd.notna(row[comments_col]) else ''),
-                                            'Origin': (row[origin_col] if origin_present and pd.notna(row[origin_col]) else ''),
-                                            'Is Alarm': False
-                                        })
-                        
-                        elif udt_type in self.data_type_mapping:
-                            mapping_info = self.data_type_mapping[udt_type]
-                            signal_types = mapping_info['signals']
-                            signal_type_category = self.get_signal_type_category(udt_type, description, data_block, area)
-                            
-                            if mapping_info.get('is_array'):
-                                indices = list(range(mapping_info['array_start'], mapping_info['array_end'] + 1))
-                                
-                                for signal_type in signal_types:
-                                    for index in indices:
-                                        mapped_data_type = self.data_type_mapping[udt_type]['data_types'].get(signal_type, '')
-                                        if mapped_data_type:
-                                            scada_tag_path = f"{data_block}.{tag_name}[{index}].{signal_type}"
-                                            data_type_col = mapped_data_type
-                                        else:
-                                            scada_tag_path = f"{data_block}.{tag_name}[{index}]"
-                                            data_type_col = signal_type
-                                        formatted_signal = self.format_signal_label(signal_type)
-                                        sig_raw = str(signal_type) if signal_type is not None else ''
-                                        is_data_type = bool(re.fullmatch(r'[A-Z0-9]+', sig_raw.replace('_', '')))
-                                        if formatted_signal and not is_data_type and signal_type.upper() != 'STATUS':
-                                            desc_with_signal = f"{description} {formatted_signal}".strip()
-                                        else:
-                                            desc_with_signal = description
-                                        sig_str = str(signal_type) if signal_type is not None else ''
-                                        suffix = str(scada_tag_path).split('.')[-1] if scada_tag_path else ''
-                                        is_alarm = bool(re.search(r'(ALR|ALARM|HIHI|HI|LOLO|LO)', sig_str, re.IGNORECASE)) or bool(re.search(r'(ALR|ALARM|HIHI|HI|LOLO|LO)', str(suffix), re.IGNORECASE))
-                                        scada_rows.append({
-                                            'Area': area,
-                                            'DB': data_block,
-                                            'Scada Tag Path': scada_tag_path,
-                                            'Type': signal_type,
-                                            'Signal Type': signal_type_category,
-                                            'Data Type': data_type_col,
-                                            'Description': desc_with_signal,
-                                            'Comments': (row[comments_col] if comments_present and pd.notna(row[comments_col]) else ''),
-                                            'Origin': (row[origin_col] if origin_present and pd.notna(row[origin_col]) else ''),
-                                            'Is Alarm': is_alarm
-                                        })
-                            else:
-                                for signal_type in signal_types:
-                                    mapped_data_type = self.data_type_mapping[udt_type]['data_types'].get(signal_type, '')
-                                    
-                                    # Parse array type in data type (e.g., "ARRAY[0..1] of BOOL")
-                                    data_type_indices, base_data_type = self.parse_data_type_array(mapped_data_type)
-                                    
-                                    if data_type_indices:
-                                        # Data type is an array - create one row per index
-                                        for idx in data_type_indices:
-                                            scada_tag_path = f"{data_block}.{tag_name}.{signal_type}[{idx}]"
-                                            data_type_col = base_data_type
-                                            formatted_signal = self.format_signal_label(signal_type)
-                                            sig_raw = str(signal_type) if signal_type is not None else ''
-                                            is_data_type = bool(re.fullmatch(r'[A-Z0-9]+', sig_raw.replace('_', '')))
-                                            if formatted_signal and not is_data_type and signal_type.upper() != 'STATUS':
-                                                desc_with_signal = f"{description} {formatted_signal}".strip()
-                                            else:
-                                                desc_with_signal = description
-                                            sig_str = str(signal_type) if signal_type is not None else ''
-                                            suffix = str(scada_tag_path).split('.')[-1] if scada_tag_path else ''
-                                            is_alarm = bool(re.search(r'(ALR|ALARM|HIHI|HI|LOLO|LO)', sig_str, re.IGNORECASE)) or bool(re.search(r'(ALR|ALARM|HIHI|HI|LOLO|LO)', str(suffix), re.IGNORECASE))
-                                            scada_rows.append({
-                                                'Area': area,
-                                                'DB': data_block,
-                                                'Scada Tag Path': scada_tag_path,
-                                                'Type': signal_type,
-                                                'Signal Type': signal_type_category,
-                                                'Data Type': data_type_col,
-                                                'Description': desc_with_signal,
-                                                'Comments': (row[comments_col] if comments_present and pd.notna(row[comments_col]) else ''),
-                                                'Origin': (row[origin_col] if origin_present and pd.notna(row[origin_col]) else ''),
-                                                'Is Alarm': is_alarm
-                                            })
-                                    else:
-                                        # Regular data type - single row
-                                        if mapped_data_type:
-                                            scada_tag_path = f"{data_block}.{tag_name}.{signal_type}"
-                                            data_type_col = mapped_data_type
-                                        else:
-                                            scada_tag_path = f"{data_block}.{tag_name}"
-                                            data_type_col = signal_type
-                                        formatted_signal = self.format_signal_label(signal_type)
-                                        sig_raw = str(signal_type) if signal_type is not None else ''
-                                        is_data_type = bool(re.fullmatch(r'[A-Z0-9]+', sig_raw.replace('_', '')))
-                                        if formatted_signal and not is_data_type and signal_type.upper() != 'STATUS':
-                                            desc_with_signal = f"{description} {formatted_signal}".strip()
-                                        else:
-                                            desc_with_signal = description
-                                        sig_str = str(signal_type) if signal_type is not None else ''
-                                        suffix = str(scada_tag_path).split('.')[-1] if scada_tag_path else ''
-                                        is_alarm = bool(re.search(r'(ALR|ALARM|HIHI|HI|LOLO|LO)', sig_str, re.IGNORECASE)) or bool(re.search(r'(ALR|ALARM|HIHI|HI|LOLO|LO)', str(suffix), re.IGNORECASE))
-                                        scada_rows.append({
-                                            'Area': area,
-                                            'DB': data_block,
-                                            'Scada Tag Path': scada_tag_path,
-                                            'Type': signal_type,
-                                            'Signal Type': signal_type_category,
-                                            'Data Type': data_type_col,
-                                            'Description': desc_with_signal,
-                                            'Comments': (row[comments_col] if comments_present and pd.notna(row[comments_col]) else ''),
-                                            'Origin': (row[origin_col] if origin_present and pd.notna(row[origin_col]) else ''),
-                                            'Is Alarm': is_alarm
-                                        })
-                        
-                    if scada_rows:
-                        scada_df = pd.DataFrame(scada_rows)
-                        scada_df['Area'] = scada_df['Area'].astype(str).str.strip()
-                        scada_df['Scada Tag Path'] = scada_df['Scada Tag Path'].astype(str).str.strip()
-                        try:
-                            areas_list = [str(a) for a in areas]
-                            scada_df['Area'] = pd.Categorical(scada_df['Area'], categories=areas_list, ordered=True)
-                        except Exception:
-                            pass
-
-                        # Sort with numeric-aware index handling for array indices
-                        scada_df['_numeric_indices'] = scada_df['Scada Tag Path'].apply(self.extract_numeric_indices)
-                        scada_df['_base_tag'] = scada_df['Scada Tag Path'].apply(self.extract_base_tag_path)
-                        scada_df = scada_df.sort_values(by=['Area', '_base_tag', '_numeric_indices']).reset_index(drop=True)
-                        scada_df = scada_df.drop(['_numeric_indices', '_base_tag'], axis=1)
-
-                        # Compute area row map BEFORE dropping Area (used for coloring)
-                        area_row_map = {}
-                        current_row = 2
-                        area_color_idx = 0
-                        for area_name in scada_df['Area'].unique():
-                            area_count = len(scada_df[scada_df['Area'] == area_name])
-                            area_row_map[area_name] = {
-                                'start': current_row,
-                                'end': current_row + area_count - 1,
-                                'color': self.area_colors[area_color_idx % len(self.area_colors)]
-                            }
-                            current_row += area_count
-                            area_color_idx += 1
-
-                        # Final SCADA sheet: Area, DB, Scada Tag Path, Data Type, Comments, Origin, Description
-                        final_cols = ['Area', 'DB', 'Scada Tag Path', 'Data Type', 'Comments', 'Origin', 'Description']
-                        final_cols = [c for c in final_cols if c in scada_df.columns]
-                        final_scada = scada_df[final_cols]
-                        final_scada.to_excel(writer, sheet_name='SCADA_SIGNAL', index=False)
-                        self.log(f"  ✓ Created SCADA_SIGNAL with {len(final_scada)} rows")
-            
-            self.log("\n🎨 Applying professional formatting...")
-            wb = load_workbook(output_file)
-            
-            area_idx = 0
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                is_scada = sheet_name == 'SCADA_SIGNAL'
-                
-                area_color = None
-                area_rows_info = None
-                
-                if not is_scada:
-                    area_color = self.area_colors[area_idx % len(self.area_colors)]
-                    area_idx += 1
-                    self.format_worksheet(ws, is_scada, area_color)
-                else:
-                    self.format_worksheet(ws, is_scada, None, area_row_map)
-                
-                self.log(f"  ✓ Formatted '{sheet_name}'")
-            
-            wb.save(output_file)
-            
-            self.log(f"\n✅ SUCCESS! Output saved to:")
-            self.log(f"   {output_file}")
-            self.log("="*70)
-            messagebox.showinfo("Success", 
-                              f"Processing complete! ✓\n\n"
-                              f"Processed: {len(df)} rows\n"
-                              f"Created: {len(areas)} area tabs\n"
-                              f"Output: {output_file.name}")
-            
-            # Open the output folder
-            if sys.platform == 'win32':
-                os.startfile(output_folder)
-            elif sys.platform == 'darwin':
-                subprocess.Popen(['open', output_folder])
-            else:
-                subprocess.Popen(['xdg-open', output_folder])
-            
+            from tag_converter.planner import plan_conversion, write_plan
+            plan = plan_conversion(input_file, data_type_mapping, column_config, log=self.log, progress=reporter,
+                                   sheets=sheets)
+            write_plan(plan, plan_file)
+            self.events.put(('planned', plan_file, plan, None))
+        except ConversionCancelled:
+            self.events.put(('planned', plan_file, None, None))
         except Exception as e:
-            self.log(f"\n❌ ERROR: {str(e)}")
-            messagebox.showerror("Error", f"An error occurred:\n{str(e)}")
+            self.events.put(('planned', plan_file, None, e))
+    
+    def finish_preview(self, plan_file, plan, error):
+        """Runs on the Tk thread once a preview is done"""
+        self.set_running(False)
+        self.worker = None
+        
+        if error is not None:
+            self.status_label.config(text="Preview failed")
+            self.log(f"\n❌ ERROR: {str(error)}")
+            messagebox.showerror("Error", f"Preview failed:\n{str(error)}")
+            return
+        
+        if plan is None:
+            self.status_label.config(text="Cancelled")
+            return
         
-        finally:
-            self.process_btn.config(state="normal")
+        from tag_converter.planner import format_plan, format_size
+        for line in format_plan(plan):
+            self.log(line)
+        self.log(f"📋 Plan: {plan_file}")
+        self.status_label.config(text=f"Preview: {plan['input_rows']:,} tags → {plan['scada_signals']:,} signals")
+        sheets = len(plan['areas']) + len(plan['scada_sheets'])
+        messagebox.showinfo("Preview",
+                          f"Tags: {plan['input_rows']:,}\n"
+                          f"SCADA signals: {plan['scada_signals']:,}\n"
+                          f"Sheets: {sheets}\n"
+                          f"Unmapped tags: {plan['unmapped']['tags']:,}\n"
+                          f"Warnings: {len(plan['warnings'])}\n"
+                          f"Estimated workbook size: {format_size(plan['estimated_bytes']['workbook'])}\n\n"
+                          f"Details are in the log and in {plan_file.name}")
+    
+    def batch_files(self):
+        """Convert several tag lists with the loaded mapping into one folder, a few files at a time"""
+        files = filedialog.askopenfilenames(
+            title="Select Input Tag Lists",
+            filetypes=INPUT_FILETYPES
+        )
+        if not files:
+            return
+        
+        output_dir = filedialog.askdirectory(title="Select Output Folder", initialdir=str(Path(files[0]).parent))
+        if not output_dir:
+            self.log("✗ Output folder selection cancelled")
+            return
+        
+        merged_output = None
+        if self.data_type_mapping and messagebox.askyesno(
+                "Merged SCADA_SIGNAL", "Also write one workbook with the SCADA signals of all files?"):
+            merged_output = str(Path(output_dir) / MERGED_FILENAME)
+        
+        self.cancel_event = threading.Event()
+        reporter = ProgressReporter(lambda *update: self.events.put(('progress',) + update), self.cancel_event)
+        self.set_running(True)
+        self.status_label.config(text=f"Starting batch of {len(files)} files...")
+        self.worker = threading.Thread(
+            target=self.run_batch,
+            args=(list(files), self.data_type_mapping, output_dir, merged_output, self.get_column_config(),
+                  self.get_sheets(), reporter),
+            daemon=True
+        )
+        self.worker.start()
+    
+    def run_batch(self, input_files, data_type_mapping, output_dir, merged_output, column_config, sheets, reporter):
+        """Worker thread body of a batch; reports back only through the event queue"""
+        try:
+            from tag_converter.batch import convert_batch
+            summary = convert_batch(input_files, data_type_mapping, output_dir, column_config, jobs=BATCH_JOBS,
+                                    merged_output=merged_output, log=self.log, progress=reporter, sheets=sheets)
+            self.events.put(('batched', output_dir, summary, None))
+        except ConversionCancelled:
+            self.events.put(('batched', output_dir, None, None))
+        except Exception as e:
+            self.events.put(('batched', output_dir, None, e))
+    
+    def finish_batch(self, output_dir, summary, error):
+        """Runs on the Tk thread once a batch is done"""
+        self.set_running(False)
+        self.worker = None
+        
+        if error is not None:
+            self.status_label.config(text="Batch failed")
+            self.log(f"\n❌ ERROR: {str(error)}")
+            messagebox.showerror("Error", f"Batch failed:\n{str(error)}")
+            return
+        
+        if summary is None:
+            self.status_label.config(text="Cancelled")
+            self.log("\n⏹ Batch cancelled - files that had not started were skipped")
+            return
+        
+        totals = summary['totals']
+        self.status_label.config(text=f"Batch done: {totals['converted']} of {totals['files']} files")
+        failed = [Path(result['input_file']).name for result in summary['files'] if result['status'] == 'failed']
+        merged = summary.get('merged')
+        message = (f"Converted: {totals['converted']} of {totals['files']} files\n"
+                   f"Tags: {totals['input_rows']:,}\n"
+                   f"SCADA signals: {totals['scada_signals']:,}\n")
+        if failed:
+            message += f"Failed: {', '.join(failed)}\n"
+        if merged:
+            message += f"Merged workbook: {'failed' if 'error' in merged else Path(merged['output_file']).name}\n"
+        message += f"\nSummary: {Path(summary['summary_file']).name}"
+        (messagebox.showwarning if failed else messagebox.showinfo)("Batch complete", message)
+        self.open_folder(output_dir)
+    
+    def run_conversion(self, input_file, data_type_mapping, output_file, column_config, sheets, reporter):
+        """Worker thread body; reports back only through the event queue"""
+        try:
+            from tag_converter import convert
+            # Several sheets are parsed at once in worker processes
+            stats = convert(input_file, data_type_mapping, output_file, column_config,
+                            log=self.log, progress=reporter, sheets=sheets,
+                            workers=SHEET_WORKERS if sheets is not None else 1)
+            self.events.put(('finished', output_file, stats, None))
+        except ConversionCancelled:
+            self.events.put(('finished', output_file, None, None))
+        except Exception as e:
+            self.events.put(('finished', output_file, None, e))
+    
+    def finish_processing(self, output_file, stats, error):
+        """Runs on the Tk thread once the worker is done"""
+        self.set_running(False)
+        self.worker = None
+        
+        if error is not None:
+            self.status_label.config(text="Failed")
+            self.log(f"\n❌ ERROR: {str(error)}")
+            messagebox.showerror("Error", f"An error occurred:\n{str(error)}")
+            return
+        
+        if stats is None:
+            self.status_label.config(text="Cancelled")
+            self.log("\n⏹ Processing cancelled - no output file was written")
+            return
+        
+        self.status_label.config(text=f"Done: {stats['input_rows']:,} rows")
+        messagebox.showinfo("Success", 
+                          f"Processing complete! ✓\n\n"
+                          f"Processed: {stats['input_rows']} rows\n"
+                          f"Created: {len(stats['area_sheets'])} area tabs\n"
+                          f"Output: {Path(output_file).name}")
+        
+        self.open_folder(Path(output_file).parent)
+    
+    def open_folder(self, folder):
+        folder = str(folder)
+        if sys.platform == 'win32':
+            os.startfile(folder)
+        elif sys.platform == 'darwin':
+            subprocess.Popen(['open', folder])
+        else:
+            subprocess.Popen(['xdg-open', folder])
 
     
 if __name__ == "__main__":
+    # Batch conversions start worker processes, which a frozen executable must be able to launch
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ExcelTagConverter(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""Headless conversion engine behind the Excel Tag Converter GUI."""
+
+import importlib
+
+from .columns import ColumnConfig
+from .progress import ConversionCancelled, ProgressReporter
+
+__all__ = ['ColumnConfig', 'ConversionCancelled', 'ProgressReporter', 'convert', 'load_mapping', 'preload']
+
+# Names whose modules import pandas and openpyxl: loaded on first use, so importing the package stays cheap
+_LAZY_ATTRIBUTES = {'convert': 'engine', 'load_mapping': 'mapping'}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def preload():
+    """Import the conversion engine now (e.g. on a background thread) so the first conversion does not wait for it"""
+    from . import engine, planner  # noqa: F401
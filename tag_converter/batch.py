@@ -0,0 +1,283 @@
+import glob
+import json
+import os
+import pickle
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from .engine import build_area_row_map, convert, write_scada_sheets
+from .export import check_export_formats
+from .mapping import load_mapping, prepare_mapping
+from .progress import NO_PROGRESS
+from .writer import DEFAULT_WRITER, check_writer_backend, create_writer
+
+SUMMARY_FILE = 'batch_summary.json'
+# Suffix of the typed signal list each conversion keeps next to its workbook for the merged workbook
+SIGNAL_LIST_SUFFIX = '.signals.pickle'
+# Seconds between cancellation checks while files are converting
+POLL_INTERVAL = 0.2
+
+# The compiled mapping of a conversion worker process, set once when the process starts
+_worker_mapping = None
+
+
+def _no_log(message):
+    pass
+
+
+def _init_worker(data_type_mapping):
+    global _worker_mapping
+    _worker_mapping = data_type_mapping
+
+
+def start_pool(jobs, data_type_mapping):
+    """Process pool whose workers each receive the compiled mapping once, when they start"""
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(data_type_mapping,))
+
+
+def convert_in_worker(input_file, output_file, options, signal_file=None):
+    """convert() in a start_pool worker against its mapping; returns (stats, wall seconds).
+
+    With ``signal_file`` the sorted SCADA signal list is also written there
+    (see write_signal_list).
+    """
+    started = time.perf_counter()
+    if signal_file is not None:
+        options = dict(options, signal_sink=lambda columns, chunks, rows: write_signal_list(signal_file, columns, chunks))
+    stats = convert(input_file, _worker_mapping, output_file, **options)
+    return stats, time.perf_counter() - started
+
+
+def signal_list_path(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}{SIGNAL_LIST_SUFFIX}")
+
+
+def write_signal_list(path, columns, chunks):
+    """Pickle a signal list one DataFrame chunk at a time, keeping every value's type (see read_signal_list)"""
+    with open(path, 'wb') as f:
+        written = False
+        for chunk in chunks:
+            pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+            written = True
+        if not written:
+            pickle.dump(pd.DataFrame(columns=columns), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_signal_list(path):
+    """The signal list written by write_signal_list, as one DataFrame"""
+    chunks = []
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                chunks.append(pickle.load(f))
+            except EOFError:
+                break
+    return pd.concat(chunks, ignore_index=True)
+
+
+def output_path(input_file, output_dir, with_extension=False):
+    """Where the workbook for an input file goes: the CLI/GUI default name, in ``output_dir``.
+
+    ``with_extension`` keeps inputs that only differ in their extension
+    (tags.xlsx, tags.csv) apart: 'tags_csv_tagged.xlsx'.
+    """
+    input_file = Path(input_file)
+    stem = f"{input_file.stem}_{input_file.suffix[1:].lower()}" if with_extension else input_file.stem
+    return Path(output_dir) / f"{stem}_tagged.xlsx"
+
+
+def batch_outputs(input_files, output_dir):
+    """Output workbook of each input file; inputs sharing a name stem get the extension added"""
+    stems = Counter(Path(input_file).stem.lower() for input_file in input_files)
+    return {input_file: output_path(input_file, output_dir, stems[Path(input_file).stem.lower()] > 1)
+            for input_file in input_files}
+
+
+def expand_inputs(patterns):
+    """Input files named by paths and glob patterns, in the given order and without duplicates"""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            raise ValueError(f"No input files match '{pattern}'")
+        files.extend(Path(match) for match in matches)
+    return list(dict.fromkeys(files))
+
+
+def merge_signal_lists(signal_files, merged_file, writer_backend=DEFAULT_WRITER, width_sample=None,
+                       progress=NO_PROGRESS, log=_no_log):
+    """Write one SCADA_SIGNAL workbook from the signal lists of several conversions (see write_signal_list).
+
+    Areas are merged in sorted order, each taking its rows from the lists in
+    the given order, so each input's own order is kept within an area; areas
+    are banded and the sheet split at Excel's row limit as in a single
+    conversion. Areas sort by their text, so numbers and names mix.
+    Returns {sheet name: rows}.
+    """
+    # Cell values keep their types, so numbers stay numbers as in each input's own workbook
+    frames = [read_signal_list(path).astype(object) for path in signal_files]
+    # Each list is already sorted by area: only the area slices are put in order, not every row
+    positions = [frame.groupby('Area', sort=False).indices for frame in frames]
+    areas = sorted(dict.fromkeys(area for frame_positions in positions for area in frame_positions), key=str)
+    parts = [frame.iloc[frame_positions[area]] for area in areas
+             for frame, frame_positions in zip(frames, positions) if area in frame_positions]
+    # Missing areas go last
+    parts += [frame[frame['Area'].isna()] for frame in frames]
+    merged = pd.concat(parts, ignore_index=True)
+    with create_writer(writer_backend, merged_file, width_sample, progress) as writer:
+        return write_scada_sheets(writer, merged, build_area_row_map(merged), log)
+
+
+def _file_result(input_file, output_file, stats=None, seconds=None, error=None):
+    result = {'input_file': str(input_file), 'output_file': str(output_file)}
+    if error is not None:
+        result.update(status='failed', error=str(error), error_type=type(error).__name__)
+        return result
+    result.update(
+        status='converted',
+        seconds=round(seconds, 3),
+        input_rows=stats['input_rows'],
+        area_sheets=len(stats['area_sheets']),
+        scada_signals=stats['scada_signals'],
+        scada_sheets=stats['scada_sheets'],
+        exports=stats['exports'],
+        report_file=stats.get('report_file'),
+    )
+    return result
+
+
+def format_summary(summary):
+    """Log lines of a batch summary, one per file"""
+    lines = [f"📚 Batch: {summary['totals']['converted']} of {summary['totals']['files']} files converted "
+             f"in {summary['wall_s']:.1f}s, {summary['totals']['input_rows']:,} tags → "
+             f"{summary['totals']['scada_signals']:,} SCADA signals"]
+    for result in summary['files']:
+        name = Path(result['input_file']).name
+        if result['status'] == 'failed':
+            lines.append(f"  ❌ {name:<40} {result['error']}")
+        else:
+            lines.append(f"  ✓ {name:<40} {result['input_rows']:>9,} tags {result['scada_signals']:>11,} signals "
+                         f"{result['seconds']:7.1f}s")
+    merged = summary.get('merged')
+    if merged and 'error' in merged:
+        lines.append(f"  ❌ Merged workbook failed: {merged['error']}")
+    elif merged:
+        lines.append(f"  🧩 Merged {sum(merged['scada_sheets'].values()):,} signals into {merged['output_file']}")
+    return lines
+
+
+def convert_batch(input_files, mapping, output_dir, column_config=None, jobs=1, merged_output=None, log=None,
+                  progress=None, use_cache=True, cache_dir=None, **convert_options):
+    """Convert several tag lists that share one mapping into ``output_dir``, in a pool of ``jobs`` processes.
+
+    The mapping is loaded once and handed to each worker process when it
+    starts; every input gets its own workbook and run report, named as the
+    CLI names them. ``convert_options`` are passed on to convert(). A file
+    that fails does not stop the others. The per-file results and totals are
+    written to '<output_dir>/batch_summary.json'. With ``merged_output`` the
+    SCADA signals of all inputs are also written to one workbook there (see
+    merge_signal_lists). ``progress`` receives a 'batch' stage update (files
+    done, files) as files finish; cancelling it skips the files that have
+    not started yet once the running ones finish. Returns the summary dict.
+    """
+    log = log or _no_log
+    progress = progress or NO_PROGRESS
+    check_export_formats(convert_options.get('export_formats', ()))
+    check_writer_backend(convert_options.get('writer_backend', DEFAULT_WRITER))
+    input_files = [Path(input_file) for input_file in input_files]
+    if not input_files:
+        raise ValueError("No input files to convert")
+
+    if mapping is None:
+        data_type_mapping = {}
+    elif isinstance(mapping, dict):
+        data_type_mapping = prepare_mapping(mapping)
+    else:
+        data_type_mapping = load_mapping(mapping, log, use_cache, cache_dir)
+    if merged_output and not data_type_mapping:
+        raise ValueError("A merged SCADA_SIGNAL workbook needs a mapping")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outputs = batch_outputs(input_files, output_dir)
+    options = dict(convert_options, column_config=column_config)
+    # The merged workbook is built from each conversion's typed signal list, removed again at the end
+    signal_files = {input_file: signal_list_path(outputs[input_file]) if merged_output else None
+                    for input_file in input_files}
+    jobs = min(jobs or os.cpu_count() or 1, len(input_files))
+
+    log(f"\n📚 Converting {len(input_files)} files with {jobs} worker process(es)...")
+    started_at = datetime.now().isoformat(timespec='seconds')
+    started = time.perf_counter()
+    results = {}
+    progress.update('batch', 0, len(input_files), force=True)
+    try:
+        # Files are only submitted as workers free up, so a cancelled batch stops after the running ones
+        queued = list(reversed(input_files))
+        running = {}
+        with start_pool(jobs, data_type_mapping) as pool:
+            while queued or running:
+                while queued and len(running) < jobs:
+                    input_file = queued.pop()
+                    running[pool.submit(convert_in_worker, input_file, outputs[input_file], options,
+                                         signal_files[input_file])] = input_file
+                done, _ = wait(list(running), timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    input_file = running.pop(future)
+                    try:
+                        stats, seconds = future.result()
+                        results[input_file] = _file_result(input_file, outputs[input_file], stats, seconds)
+                        log(f"  ✓ {input_file.name} → {outputs[input_file].name}: {stats['input_rows']:,} tags, "
+                            f"{stats['scada_signals']:,} signals in {seconds:.1f}s")
+                    except Exception as e:
+                        results[input_file] = _file_result(input_file, outputs[input_file], error=e)
+                        log(f"  ❌ {input_file.name}: {e}")
+                progress.update('batch', len(results), len(input_files))
+
+        files = [results[input_file] for input_file in input_files]
+        summary = {
+            'started_at': started_at,
+            'mapping': str(mapping) if mapping is not None and not isinstance(mapping, dict) else None,
+            'output_dir': str(output_dir),
+            'jobs': jobs,
+            'files': files,
+            'totals': {
+                'files': len(files),
+                'converted': sum(result['status'] == 'converted' for result in files),
+                'failed': sum(result['status'] == 'failed' for result in files),
+                'input_rows': sum(result.get('input_rows', 0) for result in files),
+                'scada_signals': sum(result.get('scada_signals', 0) for result in files),
+            },
+        }
+
+        if merged_output:
+            signal_lists = [signal_files[input_file] for input_file, result in zip(input_files, files)
+                            if result['status'] == 'converted' and result['scada_signals']]
+            log(f"\n🧩 Merging the signals of {len(signal_lists)} files into {Path(merged_output).name}...")
+            try:
+                sheets = merge_signal_lists(signal_lists, merged_output,
+                                            convert_options.get('writer_backend', DEFAULT_WRITER),
+                                            convert_options.get('width_sample'), progress, log)
+                summary['merged'] = {'output_file': str(merged_output), 'scada_sheets': sheets}
+            except Exception as e:
+                summary['merged'] = {'output_file': str(merged_output), 'error': str(e)}
+    finally:
+        if merged_output:
+            for signal_file in signal_files.values():
+                signal_file.unlink(missing_ok=True)
+
+    summary['wall_s'] = round(time.perf_counter() - started, 3)
+    summary_file = output_dir / SUMMARY_FILE
+    summary_file.write_text(json.dumps(summary, indent=2, default=str), encoding='utf-8')
+    summary['summary_file'] = str(summary_file)
+    log("")
+    for line in format_summary(summary):
+        log(line)
+    log(f"📊 Batch summary: {summary_file}")
+    return summary
@@ -0,0 +1,253 @@
+import json
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict, replace
+from datetime import datetime
+from pathlib import Path
+
+from .constants import DEFAULT_MIN_TIME, DEFAULT_SCALES, DEFAULT_THRESHOLD
+from .engine import convert
+from .mapping import load_mapping
+from .synthetic import SyntheticSpec, generate_mapping, generate_tag_list
+from .writer import available_writers
+
+BASELINE_VERSION = 1
+# Stages that make up writing the workbook
+WRITER_STAGES = ['format', 'write', 'save']
+# The GUI script, next to the package in a source checkout
+GUI_SCRIPT = Path(__file__).resolve().parent.parent / 'ExcelTagConverter.py'
+# Tags in the input converted by the startup benchmark; small, so start-up dominates
+STARTUP_ROWS = 200
+# Runs in a fresh interpreter; prints wall-clock times (time.time(), comparable across processes) of each milestone
+STARTUP_SCRIPT = '''
+import json, sys, threading, time
+gui_dir, input_file, mapping_file, output_file = sys.argv[1:5]
+marks = {}
+sys.path.insert(0, gui_dir)
+import ExcelTagConverter
+marks['gui_import'] = time.time()
+app = None
+try:
+    import tkinter
+    root = tkinter.Tk()
+    app = ExcelTagConverter.ExcelTagConverter(root)
+    root.update()
+    marks['window'] = time.time()
+except tkinter.TclError:
+    pass
+if app is not None:
+    root.update()
+    app.preload_thread.join()
+else:
+    from tag_converter import preload
+    preload()
+marks['engine_ready'] = time.time()
+from tag_converter import convert
+convert(input_file, mapping_file, output_file, report=False)
+marks['first_conversion'] = time.time()
+print(json.dumps(marks))
+'''
+
+
+def _no_log(message):
+    pass
+
+
+def prepare_inputs(spec, work_dir, log=_no_log):
+    """Generate (or reuse) the synthetic input and mapping workbooks for a spec"""
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    mapping_file = work_dir / f"{spec.mapping_stem()}.xlsx"
+    input_file = work_dir / f"tags_{spec.file_stem()}.xlsx"
+    if not mapping_file.exists():
+        generate_mapping(mapping_file, spec)
+    if not input_file.exists():
+        log(f"🧪 Generating {spec.rows:,} synthetic tags...")
+        generate_tag_list(input_file, spec)
+    return input_file, mapping_file
+
+
+def run_scale(spec, work_dir, repeat=1, log=_no_log):
+    """Convert the synthetic input of one spec ``repeat`` times; keeps the fastest time per stage"""
+    input_file, mapping_file = prepare_inputs(spec, work_dir, log)
+    data_type_mapping = load_mapping(mapping_file, use_cache=False)
+    output_file = Path(work_dir) / f"out_{spec.rows}.xlsx"
+
+    result = None
+    for _ in range(repeat):
+        stats = convert(input_file, data_type_mapping, output_file)
+        report = json.loads(Path(stats['report_file']).read_text(encoding='utf-8'))
+        run = {
+            'rows': spec.rows,
+            'scada_signals': stats['scada_signals'],
+            'total_wall_s': report['total']['wall_s'],
+            'peak_rss_mb': report['total']['peak_rss_mb'],
+            'stages': {},
+        }
+        for name, stage in report['stages'].items():
+            run['stages'][name] = {
+                'wall_s': stage['wall_s'],
+                'rows': stage['rows'],
+                'rows_per_s': round(stage['rows'] / stage['wall_s'], 1) if stage['wall_s'] else None,
+            }
+        if result is None:
+            result = run
+            continue
+        result['total_wall_s'] = min(result['total_wall_s'], run['total_wall_s'])
+        for name, stage in run['stages'].items():
+            if name not in result['stages'] or stage['wall_s'] < result['stages'][name]['wall_s']:
+                result['stages'][name] = stage
+    return result
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_time=DEFAULT_MIN_TIME):
+    """Regressions of ``results`` against a baseline: stages whose throughput dropped by more than ``threshold``"""
+    regressions = []
+    for scale, result in results.items():
+        reference = baseline.get('results', {}).get(scale)
+        if reference is None:
+            continue
+        for name, stage in result['stages'].items():
+            ref_stage = reference['stages'].get(name)
+            if not ref_stage or not ref_stage['rows_per_s'] or ref_stage['wall_s'] < min_time:
+                continue
+            rate = stage['rows_per_s'] or 0
+            if rate < ref_stage['rows_per_s'] * (1 - threshold):
+                regressions.append(
+                    f"{scale} tags / {name}: {rate:,.0f} rows/s vs baseline {ref_stage['rows_per_s']:,.0f} rows/s "
+                    f"({rate / ref_stage['rows_per_s'] - 1:+.0%})"
+                )
+    return regressions
+
+
+def format_results(results):
+    lines = []
+    for scale, result in results.items():
+        lines.append(f"📏 {int(scale):,} tags → {result['scada_signals']:,} SCADA signals, "
+                     f"{result['total_wall_s']:.2f}s total, peak {result['peak_rss_mb']} MB")
+        for name, stage in result['stages'].items():
+            rate = f"{stage['rows_per_s']:>12,.0f} rows/s" if stage['rows_per_s'] else f"{'-':>19}"
+            lines.append(f"  {name:<10} {stage['wall_s']:8.3f}s {stage['rows']:>10,} rows {rate}")
+    return lines
+
+
+def run_benchmarks(scales=None, spec=None, work_dir='bench_work', baseline_file=None, save_baseline=False,
+                   threshold=DEFAULT_THRESHOLD, min_time=DEFAULT_MIN_TIME, repeat=1, log=None):
+    """Run the pipeline on synthetic inputs at each scale and check the results against a stored baseline.
+
+    ``spec`` sets every generator parameter except the row count, which each
+    scale overrides. Returns (results, regressions); with ``save_baseline`` the
+    results are written to ``baseline_file`` instead of being compared.
+    """
+    log = log or _no_log
+    spec = spec or SyntheticSpec()
+    results = {}
+    for rows in scales or DEFAULT_SCALES:
+        log(f"\n⏱️ Benchmarking {rows:,} tags...")
+        results[str(rows)] = run_scale(replace(spec, rows=rows), work_dir, repeat, log)
+    for line in format_results(results):
+        log(line)
+
+    regressions = []
+    if baseline_file and save_baseline:
+        baseline = {
+            'baseline_version': BASELINE_VERSION,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'spec': asdict(replace(spec, rows=0)),
+            'results': results,
+        }
+        Path(baseline_file).parent.mkdir(parents=True, exist_ok=True)
+        Path(baseline_file).write_text(json.dumps(baseline, indent=2), encoding='utf-8')
+        log(f"\n💾 Baseline saved to {baseline_file}")
+    elif baseline_file and Path(baseline_file).exists():
+        baseline = json.loads(Path(baseline_file).read_text(encoding='utf-8'))
+        if baseline.get('spec') != asdict(replace(spec, rows=0)):
+            log("⚠️ Baseline was recorded with different generator parameters")
+        regressions = compare(results, baseline, threshold, min_time)
+        if regressions:
+            log(f"\n❌ {len(regressions)} stage(s) regressed by more than {threshold:.0%}:")
+            for regression in regressions:
+                log(f"  {regression}")
+        else:
+            log(f"\n✅ No stage regressed by more than {threshold:.0%}")
+    elif baseline_file:
+        log(f"ℹ️ No baseline at {baseline_file}; run with --save-baseline to record one")
+    return results, regressions
+
+
+def compare_writers(spec, work_dir='bench_work', backends=None, log=None):
+    """Write the synthetic input of one spec with each writer backend and compare write time and peak memory.
+
+    Each backend runs in its own process, since peak RSS only ever grows
+    within one. Returns {backend: result}, or a result with an 'error' for a
+    backend that failed.
+    """
+    log = log or _no_log
+    input_file, mapping_file = prepare_inputs(spec, work_dir, log)
+    results = {}
+    for backend in backends or available_writers():
+        output_file = Path(work_dir) / f"out_{spec.rows}_{backend}.xlsx"
+        command = [sys.executable, '-m', __package__, 'convert', str(input_file), '-m', str(mapping_file),
+                   '-o', str(output_file), '--writer', backend, '--no-mapping-cache', '-q']
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            results[backend] = {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed'}
+            continue
+        report = json.loads(output_file.with_suffix('.report.json').read_text(encoding='utf-8'))
+        stages = report['stages']
+        results[backend] = {
+            'write_s': round(sum(stages[name]['wall_s'] for name in WRITER_STAGES if name in stages), 3),
+            'total_s': report['total']['wall_s'],
+            'peak_rss_mb': report['total']['peak_rss_mb'],
+            'file_mb': round(output_file.stat().st_size / (1024 * 1024), 2),
+        }
+    return results
+
+
+def measure_startup(work_dir='bench_work', repeat=3, gui_script=GUI_SCRIPT, log=None):
+    """Time GUI start-up milestones in fresh interpreters, measured from process launch.
+
+    Milestones: GUI module imported, window shown (None without a display),
+    engine loaded by the background preload and a small tag list converted.
+    Keeps the fastest of ``repeat`` runs per milestone.
+    """
+    log = log or _no_log
+    input_file, mapping_file = prepare_inputs(SyntheticSpec(rows=STARTUP_ROWS), work_dir, log)
+    output_file = Path(work_dir) / 'out_startup.xlsx'
+    runs = []
+    for _ in range(repeat):
+        launched = time.time()
+        completed = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, str(Path(gui_script).parent),
+                                    str(input_file), str(mapping_file), str(output_file)],
+                                   capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'Startup run failed')
+        marks = json.loads(completed.stdout.strip().splitlines()[-1])
+        runs.append({name: mark - launched for name, mark in marks.items()})
+    return {f"{name}_s": round(min(run[name] for run in runs), 3) if name in runs[0] else None
+            for name in ('gui_import', 'window', 'engine_ready', 'first_conversion')}
+
+
+def format_startup_results(results):
+    labels = {'gui_import_s': 'GUI import', 'window_s': 'window shown', 'engine_ready_s': 'engine loaded',
+              'first_conversion_s': 'first conversion'}
+    lines = [f"🚦 Start-up ({STARTUP_ROWS} tags), from process launch:"]
+    for key, label in labels.items():
+        value = f"{results[key]:8.3f}s" if results.get(key) is not None else f"{'n/a (no display)':>8}"
+        lines.append(f"  {label:<17} {value}")
+    return lines
+
+
+def format_writer_results(rows, results):
+    lines = [f"📏 {rows:,} tags"]
+    for backend, result in results.items():
+        if 'error' in result:
+            lines.append(f"  {backend:<11} {result['error']}")
+            continue
+        lines.append(f"  {backend:<11} {result['write_s']:8.2f}s write {result['total_s']:8.2f}s total "
+                     f"peak {result['peak_rss_mb']} MB  {result['file_mb']:.1f} MB file")
+    return lines
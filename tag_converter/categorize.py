@@ -0,0 +1,69 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+COMM_KEYWORDS = ['deif', 'automaskin', 'mtu', 'consilium', 'nmea', 'modbus', 'gps']
+
+# Signal type category rules, evaluated top to bottom; the first matching rule wins.
+# 'field' is one of udt_type, description, data_block, area and is compared
+# lowercased and stripped. 'contains' is a substring test, 'equals' an exact match.
+CATEGORY_RULES = [
+    # COMM first - if COMM is in DB, write COMM in Signal Type
+    {'category': 'COMM', 'field': 'data_block', 'match': 'contains', 'keywords': ['comm'] + COMM_KEYWORDS},
+    {'category': 'COMM', 'field': 'description', 'match': 'contains', 'keywords': COMM_KEYWORDS},
+    {'category': 'COMM', 'field': 'udt_type', 'match': 'contains', 'keywords': COMM_KEYWORDS},
+    {'category': 'CALCULATED', 'field': 'description', 'match': 'contains', 'keywords': ['position failure', 'setpoint', '_sp']},
+    {'category': 'CALCULATED', 'field': 'area', 'match': 'equals', 'keywords': ['diagnostics']},
+    {'category': 'ANALOG', 'field': 'udt_type', 'match': 'equals', 'keywords': ['tank', 'anl', 'anl_tank', 'analog', 'comm_analog', 'deif_analog']},
+    {'category': 'ANALOG', 'field': 'udt_type', 'match': 'contains', 'keywords': ['anl', 'analog']},
+    {'category': 'DIGITAL', 'field': 'udt_type', 'match': 'contains', 'keywords': ['dig_alr', 'dig_alr_wo_inh', 'pump', 'bilge', 'valve', 'int', 'bool']},
+]
+
+
+def compile_rules(rules):
+    """Precompile each 'contains' rule into a single alternation pattern"""
+    compiled = []
+    for rule in rules:
+        if rule['match'] == 'contains':
+            test = re.compile('|'.join(re.escape(k) for k in rule['keywords']))
+        elif rule['match'] == 'equals':
+            test = set(rule['keywords'])
+        else:
+            raise ValueError(f"Unknown match type '{rule['match']}' in category rule")
+        compiled.append((rule['category'], rule['field'], rule['match'], test))
+    return compiled
+
+
+COMPILED_RULES = compile_rules(CATEGORY_RULES)
+
+
+def _normalize(series):
+    # str() per value keeps the scalar semantics for missing values ('nan', 'None')
+    return series.map(str).str.lower().str.strip()
+
+
+def categorize(udt_type, description, data_block, area, rules=COMPILED_RULES):
+    """Vectorized signal type category (ANALOG, DIGITAL, COMM, CALCULATED) for aligned Series"""
+    fields = {
+        'udt_type': _normalize(udt_type),
+        'description': _normalize(description),
+        'data_block': _normalize(data_block),
+        'area': _normalize(area),
+    }
+
+    conditions = []
+    choices = []
+    for category, field, match, test in rules:
+        values = fields[field]
+        if match == 'contains':
+            mask = values.str.contains(test, regex=True)
+        else:
+            mask = values.isin(test)
+        conditions.append(mask.to_numpy(dtype=bool))
+        choices.append(category)
+
+    if not conditions:
+        return pd.Series('', index=udt_type.index, dtype=object)
+    result = np.select(conditions, choices, default='')
+    return pd.Series(result, index=udt_type.index, dtype=object)
@@ -0,0 +1,396 @@
+import argparse
+import json
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+# Only dependency-free modules here: the pipeline modules pull in pandas and openpyxl, so each handler imports
+# what it runs and `--help` or a bad argument returns without loading them
+from .columns import ColumnConfig
+from .constants import (ALL_SHEETS, DEFAULT_CHUNK_SIZE, DEFAULT_INTERVAL, DEFAULT_MIN_TIME, DEFAULT_SCALES,
+                        DEFAULT_SETTLE, DEFAULT_THRESHOLD, DEFAULT_WRITER, EXPORT_FORMATS, SOURCE_SHEET_COLUMN,
+                        WRITER_NAMES)
+from .synthetic import SyntheticSpec
+
+
+def add_column_arguments(parser):
+    """Add one option per configurable input column, defaulting to the GUI defaults"""
+    defaults = ColumnConfig()
+    group = parser.add_argument_group('column configuration')
+    group.add_argument('--tag-name-col', default=defaults.tag_name, help='Tag Name column (default: %(default)s)')
+    group.add_argument('--data-block-col', default=defaults.data_block, help='Data Block column (default: %(default)s)')
+    group.add_argument('--desc-col', default=defaults.description, help='Description column (default: %(default)s)')
+    group.add_argument('--type-col', default=defaults.udt_type, help='UDT Type column (default: %(default)s)')
+    group.add_argument('--area-col', default=defaults.area, help='Area column (default: %(default)s)')
+    group.add_argument('--comments-col', default=defaults.comments, help='Comments column (default: %(default)s)')
+    group.add_argument('--origin-col', default=defaults.origin, help='Origin column (default: %(default)s)')
+
+
+def column_config_from_args(args):
+    return ColumnConfig(
+        tag_name=args.tag_name_col,
+        data_block=args.data_block_col,
+        description=args.desc_col,
+        udt_type=args.type_col,
+        area=args.area_col,
+        comments=args.comments_col,
+        origin=args.origin_col,
+    )
+
+
+def add_sheet_arguments(parser):
+    """Add the workbook sheet selection options"""
+    group = parser.add_argument_group('sheet selection')
+    sheets = group.add_mutually_exclusive_group()
+    sheets.add_argument('--sheet', action='append', dest='sheets', metavar='NAME',
+                        help="Read this workbook sheet instead of the first one; repeatable, sheets are concatenated "
+                             f"in order with a '{SOURCE_SHEET_COLUMN}' column (use --origin-col '{SOURCE_SHEET_COLUMN}' "
+                             "to fill Origin from it)")
+    sheets.add_argument('--all-sheets', action='store_const', const=ALL_SHEETS, dest='sheets',
+                        help='Read every sheet that has the required columns (see --sheet)')
+
+
+def add_file_conversion_arguments(parser):
+    """Add the per-file conversion options of the multi-file commands (watch, batch)"""
+    parser.add_argument('--width-sample', type=int, metavar='ROWS',
+                        help='Measure column widths on at most ROWS evenly spaced rows per sheet (default: all rows)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, metavar='ROWS',
+                        help='Input rows streamed per chunk (default: %(default)s)')
+    parser.add_argument('--no-mapping-cache', action='store_true', help='Always re-parse the mapping workbook')
+    parser.add_argument('--cache-dir', help='Mapping cache directory (default: per-user cache dir)')
+    parser.add_argument('--export', action='append', choices=list(EXPORT_FORMATS), default=[], metavar='FORMAT',
+                        help='Also write the SCADA signal list to <output stem>.scada.<FORMAT>; '
+                             'one of %(choices)s, repeatable (parquet needs pyarrow)')
+    parser.add_argument('--writer', choices=WRITER_NAMES, default=DEFAULT_WRITER,
+                        help='Workbook writer backend (default: %(default)s)')
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help='Spill expanded SCADA signals beyond MB of memory to a temporary SQLite database and '
+                             'stream them back sorted, keeping memory flat on large inputs (default: all in memory)')
+    parser.add_argument('--tag-db', metavar='DATABASE',
+                        help='Also store the tags and SCADA signals in this SQLite database for the query command')
+
+
+def add_synthetic_arguments(parser, with_rows=True):
+    """Add the synthetic tag list generator parameters"""
+    defaults = SyntheticSpec()
+    group = parser.add_argument_group('synthetic data')
+    if with_rows:
+        group.add_argument('--rows', type=int, default=defaults.rows, help='Tag rows (default: %(default)s)')
+    group.add_argument('--areas', type=int, default=defaults.areas, help='Number of areas (default: %(default)s)')
+    group.add_argument('--array-share', type=float, default=defaults.array_share,
+                       help="Share of 'ARRAY[a..b] OF X' UDT tags (default: %(default)s)")
+    group.add_argument('--array-width', type=int, default=defaults.array_width,
+                       help='Maximum array length of array UDT tags (default: %(default)s)')
+    group.add_argument('--data-type-array-share', type=float, default=defaults.data_type_array_share,
+                       help="Share of BOOL mapping signals typed 'ARRAY[0..1] of BOOL' (default: %(default)s)")
+    group.add_argument('--mapping-array-share', type=float, default=defaults.mapping_array_share,
+                       help="Share of mapping UDTs typed 'ARRAY[1..n] OF X' (default: %(default)s)")
+    group.add_argument('--keyword-density', type=float, default=defaults.keyword_density,
+                       help='Share of tags hitting a COMM/CALCULATED keyword (default: %(default)s)')
+    group.add_argument('--unmapped-share', type=float, default=defaults.unmapped_share,
+                       help='Share of tags with a UDT type missing from the mapping (default: %(default)s)')
+    group.add_argument('--seed', type=int, default=defaults.seed, help='Random seed (default: %(default)s)')
+
+
+def synthetic_spec_from_args(args):
+    return SyntheticSpec(
+        rows=getattr(args, 'rows', 0),
+        areas=args.areas,
+        array_share=args.array_share,
+        array_width=args.array_width,
+        data_type_array_share=args.data_type_array_share,
+        mapping_array_share=args.mapping_array_share,
+        keyword_density=args.keyword_density,
+        unmapped_share=args.unmapped_share,
+        seed=args.seed,
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='tag_converter', description='Excel Tag Converter (headless)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Convert a tag list into the formatted area/SCADA workbook')
+    convert_parser.add_argument('input', help='Input tag list (.xlsx/.xls, .csv, .parquet or .feather; other names are sniffed)')
+    convert_parser.add_argument('-m', '--mapping', help='UDT type mapping workbook or CSV/Parquet/Feather file (enables SCADA_SIGNAL generation)')
+    convert_parser.add_argument('-o', '--output', help='Output workbook (default: <input>_tagged.xlsx next to the input)')
+    convert_parser.add_argument('--width-sample', type=int, metavar='ROWS',
+                                help='Measure column widths on at most ROWS evenly spaced rows per sheet (default: all rows)')
+    convert_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, metavar='ROWS',
+                                help='Input rows streamed per chunk (default: %(default)s)')
+    convert_parser.add_argument('--no-mapping-cache', action='store_true', help='Always re-parse the mapping workbook')
+    convert_parser.add_argument('--cache-dir', help='Mapping cache directory (default: per-user cache dir)')
+    convert_parser.add_argument('--incremental', action='store_true',
+                                help='Reuse cached per-area results (kept in <output>.incremental/) for areas whose rows are unchanged')
+    convert_parser.add_argument('--workers', type=int, default=1, metavar='N',
+                                help='Expand areas and write sheet rows in N worker processes; 0 for one per CPU (default: %(default)s)')
+    convert_parser.add_argument('--export', action='append', choices=list(EXPORT_FORMATS), default=[], metavar='FORMAT',
+                                help='Also write the SCADA signal list to <output stem>.scada.<FORMAT>; '
+                                     'one of %(choices)s, repeatable (parquet needs pyarrow)')
+    convert_parser.add_argument('--no-workbook', action='store_true',
+                                help='Skip the Excel workbook and only write the --export files')
+    convert_parser.add_argument('--writer', choices=WRITER_NAMES, default=DEFAULT_WRITER,
+                                help="Workbook writer backend: streaming (styled, constant memory), xlsxwriter (the same "
+                                     "with xlsxwriter, if installed), openpyxl (original to_excel + restyle) or raw "
+                                     "(values only) (default: %(default)s)")
+    convert_parser.add_argument('--memory-budget', type=float, metavar='MB',
+                                help='Spill expanded SCADA signals beyond MB of memory to a temporary SQLite database '
+                                     'and stream them back sorted, keeping memory flat on large inputs '
+                                     '(default: all in memory)')
+    convert_parser.add_argument('--tag-db', metavar='DATABASE',
+                                help='Also store the tags and SCADA signals in this SQLite database for the query '
+                                     'command (an earlier conversion of the same input is replaced)')
+    convert_parser.add_argument('--dry-run', action='store_true',
+                                help='Only plan the conversion: per-area/per-UDT signal counts, unmapped tags, Excel '
+                                     'limit checks and size estimates, written to <output>.plan.json')
+    convert_parser.add_argument('--no-report', action='store_true', help='Do not write the <output>.report.json run report')
+    convert_parser.add_argument('--profile', action='store_true', help='Also dump a cProfile of the run to <output>.prof')
+    convert_parser.add_argument('-q', '--quiet', action='store_true', help='Only print the run statistics')
+    add_sheet_arguments(convert_parser)
+    add_column_arguments(convert_parser)
+    convert_parser.set_defaults(func=run_convert)
+
+    watch_parser = subparsers.add_parser('watch', help='Convert every tag list dropped into a folder, keeping the mapping loaded')
+    watch_parser.add_argument('input_dir', help='Folder to watch for new or changed tag lists')
+    watch_parser.add_argument('-m', '--mapping', help='UDT type mapping file (reloaded when it changes)')
+    watch_parser.add_argument('-o', '--output-dir', help='Where workbooks and run reports go (default: <input_dir>/converted)')
+    watch_parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                              help='Convert up to N files at once, each in its own worker process (default: %(default)s)')
+    watch_parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, metavar='SECONDS',
+                              help='Seconds between folder scans (default: %(default)s)')
+    watch_parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE, metavar='SECONDS',
+                              help='Seconds a file must stay unchanged before it is converted (default: %(default)s)')
+    watch_parser.add_argument('--once', action='store_true', help='Convert what is in the folder, then exit')
+    add_file_conversion_arguments(watch_parser)
+    add_sheet_arguments(watch_parser)
+    add_column_arguments(watch_parser)
+    watch_parser.set_defaults(func=run_watch)
+
+    batch_parser = subparsers.add_parser('batch', help='Convert several tag lists that share one mapping')
+    batch_parser.add_argument('inputs', nargs='+', help='Input tag lists or glob patterns (e.g. "plc/*.xlsx")')
+    batch_parser.add_argument('-m', '--mapping', help='UDT type mapping file, loaded once for all inputs')
+    batch_parser.add_argument('-o', '--output-dir', default='.',
+                              help='Where workbooks, run reports and batch_summary.json go (default: current folder)')
+    batch_parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                              help='Convert up to N files at once, each in its own worker process; 0 for one per CPU '
+                                   '(default: %(default)s)')
+    batch_parser.add_argument('--merged', metavar='WORKBOOK',
+                              help='Also write the SCADA signals of all inputs to this one workbook')
+    add_file_conversion_arguments(batch_parser)
+    add_sheet_arguments(batch_parser)
+    add_column_arguments(batch_parser)
+    batch_parser.set_defaults(func=run_batch)
+
+    query_parser = subparsers.add_parser('query', help='Filter the tags or SCADA signals stored with --tag-db')
+    query_parser.add_argument('database', help='Tag database written by convert, batch or watch with --tag-db')
+    query_parser.add_argument('-o', '--output',
+                              help='Write the rows to this .csv, .jsonl, .parquet or .xlsx file (default: CSV on stdout)')
+    query_parser.add_argument('--tags', action='store_const', const='tags', default='signals', dest='table',
+                              help='Query the input tags instead of the SCADA signals')
+    query_parser.add_argument('--area', action='append', metavar='AREA', help='Only this area; repeatable')
+    query_parser.add_argument('--db', action='append', metavar='DB', help='Only this data block; repeatable')
+    query_parser.add_argument('--type', action='append', metavar='TYPE',
+                              help='Only this signal Type (UDT type with --tags); repeatable')
+    query_parser.add_argument('--signal-type', action='append', metavar='CATEGORY',
+                              help='Only this Signal Type category; repeatable')
+    query_parser.add_argument('--path', action='append', metavar='PATTERN',
+                              help='Only SCADA tag paths (tag names with --tags) matching this pattern, with * and ? '
+                                   'wildcards (e.g. "DB_Aux.*"); repeatable')
+    alarms = query_parser.add_mutually_exclusive_group()
+    alarms.add_argument('--alarms', action='store_const', const=True, dest='alarms', help='Only alarm signals')
+    alarms.add_argument('--no-alarms', action='store_const', const=False, dest='alarms', help='Only non-alarm signals')
+    query_parser.add_argument('--input', action='append', dest='input_files', metavar='FILE',
+                              help='Only rows converted from this input file (name or path); repeatable')
+    query_parser.add_argument('--limit', type=int, metavar='ROWS', help='Return at most ROWS rows')
+    query_parser.add_argument('--writer', choices=WRITER_NAMES, default=DEFAULT_WRITER,
+                              help='Workbook writer backend for .xlsx output (default: %(default)s)')
+    query_parser.add_argument('--list', action='store_true', help='List the stored conversions instead')
+    query_parser.set_defaults(func=run_query)
+
+    generate_parser = subparsers.add_parser('generate', help='Write a synthetic tag list and mapping workbook')
+    generate_parser.add_argument('output', help='Tag list workbook to write')
+    generate_parser.add_argument('-m', '--mapping-output', help='Also write the matching mapping workbook here')
+    add_synthetic_arguments(generate_parser)
+    generate_parser.set_defaults(func=run_generate)
+
+    bench_parser = subparsers.add_parser('bench', help='Benchmark the pipeline on synthetic inputs at several scales')
+    bench_parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                              help='Comma-separated tag counts (default: %(default)s)')
+    bench_parser.add_argument('--work-dir', default='bench_work',
+                              help='Where generated inputs (reused between runs) and outputs go (default: %(default)s)')
+    bench_parser.add_argument('--baseline', default='bench_baseline.json', help='Baseline file (default: %(default)s)')
+    bench_parser.add_argument('--save-baseline', action='store_true', help='Record this run as the baseline instead of comparing')
+    bench_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                              help='Allowed per-stage throughput drop before failing (default: %(default)s)')
+    bench_parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                              help='Ignore stages faster than this many seconds in the baseline (default: %(default)s)')
+    bench_parser.add_argument('--repeat', type=int, default=1, help='Runs per scale; the fastest counts (default: %(default)s)')
+    bench_parser.add_argument('--json', help='Also write the results to this JSON file')
+    bench_parser.add_argument('--compare-writers', nargs='?', const='', metavar='BACKENDS',
+                              help='Instead compare write time and peak memory of the writer backends '
+                                   '(comma-separated; default: all installed)')
+    bench_parser.add_argument('--startup', action='store_true',
+                              help='Instead time GUI start-up from process launch: window shown, engine loaded and '
+                                   'first conversion done (use --repeat to keep the fastest of several runs)')
+    add_synthetic_arguments(bench_parser, with_rows=False)
+    bench_parser.set_defaults(func=run_bench)
+
+    return parser
+
+
+def _log_for(args):
+    if args.quiet:
+        return None
+    return lambda message: print(message, flush=True)
+
+
+def run_convert(args):
+    from .engine import convert
+    from .mapping import load_mapping
+
+    input_file = Path(args.input)
+    output_file = args.output or input_file.with_name(f"{input_file.stem}_tagged.xlsx")
+    log = _log_for(args)
+    mapping = None
+    if args.mapping:
+        mapping = load_mapping(args.mapping, log, use_cache=not args.no_mapping_cache, cache_dir=args.cache_dir)
+    if args.dry_run:
+        return run_plan(args, input_file, mapping, Path(output_file).with_suffix('.plan.json'), log)
+    stats = convert(input_file, mapping, output_file, column_config_from_args(args),
+                    log=log, width_sample=args.width_sample, chunk_size=args.chunk_size,
+                    incremental=args.incremental, report=not args.no_report, profile=args.profile,
+                    workers=args.workers, export_formats=args.export, workbook=not args.no_workbook,
+                    writer_backend=args.writer, sheets=args.sheets,
+                    memory_budget=args.memory_budget, tag_db=args.tag_db)
+    print(json.dumps(stats, indent=2, default=str))
+    return 0
+
+
+def run_plan(args, input_file, mapping, plan_file, log):
+    from .planner import format_plan, plan_conversion, write_plan
+
+    plan = plan_conversion(input_file, mapping, column_config_from_args(args), log=log, chunk_size=args.chunk_size,
+                           sheets=args.sheets)
+    write_plan(plan, plan_file)
+    if log:
+        for line in format_plan(plan):
+            log(line)
+        log(f"📋 Plan: {plan_file}")
+    print(json.dumps(plan, indent=2, default=str))
+    return 0
+
+
+def run_watch(args):
+    from .watch import FolderWatcher
+
+    input_dir = Path(args.input_dir)
+    watcher = FolderWatcher(input_dir, args.output_dir or input_dir / 'converted', args.mapping,
+                            column_config_from_args(args), jobs=args.jobs, interval=args.interval,
+                            settle=args.settle, log=lambda message: print(message, flush=True),
+                            use_cache=not args.no_mapping_cache, cache_dir=args.cache_dir,
+                            width_sample=args.width_sample, chunk_size=args.chunk_size,
+                            export_formats=args.export, writer_backend=args.writer, sheets=args.sheets,
+                            memory_budget=args.memory_budget, tag_db=args.tag_db)
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    return 1 if watcher.failed else 0
+
+
+def run_batch(args):
+    from .batch import convert_batch, expand_inputs
+
+    summary = convert_batch(expand_inputs(args.inputs), args.mapping, args.output_dir, column_config_from_args(args),
+                            jobs=args.jobs, merged_output=args.merged, log=lambda message: print(message, flush=True),
+                            use_cache=not args.no_mapping_cache, cache_dir=args.cache_dir,
+                            width_sample=args.width_sample, chunk_size=args.chunk_size,
+                            export_formats=args.export, writer_backend=args.writer, sheets=args.sheets,
+                            memory_budget=args.memory_budget, tag_db=args.tag_db)
+    return 1 if summary['totals']['failed'] or 'error' in summary.get('merged', {}) else 0
+
+
+def run_query(args):
+    from .tagdb import TagQuery, export_query, list_conversions
+
+    if args.list:
+        print(json.dumps(list_conversions(args.database), indent=2))
+        return 0
+    filters = {'area': args.area, 'db': args.db, 'type': args.type, 'signal_type': args.signal_type, 'path': args.path}
+    started = time.perf_counter()
+    with TagQuery(args.database, args.table, filters, args.alarms, args.input_files, args.limit) as query:
+        if not args.output:
+            for idx, chunk in enumerate(query.iter_chunks()):
+                chunk.to_csv(sys.stdout, index=False, header=idx == 0, lineterminator='\n')
+            return 0
+        rows = export_query(query, args.output, args.writer)
+    print(json.dumps({'table': args.table, 'rows': rows, 'output_file': args.output,
+                      'seconds': round(time.perf_counter() - started, 3)}, indent=2))
+    return 0
+
+
+def run_generate(args):
+    from .synthetic import generate_mapping, generate_tag_list
+
+    spec = synthetic_spec_from_args(args)
+    generate_tag_list(args.output, spec)
+    print(f"✓ Wrote {spec.rows} synthetic tags to {args.output}")
+    if args.mapping_output:
+        generate_mapping(args.mapping_output, spec)
+        print(f"✓ Wrote synthetic mapping to {args.mapping_output}")
+    return 0
+
+
+def run_bench(args):
+    from .bench import run_benchmarks
+
+    if args.startup:
+        return run_startup_benchmark(args)
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+    if args.compare_writers is not None:
+        return run_writer_comparison(args, scales)
+    results, regressions = run_benchmarks(
+        scales, synthetic_spec_from_args(args), args.work_dir, args.baseline, args.save_baseline,
+        args.threshold, args.min_time, args.repeat, log=lambda message: print(message, flush=True),
+    )
+    if args.json:
+        Path(args.json).write_text(json.dumps({'results': results, 'regressions': regressions}, indent=2), encoding='utf-8')
+    return 1 if regressions else 0
+
+
+def run_startup_benchmark(args):
+    from .bench import format_startup_results, measure_startup
+
+    results = measure_startup(args.work_dir, args.repeat, log=lambda message: print(message, flush=True))
+    for line in format_startup_results(results):
+        print(line)
+    if args.json:
+        Path(args.json).write_text(json.dumps({'startup': results}, indent=2), encoding='utf-8')
+    return 0
+
+
+def run_writer_comparison(args, scales):
+    from .bench import compare_writers, format_writer_results
+
+    log = lambda message: print(message, flush=True)
+    backends = [name.strip() for name in args.compare_writers.split(',') if name.strip()] or None
+    spec = synthetic_spec_from_args(args)
+    results = {}
+    for rows in scales:
+        log(f"\n⏱️ Comparing writers on {rows:,} tags...")
+        results[str(rows)] = compare_writers(replace(spec, rows=rows), args.work_dir, backends, log)
+        for line in format_writer_results(rows, results[str(rows)]):
+            log(line)
+    if args.json:
+        Path(args.json).write_text(json.dumps({'writers': results}, indent=2), encoding='utf-8')
+    return 1 if any('error' in result for scale in results.values() for result in scale.values()) else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}", file=sys.stderr)
+        return 1
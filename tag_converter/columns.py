@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ColumnConfig:
+    """Input column names, matching the GUI's column configuration fields"""
+    tag_name: str = 'Tag Name'
+    data_block: str = 'Data Block'
+    description: str = 'Description'
+    udt_type: str = 'UDT Type'
+    area: str = 'Area'
+    comments: str = 'Comments'
+    origin: str = 'Origin'
+
+    @property
+    def required(self):
+        return [self.tag_name, self.data_block, self.description, self.udt_type, self.area]
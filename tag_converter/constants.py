@@ -0,0 +1,27 @@
+"""Defaults and names shared by the engine, the CLI parser and the GUI.
+
+Dependency-free, so building the argument parser or the GUI does not import pandas or openpyxl.
+"""
+
+DEFAULT_CHUNK_SIZE = 50000
+# Selects every sheet of a workbook
+ALL_SHEETS = '*'
+# Column holding each row's sheet name when several sheets are read (point --origin-col at it to fill Origin)
+SOURCE_SHEET_COLUMN = 'Source Sheet'
+
+# Export format -> suffix added to the output workbook's stem
+EXPORT_FORMATS = {'csv': '.scada.csv', 'jsonl': '.scada.jsonl', 'parquet': '.scada.parquet'}
+
+# Names of writer.WRITER_BACKENDS, in the same order
+WRITER_NAMES = ['streaming', 'openpyxl', 'xlsxwriter', 'raw']
+DEFAULT_WRITER = 'streaming'
+
+# Seconds between scans of the watched folder
+DEFAULT_INTERVAL = 2.0
+# Seconds a file's size and modification time must stay unchanged before it is converted
+DEFAULT_SETTLE = 2.0
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+DEFAULT_THRESHOLD = 0.25
+# Stages faster than this in the baseline are too noisy to compare
+DEFAULT_MIN_TIME = 0.05
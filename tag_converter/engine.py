@@ -0,0 +1,626 @@
+import cProfile
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .categorize import categorize
+from .columns import ColumnConfig
+from .formatting import AREA_COLORS, SCADA_HEADER_COLOR, chunked_column_widths
+from .instrumentation import RunReport
+from .incremental import FragmentStore, area_groups, run_fingerprint
+from .expansion import ORDER_COLUMNS, SignalAttributeTable, SignalOrderKeys, concat_signal_frames, expand_signals
+from .export import check_export_formats, export_path, export_signal_chunks, export_signals, frame_chunks
+from .mapping import load_mapping, prepare_mapping
+from .progress import NO_PROGRESS
+from .reader import DEFAULT_CHUNK_SIZE, iter_tag_chunks
+from .spill import SignalSpill
+from .tagdb import SIGNAL_FIELDS, TagDatabase
+from .writer import DEFAULT_WRITER, MAX_SHEET_ROWS, check_writer_backend, create_writer
+
+AREA_SHEET_COLUMNS = ['Data Block', 'Tag Name', 'UDT Type', 'Signal Type', 'Comments', 'Is Alarm', 'Alarm Priority', 'Tag History', 'Origin', 'Description']
+SCADA_SHEET_COLUMNS = ['Area', 'DB', 'Scada Tag Path', 'Data Type', 'Comments', 'Origin', 'Description']
+
+
+def _no_log(message):
+    pass
+
+
+@dataclass
+class ConvertOptions:
+    """The settings of one convert() run, handed as one value to the steps that carry it out"""
+    column_config: ColumnConfig = field(default_factory=ColumnConfig)
+    log: object = _no_log
+    width_sample: int = None
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    incremental: bool = False
+    progress: object = NO_PROGRESS
+    workers: int = 1
+    export_formats: tuple = ()
+    workbook: bool = True
+    writer_backend: str = DEFAULT_WRITER
+    sheets: object = None
+    memory_budget: float = None
+    tag_db: str = None
+    signal_sink: object = None
+
+
+def sanitize_sheet_name(name):
+    """Truncate to Excel's 31 characters and replace characters Excel forbids in sheet names"""
+    sheet_name = str(name)[:31]
+    for char in ['/', '\\', '*', '?', '[', ']', ':']:
+        sheet_name = sheet_name.replace(char, '_')
+    return sheet_name
+
+
+def build_tag_frame(df, columns):
+    """Build the normalized tag frame used for the area sheets"""
+    column_mapping = {
+        'Data Block': columns.data_block,
+        'Tag Name': columns.tag_name,
+        'UDT Type': columns.udt_type,
+        'Area': columns.area,
+        'Comments': columns.comments,
+        'Origin': columns.origin,
+        'Description': columns.description,
+    }
+
+    df_output = pd.DataFrame()
+    for col, source_col in column_mapping.items():
+        df_output[col] = df[source_col]
+
+    df_output['Signal Type'] = categorize(df_output['UDT Type'], df_output['Description'],
+                                          df_output['Data Block'], df_output['Area'])
+    df_output['Is Alarm'] = False
+    df_output['Alarm Priority'] = 0
+    df_output['Tag History'] = False
+
+    return df_output
+
+
+def scada_categories(df, columns, tag_categories):
+    """Signal type category per input row as used on SCADA_SIGNAL.
+
+    Array UDTs ('ARRAY[0..3] OF ANL') are categorized by their base type there,
+    so only those rows are re-evaluated; all others reuse the area sheet category.
+    """
+    udt_types = df[columns.udt_type].map(str).str.strip()
+    base_types = udt_types.str.extract(r'^ARRAY\[\d+\.\.\d+\]\s+OF\s+(.+)', flags=re.IGNORECASE)[0].str.strip()
+    is_array = base_types.notna()
+
+    categories = tag_categories.copy()
+    if is_array.any():
+        categories[is_array] = categorize(base_types[is_array], df.loc[is_array, columns.description],
+                                          df.loc[is_array, columns.data_block], df.loc[is_array, columns.area])
+    return categories
+
+
+def _stripped_text(series):
+    """``series.astype(str).str.strip()``; a Categorical stays one, stripping each distinct value once"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(str).str.strip()
+    codes = series.cat.codes.to_numpy()
+    stripped_codes, stripped = pd.factorize(series.cat.categories.astype(str).str.strip())
+    codes = np.where(codes >= 0, stripped_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, stripped), index=series.index)
+
+
+def build_scada_frame(scada_df, areas, order_keys):
+    """Sort the expanded SCADA rows by area, base tag path and numeric indices.
+
+    Uses the integer sort keys expansion carries in ORDER_COLUMNS; the stable
+    lexsort keeps input order for equal keys.
+    """
+    area = _stripped_text(scada_df['Area'])
+    scada_df['Scada Tag Path'] = scada_df['Scada Tag Path'].astype(str).str.strip()
+    try:
+        areas_list = [str(a) for a in areas]
+        if isinstance(area.dtype, pd.CategoricalDtype):
+            scada_df['Area'] = area.cat.set_categories(areas_list, ordered=True)
+        else:
+            scada_df['Area'] = pd.Categorical(area, categories=areas_list, ordered=True)
+        area_key = scada_df['Area'].cat.codes.to_numpy().astype(np.int64)
+    except Exception:
+        # Area names that collide as strings: sort the area values themselves
+        scada_df['Area'] = area.astype(object)
+        area_key = pd.factorize(scada_df['Area'], sort=True)[0]
+    # Missing areas (and areas outside the categories) sort last
+    area_key[area_key < 0] = area_key.max() + 1
+    base_key = pd.factorize(scada_df['_base_tag'], sort=True)[0]
+    index_key = order_keys.index_ranks()[scada_df['_index_key'].to_numpy(dtype=np.int64)]
+
+    order = np.lexsort((index_key, base_key, area_key))
+    return scada_df.iloc[order].drop(columns=ORDER_COLUMNS).reset_index(drop=True)
+
+
+def scada_area_runs(areas):
+    """(area, rows) of each run of equal consecutive values of the sorted ``areas``; missing areas are None"""
+    codes = pd.factorize(areas)[0]
+    run_starts = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    bounds = [0] + run_starts.tolist() + [len(codes)]
+    values = areas.iloc[bounds[:-1]].tolist() if len(codes) else []
+    return [(None if pd.isna(area) else area, end - start)
+            for area, start, end in zip(values, bounds[:-1], bounds[1:])]
+
+
+def build_area_row_map(scada_df):
+    """Compute the sheet row range and band color of each area in the SCADA sheet, from its area runs"""
+    return runs_area_row_map(scada_area_runs(scada_df['Area']))
+
+
+def runs_area_row_map(area_runs):
+    """build_area_row_map from the (area, rows) runs of the sorted SCADA rows; rows without an area are not banded"""
+    area_row_map = {}
+    current_row = 2
+    for area_name, area_count in area_runs:
+        if area_name is None:
+            continue
+        area_row_map[area_name] = {
+            'start': current_row,
+            'end': current_row + area_count - 1,
+            'color': AREA_COLORS[len(area_row_map) % len(AREA_COLORS)]
+        }
+        current_row += area_count
+    return area_row_map
+
+
+def scada_sheet_parts(areas, max_rows):
+    """Split the sorted SCADA rows into (start, end) row ranges of at most ``max_rows``.
+
+    Ranges end on area boundaries; only an area that alone exceeds
+    ``max_rows`` is cut inside.
+    """
+    return split_runs([rows for _, rows in scada_area_runs(areas)], max_rows)
+
+
+def split_runs(run_lengths, max_rows):
+    """scada_sheet_parts for consecutive area runs of the given lengths"""
+    run_bounds = [0] + np.cumsum(run_lengths, dtype=np.int64).tolist()
+    parts = []
+    part_start = 0
+    for run_start, run_end in zip(run_bounds[:-1], run_bounds[1:]):
+        if run_end - part_start > max_rows and run_start > part_start:
+            parts.append((part_start, run_start))
+            part_start = run_start
+        while run_end - part_start > max_rows:
+            parts.append((part_start, part_start + max_rows))
+            part_start += max_rows
+    parts.append((part_start, run_bounds[-1]))
+    return parts
+
+
+def part_area_rows(area_row_map, start, end):
+    """The area row map of the sheet holding SCADA rows ``start``..``end``, keeping each area's color"""
+    part_rows = {}
+    for area_name, info in area_row_map.items():
+        first, last = max(info['start'], start + 2), min(info['end'], end + 1)
+        if last >= first:
+            part_rows[area_name] = {'start': first - start, 'end': last - start, 'color': info['color']}
+    return part_rows
+
+
+def _reindex_order_keys(scada_df, index_tuples, order_keys):
+    """Point a fragment's index ids (ids of ``index_tuples``) into the run's shared SignalOrderKeys"""
+    ids = np.array([order_keys.index_id(indices) for indices in index_tuples], dtype=np.int64)
+    scada_df['_index_key'] = ids[scada_df['_index_key'].to_numpy(dtype=np.int64)]
+    return scada_df
+
+
+def build_area_fragment(rows, columns, data_type_mapping, attribute_table, report=None):
+    """Categorize and expand one area's rows into a fragment: its tag frame, SCADA rows and their index tuples"""
+    report = report or RunReport()
+    with report.stage('categorize', len(rows)):
+        tag_frame = build_tag_frame(rows, columns)
+        if data_type_mapping:
+            categories = scada_categories(rows, columns, tag_frame['Signal Type'])
+    scada_df, local_keys = None, SignalOrderKeys()
+    if data_type_mapping:
+        with report.stage('expand') as timer:
+            scada_df = expand_signals(rows, columns, data_type_mapping, categories, attribute_table, local_keys)
+            timer.count(len(scada_df))
+    return {'tags': tag_frame, 'scada': scada_df, 'index_tuples': list(local_keys.index_ids)}
+
+
+def _build_area_fragment_task(rows, columns, data_type_mapping):
+    """build_area_fragment in a worker process; also returns the worker's attribute table counters"""
+    attribute_table = SignalAttributeTable(data_type_mapping)
+    fragment = build_area_fragment(rows, columns, data_type_mapping, attribute_table)
+    return fragment, attribute_table.counters()
+
+
+def expand_by_area(chunks, columns, data_type_mapping, attribute_table, order_keys, store=None, executor=None,
+                   report=None, scada_sink=None, workers=1):
+    """Build tag frames and SCADA fragments per area, partitioning the input by area once.
+
+    An area's rows can be spread over every chunk, so all input chunks are
+    read and concatenated before the first area is built; the input tags are
+    held in memory in any case, as the area sheets need them. With a
+    FragmentStore the stored fragments of unchanged areas are reused; with an
+    executor the remaining areas are built in worker processes, at most two
+    per worker ahead of the area being merged. Fragments are merged in order
+    of each area's first input row, so the result does not depend on which
+    worker finished first. With ``scada_sink`` each area's SCADA rows are
+    passed to it as soon as they are merged instead of being returned, so the
+    expanded signals, unlike the input, are never all held at once.
+    Returns (tag_frames, scada_frames, rebuilt area names).
+    """
+    report = report or RunReport()
+    tag_frames, scada_frames, rebuilt = [], [], []
+    chunks = list(chunks)
+    if not chunks:
+        return tag_frames, scada_frames, rebuilt
+    df = pd.concat(chunks)
+    del chunks
+    groups = list(df.groupby(area_groups(df, columns), sort=False))
+    digests = [store.digest(rows) if store is not None else None for _, rows in groups]
+    queued = [idx for idx, (area, _) in enumerate(groups) if store is None or not store.has(area, digests[idx])]
+    queued.reverse()
+    pending = {}
+
+    def submit_ahead():
+        while executor is not None and queued and len(pending) < 2 * workers:
+            idx = queued.pop()
+            pending[idx] = executor.submit(_build_area_fragment_task, groups[idx][1], columns, data_type_mapping)
+
+    submit_ahead()
+    for idx, (area, rows) in enumerate(groups):
+        fragment = None
+        if store is not None and store.has(area, digests[idx]):
+            fragment = store.load(area, digests[idx])
+            if fragment is not None:
+                store.keep(area, digests[idx])
+        if fragment is None:
+            if idx in pending:
+                with report.stage('expand', len(rows)):
+                    fragment, counters = pending.pop(idx).result()
+                attribute_table.add_counters(counters)
+            else:
+                if queued and queued[-1] == idx:
+                    queued.pop()
+                fragment = build_area_fragment(rows, columns, data_type_mapping, attribute_table, report)
+            if store is not None:
+                store.store(area, digests[idx], fragment)
+            rebuilt.append(area)
+        submit_ahead()
+        tag_frames.append(fragment['tags'])
+        if fragment['scada'] is not None:
+            scada = _reindex_order_keys(fragment['scada'], fragment['index_tuples'], order_keys)
+            if scada_sink is not None:
+                scada_sink(scada)
+            else:
+                scada_frames.append(scada)
+    return tag_frames, scada_frames, rebuilt
+
+
+def spill_sink(spill, report):
+    """Hand expanded frames to a SignalSpill, timing it as the 'spill' stage"""
+    def add(frame):
+        with report.stage('spill') as timer:
+            timer.count(spill.add(frame))
+    return add
+
+
+def write_scada_sheets(writer, final_scada, area_row_map, log=_no_log):
+    """Write the sorted signal list as SCADA_SIGNAL, or as SCADA_SIGNAL_1..N when it exceeds Excel's row limit.
+
+    Returns {sheet name: rows}.
+    """
+    sheets = {}
+    parts = scada_sheet_parts(final_scada['Area'], MAX_SHEET_ROWS - 1)
+    if len(parts) > 1:
+        log(f"  ⚠️ {len(final_scada):,} signals exceed Excel's {MAX_SHEET_ROWS:,} row limit; "
+            f"splitting SCADA_SIGNAL into {len(parts)} sheets on area boundaries")
+    for part_idx, (part_start, part_end) in enumerate(parts, start=1):
+        sheet_name = f"SCADA_SIGNAL_{part_idx}" if len(parts) > 1 else 'SCADA_SIGNAL'
+        part_df = final_scada.iloc[part_start:part_end]
+        part_rows = part_area_rows(area_row_map, part_start, part_end) if len(parts) > 1 else area_row_map
+        writer.write_sheet(sheet_name, part_df, SCADA_HEADER_COLOR, part_rows)
+        sheets[sheet_name] = len(part_df)
+        log(f"  ✓ Created {sheet_name} with {len(part_df)} rows")
+    return sheets
+
+
+def write_spilled_scada_sheets(writer, signals, area_row_map, area_runs, width_sample=None, report=None, log=_no_log):
+    """write_scada_sheets() for SpilledSignals: each sheet is measured, then written, chunk by chunk"""
+    report = report or RunReport()
+    sheets = {}
+    parts = split_runs([rows for _, rows in area_runs], MAX_SHEET_ROWS - 1)
+    if len(parts) > 1:
+        log(f"  ⚠️ {len(signals):,} signals exceed Excel's {MAX_SHEET_ROWS:,} row limit; "
+            f"splitting SCADA_SIGNAL into {len(parts)} sheets on area boundaries")
+    for part_idx, (part_start, part_end) in enumerate(parts, start=1):
+        sheet_name = f"SCADA_SIGNAL_{part_idx}" if len(parts) > 1 else 'SCADA_SIGNAL'
+        rows = part_end - part_start
+        part_rows = part_area_rows(area_row_map, part_start, part_end) if len(parts) > 1 else area_row_map
+        with report.stage('format', rows):
+            widths = chunked_column_widths(SCADA_SHEET_COLUMNS,
+                                           signals.iter_chunks(part_start, part_end, SCADA_SHEET_COLUMNS), rows,
+                                           width_sample)
+        writer.write_sheet_chunks(sheet_name, SCADA_SHEET_COLUMNS,
+                                  signals.iter_chunks(part_start, part_end, SCADA_SHEET_COLUMNS), rows, widths,
+                                  SCADA_HEADER_COLOR, part_rows)
+        sheets[sheet_name] = rows
+        log(f"  ✓ Created {sheet_name} with {rows} rows")
+    return sheets
+
+
+def convert(input_file, mapping, output_file, column_config=None, log=None, width_sample=None,
+            chunk_size=DEFAULT_CHUNK_SIZE, incremental=False, progress=None, report=True, profile=False, workers=1,
+            export_formats=(), workbook=True, writer_backend=DEFAULT_WRITER, sheets=None, memory_budget=None,
+            tag_db=None, signal_sink=None):
+    """Convert an input tag list into the formatted area/SCADA workbook without any GUI.
+
+    ``mapping`` is either a mapping workbook path, an already loaded
+    ``data_type_mapping`` dict, or None to skip SCADA_SIGNAL generation.
+    ``width_sample`` bounds how many rows per sheet are measured for column widths.
+    The input is streamed in ``chunk_size`` row chunks through categorization
+    and signal expansion. With ``incremental`` the per-area results are cached
+    next to the output (see FragmentStore) and only areas whose input rows
+    changed are categorized and expanded again. With ``workers`` > 1 (0 for
+    one per CPU) the input is partitioned by area and each area is expanded,
+    and the sheet rows serialized, in a pool of worker processes; the output
+    is identical to a serial run. A SCADA signal list longer than Excel's row
+    limit is split into SCADA_SIGNAL_1..N sheets on area boundaries.
+    ``export_formats`` ('csv', 'jsonl', 'parquet') also stream the signal list
+    to '<output stem>.scada.<format>'; with ``workbook`` False only those
+    files are written. ``writer_backend`` picks how the workbook is written
+    (see WRITER_BACKENDS): 'streaming' (default, styled rows streamed in
+    constant memory), 'xlsxwriter' (the same with xlsxwriter, if installed),
+    'openpyxl' (the original to_excel + restyle, all cells in memory) or
+    'raw' (values only, no styling). ``sheets`` reads the named workbook
+    sheets (or every sheet, with ALL_SHEETS) instead of the first one, each
+    row tagged with its sheet in a 'Source Sheet' column that ``column_config``
+    can name as the Origin column; with ``workers`` > 1 the sheets are parsed
+    concurrently. With ``memory_budget`` (MB), expanded signals beyond that
+    much memory are spilled to a temporary SQLite database (see SignalSpill),
+    sorted there and streamed back into the workbook and exports, so memory
+    stays flat whatever the number of signals; the output is the same.
+    ``tag_db`` also stores the tags and SCADA signals in that SQLite database
+    (see TagDatabase), replacing an earlier conversion of the same input, for
+    the ``query`` command. ``signal_sink``, if given, is called with the
+    columns, DataFrame chunks and row count of the sorted SCADA signal list
+    (see merge_signal_lists).
+    ``progress`` is an optional
+    ProgressReporter receiving 'read', 'write' and 'save' stage updates; setting
+    its cancel event aborts the run with ConversionCancelled, leaving any
+    existing output file untouched.
+    Each stage's wall/CPU time, rows and peak memory are summarized in the log
+    and, with ``report``, written to '<output>.report.json'. ``profile`` also
+    dumps a cProfile of the run to '<output>.prof' (e.g. for snakeviz or pstats).
+    Returns a dict of run statistics.
+    """
+    options = ConvertOptions(
+        column_config=column_config or ColumnConfig(),
+        log=log or _no_log,
+        width_sample=width_sample,
+        chunk_size=chunk_size,
+        incremental=incremental,
+        progress=progress or NO_PROGRESS,
+        workers=workers or os.cpu_count() or 1,
+        export_formats=export_formats,
+        workbook=workbook,
+        writer_backend=writer_backend,
+        sheets=sheets,
+        memory_budget=memory_budget,
+        tag_db=tag_db,
+        signal_sink=signal_sink,
+    )
+    run_report = RunReport()
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        stats = _convert(input_file, mapping, output_file, options, run_report)
+    finally:
+        if profiler:
+            profiler.disable()
+
+    output_file = Path(output_file)
+    log = options.log
+    extra = {}
+    if profiler:
+        extra['profile_file'] = str(output_file.with_suffix('.prof'))
+        profiler.dump_stats(extra['profile_file'])
+    log("")
+    for line in run_report.summary_lines():
+        log(line)
+    if report:
+        stats['report_file'] = str(output_file.with_suffix('.report.json'))
+        run_report.write(stats['report_file'], stats, **extra)
+        log(f"📊 Run report: {stats['report_file']}")
+    if profiler:
+        stats['profile_file'] = extra['profile_file']
+        log(f"🔬 Profile: {extra['profile_file']}")
+
+    log(f"\n✅ SUCCESS! Output saved to:")
+    for saved_file in ([output_file] if workbook else []) + list(stats['exports'].values()):
+        log(f"   {saved_file}")
+    log("="*70)
+    return stats
+
+
+def _convert(input_file, mapping, output_file, options, report):
+    check_export_formats(options.export_formats)
+    check_writer_backend(options.writer_backend)
+    if not options.workbook and not options.export_formats:
+        raise ValueError("Nothing to write: no workbook and no export format selected")
+    # The database also keeps the signal columns the sheet leaves out, so a spill must hold them too
+    spill_columns = SCADA_SHEET_COLUMNS + [col for col in SIGNAL_FIELDS
+                                           if options.tag_db and col not in SCADA_SHEET_COLUMNS]
+    spill = (SignalSpill(options.memory_budget * 1024 * 1024, spill_columns, options.log)
+             if options.memory_budget else None)
+    database = TagDatabase(options.tag_db) if options.tag_db else None
+    with spill or nullcontext(), database or nullcontext():
+        if options.workers > 1:
+            with ProcessPoolExecutor(max_workers=options.workers) as executor:
+                return _convert_with(input_file, mapping, output_file, options, report, executor, spill, database)
+        return _convert_with(input_file, mapping, output_file, options, report, None, spill, database)
+
+
+def _convert_with(input_file, mapping, output_file, options, report, executor, spill, database):
+    columns, log, progress = options.column_config, options.log, options.progress
+    output_file = Path(output_file)
+
+    if mapping is None:
+        data_type_mapping = {}
+    elif isinstance(mapping, dict):
+        data_type_mapping = prepare_mapping(mapping)
+    else:
+        with report.stage('mapping'):
+            data_type_mapping = load_mapping(mapping, log)
+
+    log("\n" + "="*70)
+    log("🚀 Starting processing...")
+
+    tag_frames = []
+    scada_frames = []
+    attribute_table = SignalAttributeTable(data_type_mapping)
+    order_keys = SignalOrderKeys()
+    chunks = report.timed_iter('read', iter_tag_chunks(input_file, columns, options.chunk_size, log, progress,
+                                                       options.sheets, executor))
+    store = FragmentStore(output_file, run_fingerprint(data_type_mapping, columns)) if options.incremental else None
+    if options.incremental or executor is not None:
+        tag_frames, scada_frames, rebuilt = expand_by_area(chunks, columns, data_type_mapping, attribute_table,
+                                                           order_keys, store, executor, report,
+                                                           spill_sink(spill, report) if spill else None,
+                                                           options.workers)
+    else:
+        for chunk in chunks:
+            with report.stage('categorize', len(chunk)):
+                tag_frame = build_tag_frame(chunk, columns)
+                if data_type_mapping:
+                    categories = scada_categories(chunk, columns, tag_frame['Signal Type'])
+            tag_frames.append(tag_frame)
+            if data_type_mapping:
+                with report.stage('expand') as timer:
+                    scada_frames.append(expand_signals(chunk, columns, data_type_mapping, categories,
+                                                       attribute_table, order_keys))
+                    timer.count(len(scada_frames[-1]))
+                if spill is not None:
+                    spill_sink(spill, report)(scada_frames.pop())
+    if spill is not None and not spill.spilled:
+        scada_frames = spill.frames
+
+    if not tag_frames:
+        raise ValueError(f"No tag rows found in {Path(input_file).name}")
+    df_output = pd.concat(tag_frames)
+    log(f"✓ Found {len(df_output)} rows to process")
+
+    stats = {
+        'input_file': str(input_file),
+        'output_file': str(output_file) if options.workbook else None,
+        'writer': options.writer_backend if options.workbook else None,
+        'input_rows': len(df_output),
+        'area_sheets': {},
+        'scada_signals': 0,
+        'scada_sheets': {},
+        'exports': {},
+    }
+    if options.incremental:
+        stats['incremental'] = {'areas': len(tag_frames), 'rebuilt': len(rebuilt), 'reused': len(tag_frames) - len(rebuilt)}
+        log(f"♻️ Incremental: rebuilt {len(rebuilt)} of {len(tag_frames)} areas"
+            + (f" ({', '.join(rebuilt)})" if rebuilt and len(rebuilt) <= 10 else ""))
+
+    if executor is not None:
+        stats['workers'] = options.workers
+        log(f"⚙️ Using {options.workers} worker processes")
+
+    areas = sorted(df_output['Area'].unique())
+    stored_signals = []
+    writer = (create_writer(options.writer_backend, output_file, options.width_sample, progress, report, executor)
+              if options.workbook else None)
+
+    with writer or nullcontext():
+        if writer is not None:
+            log(f"\n📝 Creating formatted Excel output...")
+            # One pass over the areas instead of a boolean mask per area sheet
+            area_frame = df_output[AREA_SHEET_COLUMNS]
+            area_positions = df_output.groupby('Area', sort=False).indices
+            no_rows = np.array([], dtype=np.intp)
+            writer.total_rows = len(df_output) + (spill.rows if spill is not None else
+                                                  sum(len(frame) for frame in scada_frames))
+            for area_idx, area in enumerate(areas):
+                area_df = area_frame.iloc[area_positions.get(area, no_rows)]
+                sheet_name = sanitize_sheet_name(area)
+                writer.write_sheet(sheet_name, area_df, AREA_COLORS[area_idx % len(AREA_COLORS)])
+                stats['area_sheets'][sheet_name] = len(area_df)
+                log(f"  ✓ Created '{sheet_name}' with {len(area_df)} rows")
+
+        if data_type_mapping and spill is not None and spill.spilled:
+            log("\n🔧 Generating SCADA SIGNAL tab from the spilled signals...")
+            with report.stage('sort', spill.rows):
+                signals = spill.sort(areas, order_keys)
+                area_runs = signals.area_runs()
+                area_row_map = runs_area_row_map(area_runs)
+            stats['scada_signals'] = len(signals)
+            stored_signals = signals.iter_chunks()
+            for fmt in options.export_formats:
+                with report.stage('export', len(signals)):
+                    path = export_signal_chunks(SCADA_SHEET_COLUMNS, signals.iter_chunks(columns=SCADA_SHEET_COLUMNS),
+                                                len(signals), export_path(output_file, fmt), fmt, progress)
+                stats['exports'][fmt] = str(path)
+                log(f"  ✓ Exported {len(signals)} signals to {path.name}")
+            if options.signal_sink is not None:
+                options.signal_sink(SCADA_SHEET_COLUMNS, signals.iter_chunks(columns=SCADA_SHEET_COLUMNS),
+                                    len(signals))
+            if writer is not None:
+                stats['scada_sheets'] = write_spilled_scada_sheets(writer, signals, area_row_map, area_runs,
+                                                                   options.width_sample, report, log)
+            stats['signal_attributes'] = attribute_table.counters()
+            log(f"  ℹ️ Signal attribute table: {attribute_table.hits} hits, {attribute_table.misses} misses, "
+                f"{attribute_table.template_hits} template reuses")
+        elif data_type_mapping:
+            log("\n🔧 Generating SCADA SIGNAL tab...")
+            scada_frames = [frame for frame in scada_frames if len(frame)]
+            scada_df = concat_signal_frames(scada_frames) if scada_frames else pd.DataFrame()
+
+            if len(scada_df):
+                with report.stage('sort', len(scada_df)):
+                    scada_df = build_scada_frame(scada_df, areas, order_keys)
+                    area_row_map = build_area_row_map(scada_df)
+                stored_signals = [scada_df]
+
+                final_scada = scada_df[SCADA_SHEET_COLUMNS]
+                stats['scada_signals'] = len(final_scada)
+                for fmt in options.export_formats:
+                    with report.stage('export', len(final_scada)):
+                        path = export_signals(final_scada, export_path(output_file, fmt), fmt, progress)
+                    stats['exports'][fmt] = str(path)
+                    log(f"  ✓ Exported {len(final_scada)} signals to {path.name}")
+                if options.signal_sink is not None:
+                    options.signal_sink(SCADA_SHEET_COLUMNS, frame_chunks(final_scada), len(final_scada))
+
+                if writer is not None:
+                    stats['scada_sheets'] = write_scada_sheets(writer, final_scada, area_row_map, log)
+            elif options.export_formats:
+                log("  ⚠️ No SCADA signals to export")
+
+            stats['signal_attributes'] = attribute_table.counters()
+            log(f"  ℹ️ Signal attribute table: {attribute_table.hits} hits, {attribute_table.misses} misses, "
+                f"{attribute_table.template_hits} template reuses")
+        elif options.export_formats:
+            log("  ⚠️ No mapping loaded: there is no SCADA signal list to export")
+
+        if writer is not None:
+            log("\n💾 Saving workbook...")
+
+    if spill is not None:
+        stats['spill'] = spill.counters()
+        if spill.spilled:
+            log(f"💽 Spilled {stats['spill']['spilled_rows']:,} signals "
+                f"({stats['spill']['spilled_bytes'] / (1024 * 1024):,.1f} MB in memory, "
+                f"{stats['spill']['file_bytes'] / (1024 * 1024):,.1f} MB on disk) in {stats['spill']['spills']} steps")
+    if database is not None:
+        with report.stage('database', len(df_output) + stats['scada_signals']):
+            stats['tag_db'] = database.save(input_file, output_file if options.workbook else None, df_output,
+                                            stored_signals)
+        log(f"🗄️ Stored {stats['tag_db']['tags']:,} tags and {stats['tag_db']['signals']:,} signals in {database.path}")
+    if options.incremental:
+        # Only record fragments once the workbook they describe has been written
+        store.save()
+    return stats
@@ -0,0 +1,337 @@
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .mapping import ALARM_PATTERN, parse_array_type, signal_attributes
+
+SCADA_COLUMNS = ['Area', 'DB', 'Scada Tag Path', 'Type', 'Signal Type', 'Data Type', 'Description', 'Comments', 'Origin', 'Is Alarm']
+# Hidden sort-key columns carried from expansion to the SCADA_SIGNAL ordering
+ORDER_COLUMNS = ['_base_tag', '_index_key']
+
+ARRAY_INDEX_PATTERN = re.compile(r'\[(\d+)\]')
+
+
+class SignalAttributeTable:
+    """Derived signal attributes keyed by (UDT type, signal type), with lookup counters.
+
+    The table is filled from the 'signal_attributes' the mapping carries from
+    load time, so template compilation is pure dictionary lookups. Lookups are
+    counted: ``misses`` (attributes that had to be derived during expansion)
+    should stay at 0, and ``template_hits`` shows how often a compiled UDT
+    template was reused across chunks.
+    """
+
+    def __init__(self, data_type_mapping):
+        self.data_type_mapping = data_type_mapping
+        self.attributes = {
+            (udt, signal_type): attributes
+            for udt, info in data_type_mapping.items()
+            for signal_type, attributes in info.get('signal_attributes', {}).items()
+        }
+        self.templates = {}
+        self.hits = 0
+        self.misses = 0
+        self.template_hits = 0
+        self.template_misses = 0
+
+    def lookup(self, udt, signal_type):
+        attributes = self.attributes.get((udt, signal_type))
+        if attributes is not None and 'element_data_type' in attributes:
+            self.hits += 1
+            return attributes
+        # Mappings built by hand may lack (current) derived attributes
+        self.misses += 1
+        mapped_data_type = self.data_type_mapping[udt]['data_types'].get(signal_type, '')
+        attributes = signal_attributes(signal_type, mapped_data_type)
+        self.attributes[(udt, signal_type)] = attributes
+        return attributes
+
+    def counters(self):
+        return {
+            'attribute_hits': self.hits,
+            'attribute_misses': self.misses,
+            'template_hits': self.template_hits,
+            'template_misses': self.template_misses,
+        }
+
+    def add_counters(self, counters):
+        """Add the counters of a table used elsewhere (e.g. in a worker process)"""
+        self.hits += counters['attribute_hits']
+        self.misses += counters['attribute_misses']
+        self.template_hits += counters['template_hits']
+        self.template_misses += counters['template_misses']
+
+
+class SignalOrderKeys:
+    """Numeric index tuples of SCADA tag paths, registered across chunks and ranked once.
+
+    SCADA_SIGNAL is ordered by area, base tag path (array indices removed) and
+    the tuple of numeric indices in the path. Expansion derives both keys from
+    the tag and template pieces of each path, so rows only carry a base path
+    string and an integer id into this table.
+    """
+
+    def __init__(self):
+        self.index_ids = {}
+
+    def index_id(self, indices):
+        # Paths without indices sort as (0,)
+        return self.index_ids.setdefault(indices or (0,), len(self.index_ids))
+
+    def index_ranks(self):
+        """Rank of each registered index tuple, indexed by id"""
+        ranks = np.empty(len(self.index_ids), dtype=np.int64)
+        for rank, indices in enumerate(sorted(self.index_ids)):
+            ranks[self.index_ids[indices]] = rank
+        return ranks
+
+
+def split_path_key(path):
+    """Split a tag path (or path piece) into its base path without array indices and its index tuple"""
+    if '[' not in path:
+        return path, ()
+    return ARRAY_INDEX_PATTERN.sub('', path), tuple(int(idx) for idx in ARRAY_INDEX_PATTERN.findall(path))
+
+
+def _order_keys(base_paths, suffixes, tag_pos, entry_idx, order_keys):
+    """Base tag and index id of every expanded row, as the stripped path '<DB>.<Tag><suffix>' would give.
+
+    Suffixes start with '[' or '.', so no array index spans the tag/suffix
+    boundary and the keys of a path are those of its pieces joined. A suffix
+    that is empty after stripping leaves the stripped tag path alone.
+    """
+    tag_keys = [split_path_key(path.lstrip()) for path in base_paths]
+    bare_keys = [split_path_key(path.strip()) for path in base_paths]
+    suffix_keys = [split_path_key(suffix.rstrip()) for suffix in suffixes]
+    has_suffix = np.array([suffix.rstrip() != '' for suffix in suffixes], dtype=bool)[entry_idx]
+
+    base_tags = np.array([key[0] for key in bare_keys], dtype=object)[tag_pos]
+    tag_bases = np.array([key[0] for key in tag_keys], dtype=object)
+    suffix_bases = np.array([key[0] for key in suffix_keys], dtype=object)
+    base_tags[has_suffix] = tag_bases[tag_pos[has_suffix]] + suffix_bases[entry_idx[has_suffix]]
+
+    index_keys = np.array([order_keys.index_id(key[1]) for key in bare_keys], dtype=np.int64)[tag_pos]
+    if has_suffix.any():
+        # Join index tuples once per distinct (tag tuple, suffix) pair
+        tag_tuples = {}
+        tag_codes = np.array([tag_tuples.setdefault(key[1], len(tag_tuples)) for key in tag_keys], dtype=np.int64)
+        tag_tuples = list(tag_tuples)
+        pairs = tag_codes[tag_pos[has_suffix]] * len(suffixes) + entry_idx[has_suffix]
+        unique_pairs, pair_codes = np.unique(pairs, return_inverse=True)
+        pair_ids = np.array([
+            order_keys.index_id(tag_tuples[pair // len(suffixes)] + suffix_keys[pair % len(suffixes)][1])
+            for pair in unique_pairs.tolist()
+        ], dtype=np.int64)
+        index_keys[has_suffix] = pair_ids[pair_codes.ravel()]
+    return base_tags, index_keys
+
+
+def _template_entry(template, suffix, signal_type, data_type, label, alarm, tag_alarm):
+    template['suffix'].append(suffix)
+    template['type'].append(signal_type)
+    template['data_type'].append(data_type)
+    template['label'].append(label)
+    template['alarm'].append(alarm)
+    template['tag_alarm'].append(tag_alarm)
+
+
+def compile_template(udt_type, data_type_mapping, attribute_table=None):
+    """Compile the expansion template for one (stripped) input UDT type string.
+
+    Each template entry describes one generated signal: the suffix appended to
+    '<DB>.<Tag Name>', its Type and Data Type, the description label (None keeps
+    the plain description), whether the signal itself is an alarm, and whether
+    the alarm check must also look at the tag name (paths that end on the tag).
+    Returns None when the UDT type has no mapping.
+    """
+    attribute_table = attribute_table or SignalAttributeTable(data_type_mapping)
+    template = {'suffix': [], 'type': [], 'data_type': [], 'label': [], 'alarm': [], 'tag_alarm': []}
+    array_info = parse_array_type(udt_type)
+
+    if array_info['is_array']:
+        base_type = array_info['base_type']
+        if base_type not in data_type_mapping:
+            return None
+        mapping_info = data_type_mapping[base_type]
+        # For each index in the array, output a row for each signal type
+        element_types = [(signal_type, attribute_table.lookup(base_type, signal_type)['element_data_type'])
+                         for signal_type in mapping_info['signals']]
+        for index in range(array_info['array_start'], array_info['array_end'] + 1):
+            for signal_type, data_type_col in element_types:
+                _template_entry(template, f"[{index}]", signal_type, data_type_col, None, False, False)
+        return template
+
+    if udt_type not in data_type_mapping:
+        return None
+    mapping_info = data_type_mapping[udt_type]
+
+    for signal_type in mapping_info['signals']:
+        mapped_data_type = mapping_info['data_types'].get(signal_type, '')
+        attributes = attribute_table.lookup(udt_type, signal_type)
+        label = attributes['label']
+        alarm = attributes['alarm']
+
+        if mapping_info.get('is_array'):
+            for index in range(mapping_info['array_start'], mapping_info['array_end'] + 1):
+                if mapped_data_type:
+                    _template_entry(template, f"[{index}].{signal_type}", signal_type, mapped_data_type, label, alarm, False)
+                else:
+                    _template_entry(template, f"[{index}]", signal_type, signal_type, label, alarm, True)
+            continue
+
+        data_type_indices = attributes['data_type_indices']
+        if data_type_indices:
+            # Data type is an array (e.g., "ARRAY[0..1] of BOOL") - one signal per index
+            for idx in data_type_indices:
+                _template_entry(template, f".{signal_type}[{idx}]", signal_type, attributes['base_data_type'], label, alarm, False)
+        elif mapped_data_type:
+            _template_entry(template, f".{signal_type}", signal_type, mapped_data_type, label, alarm, False)
+        else:
+            _template_entry(template, "", signal_type, signal_type, label, alarm, True)
+
+    return template
+
+
+def compile_templates(udt_types, data_type_mapping, attribute_table=None):
+    """Templates for the given UDT type strings; unmapped types are left out.
+
+    ``attribute_table`` also caches compiled templates (UDT type -> template or
+    None), so passing the same table carries them across calls.
+    """
+    attribute_table = attribute_table or SignalAttributeTable(data_type_mapping)
+    cache = attribute_table.templates
+    templates = {}
+    for udt_type in udt_types:
+        if udt_type in cache:
+            attribute_table.template_hits += 1
+        else:
+            attribute_table.template_misses += 1
+            template = compile_template(udt_type, data_type_mapping, attribute_table)
+            cache[udt_type] = template if template is not None and template['suffix'] else None
+        if cache[udt_type] is not None:
+            templates[udt_type] = cache[udt_type]
+    return templates
+
+
+def _optional_values(series):
+    return series.where(series.notna(), '').to_numpy(dtype=object)
+
+
+def dictionary_encode(values, positions):
+    """``values[positions]`` as a Categorical: an integer code per row into the distinct values.
+
+    Falls back to a plain object array when the column mixes values that
+    hash alike but differ in type (1, 1.0, True), which one dictionary
+    entry would merge.
+    """
+    codes, uniques = pd.factorize(values)
+    unique_types = np.array([type(value) for value in uniques], dtype=object)
+    if len(set(unique_types.tolist())) > 1:
+        value_types = np.array([type(value) for value in values], dtype=object)
+        valid = codes >= 0
+        if (value_types[valid] != unique_types[codes[valid]]).any():
+            return values[positions]
+    return pd.Categorical.from_codes(codes[positions], uniques)
+
+
+def concat_signal_frames(frames):
+    """Concatenate expanded SCADA frames, merging the dictionaries of their categorical columns"""
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    data = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            try:
+                data[column] = union_categoricals(parts)
+                continue
+            except TypeError:
+                # Dictionaries of different value types (e.g. numbers in one chunk, text in another)
+                parts = [part.astype(object) for part in parts]
+        data[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data, columns=frames[0].columns)
+
+
+def expand_signals(df, columns, data_type_mapping, categories, attribute_table=None, order_keys=None):
+    """Expand every mapped tag into its SCADA signal rows.
+
+    Tags are matched to their compiled UDT template and expanded in bulk by
+    repeating each tag row once per template entry, so rows come out in input
+    order with each tag's signals in template order. Each row also carries
+    its SCADA_SIGNAL sort keys (see SignalOrderKeys) in ORDER_COLUMNS.
+    Columns repeated per tag or per template entry (Area, DB, Type, Signal
+    Type, Data Type, Description, Comments, Origin) are dictionary-encoded
+    Categoricals, so a tag's values are stored once however many signals it
+    expands to.
+    """
+    order_keys = order_keys if order_keys is not None else SignalOrderKeys()
+    udt_types = df[columns.udt_type].map(str).str.strip()
+    templates = compile_templates(udt_types.unique(), data_type_mapping, attribute_table)
+
+    # Flatten all templates into one entry table; each template owns a contiguous slice
+    template_codes = {}
+    starts, lengths = [], []
+    entries = {key: [] for key in ('suffix', 'type', 'data_type', 'label', 'alarm', 'tag_alarm')}
+    for code, (udt_type, template) in enumerate(templates.items()):
+        template_codes[udt_type] = code
+        starts.append(len(entries['suffix']))
+        lengths.append(len(template['suffix']))
+        for key in entries:
+            entries[key].extend(template[key])
+
+    if not templates:
+        return pd.DataFrame(columns=SCADA_COLUMNS + ORDER_COLUMNS)
+
+    entries = {key: np.array(values, dtype=bool if key in ('alarm', 'tag_alarm') else object) for key, values in entries.items()}
+    starts = np.array(starts, dtype=np.int64)
+    lengths = np.array(lengths, dtype=np.int64)
+
+    codes = udt_types.map(template_codes)
+    mapped = codes.notna().to_numpy()
+    tag_rows = np.flatnonzero(mapped)
+    tag_codes = codes.to_numpy()[mapped].astype(np.int64)
+
+    counts = lengths[tag_codes]
+    tag_pos = np.repeat(np.arange(len(tag_rows)), counts)
+    row_rep = tag_rows[tag_pos]
+    first_out = np.cumsum(counts) - counts
+    entry_idx = np.repeat(starts[tag_codes] - first_out, counts) + np.arange(counts.sum())
+
+    tag_names = df[columns.tag_name].map(str)
+    data_blocks = df[columns.data_block]
+    base_paths = (data_blocks.map(str) + '.' + tag_names).to_numpy(dtype=object)
+    descriptions = df[columns.description]
+    description_strs = descriptions.map(str).to_numpy(dtype=object)
+    # Paths that end on the tag name get their alarm flag from the tag's last path segment
+    tag_alarms = tag_names.str.rsplit('.', n=1).str[-1].str.contains(ALARM_PATTERN).to_numpy(dtype=bool)
+
+    base_tags, index_keys = _order_keys(base_paths[tag_rows], entries['suffix'], tag_pos, entry_idx, order_keys)
+
+    # Descriptions are built once per distinct (tag, label) pair, e.g. once for all indices of an array tag
+    label_codes, label_values = pd.factorize(entries['label'])
+    pair_keys = row_rep * (len(label_values) + 1) + (label_codes[entry_idx] + 1)
+    pairs, pair_idx = np.unique(pair_keys, return_inverse=True)
+    pair_rows, pair_labels = np.divmod(pairs, len(label_values) + 1)
+    description_values = descriptions.to_numpy(dtype=object)[pair_rows]
+    with_label = pair_labels > 0
+    if with_label.any():
+        labels = np.asarray(label_values, dtype=object)[pair_labels[with_label] - 1]
+        labelled = pd.Series(description_strs[pair_rows[with_label]] + ' ' + labels, dtype=object)
+        description_values[with_label] = labelled.str.strip().to_numpy(dtype=object)
+
+    return pd.DataFrame({
+        'Area': dictionary_encode(df[columns.area].to_numpy(dtype=object), row_rep),
+        'DB': dictionary_encode(data_blocks.to_numpy(dtype=object), row_rep),
+        'Scada Tag Path': base_paths[row_rep] + entries['suffix'][entry_idx],
+        'Type': dictionary_encode(entries['type'], entry_idx),
+        'Signal Type': dictionary_encode(categories.to_numpy(dtype=object), row_rep),
+        'Data Type': dictionary_encode(entries['data_type'], entry_idx),
+        'Description': dictionary_encode(description_values, pair_idx),
+        'Comments': dictionary_encode(_optional_values(df[columns.comments]), row_rep),
+        'Origin': dictionary_encode(_optional_values(df[columns.origin]), row_rep),
+        'Is Alarm': entries['alarm'][entry_idx] | (entries['tag_alarm'][entry_idx] & tag_alarms[row_rep]),
+        '_base_tag': base_tags,
+        '_index_key': index_keys,
+    }, columns=SCADA_COLUMNS + ORDER_COLUMNS)
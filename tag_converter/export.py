@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from .constants import EXPORT_FORMATS
+from .progress import NO_PROGRESS
+from .writer import publish_file
+
+# Rows converted and written per step
+EXPORT_CHUNK_ROWS = 50000
+
+
+def check_export_formats(formats):
+    """Fail before any work is done on unknown formats or a missing optional dependency"""
+    for fmt in formats:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}' (expected one of: {', '.join(EXPORT_FORMATS)})")
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ValueError("Parquet export needs pyarrow (pip install pyarrow)") from None
+
+
+def export_path(output_file, fmt):
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}{EXPORT_FORMATS[fmt]}")
+
+
+def _string_values(chunk):
+    """Chunk with every value as a string and missing values as None (Parquet needs one type per column)"""
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return values.apply(lambda col: col.map(lambda value: value if value is None else str(value)))
+
+
+def frame_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """A DataFrame in ``chunk_rows`` row slices"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_csv(columns, chunks, total, f, progress):
+    done = 0
+    for chunk in chunks:
+        chunk.to_csv(f, index=False, header=done == 0, lineterminator='\n')
+        done += len(chunk)
+        progress.update('export', done, total)
+    if not done:
+        pd.DataFrame(columns=columns).to_csv(f, index=False, lineterminator='\n')
+
+
+def _write_jsonl(columns, chunks, total, f, progress):
+    done = 0
+    for chunk in chunks:
+        for record in chunk.astype(object).where(chunk.notna(), None).to_dict('records'):
+            f.write(json.dumps(record, ensure_ascii=False, default=str))
+            f.write('\n')
+        done += len(chunk)
+        progress.update('export', done, total)
+
+
+def _write_parquet(columns, chunks, total, path, progress):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(str(column), pa.string()) for column in columns])
+    done = 0
+    with pq.ParquetWriter(path, schema) as parquet:
+        for chunk in chunks:
+            parquet.write_table(pa.Table.from_pandas(_string_values(chunk), schema=schema, preserve_index=False))
+            done += len(chunk)
+            progress.update('export', done, total)
+
+
+def export_signals(df, path, fmt, progress=NO_PROGRESS):
+    """Stream the SCADA signal list to a CSV, JSON Lines or Parquet file in EXPORT_CHUNK_ROWS row steps.
+
+    Like the workbook, the file is written next to its destination and only
+    moved into place once complete.
+    """
+    return export_signal_chunks(df.columns, frame_chunks(df), len(df), path, fmt, progress)
+
+
+def export_signal_chunks(columns, chunks, total, path, fmt, progress=NO_PROGRESS):
+    """export_signals() for a signal list given as DataFrame ``chunks`` of ``total`` rows in all"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix='.tmp')
+    try:
+        if fmt == 'parquet':
+            os.close(fd)
+            _write_parquet(columns, chunks, total, tmp_path, progress)
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                if fmt == 'csv':
+                    _write_csv(columns, chunks, total, f, progress)
+                else:
+                    _write_jsonl(columns, chunks, total, f, progress)
+        publish_file(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return path
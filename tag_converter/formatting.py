@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+
+# Color palette
+AREA_COLORS = [
+    "FF4472C4",
+    "FF70AD47",
+    "FFED7D31",
+    "FF5B9BD5",
+    "FFA5A5A5",
+    "FFB38600",
+    "FFB88A90",
+    "FF8FB296",
+    "FFB8A96F",
+    "FF9AA4C4",
+    "FF9FB19A",
+    "FFBFA89E",
+    "FF9FAFC6",
+    "FFB07D5D",
+    "FF6F94B8",
+]
+
+SCADA_HEADER_COLOR = '28a745'
+ALT_ROW_COLOR = 'f0f8ff'
+MAX_COLUMN_WIDTH = 50
+
+
+def _thin_border():
+    return Border(
+        left=Side(style='thin', color='d0d0d0'),
+        right=Side(style='thin', color='d0d0d0'),
+        top=Side(style='thin', color='d0d0d0'),
+        bottom=Side(style='thin', color='d0d0d0')
+    )
+
+
+def header_named_style(name, color):
+    """Named style for header cells filled with the given color"""
+    return NamedStyle(
+        name=name,
+        font=Font(name='Calibri', size=11, bold=True, color='FFFFFF'),
+        fill=PatternFill(start_color=color, end_color=color, fill_type='solid'),
+        border=_thin_border(),
+        alignment=Alignment(horizontal='center', vertical='center')
+    )
+
+
+def body_named_style(name, color):
+    """Named style for data cells filled with the given row color"""
+    return NamedStyle(
+        name=name,
+        font=Font(name='Calibri', size=10),
+        fill=PatternFill(start_color=color, end_color=color, fill_type='solid'),
+        border=_thin_border(),
+        alignment=Alignment(vertical='center')
+    )
+
+
+def _cast_number(text):
+    # Mirrors how openpyxl reads numbers back, so widths match a saved-and-reloaded sheet
+    if '.' in text or 'E' in text or 'e' in text:
+        return float(text)
+    return int(text)
+
+
+def cell_display_length(value):
+    """Length of a cell value as it reads back from the saved workbook; 0 for empty or falsy cells"""
+    if not value:
+        return 0
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return len(str(value))
+    return len(str(_cast_number("%.16g" % value)))
+
+
+def _column_display_length(series):
+    """Longest display length in a column, vectorized where the column allows it"""
+    values = series[series.notna()]
+    if not len(values):
+        return 0
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = pd.Series(values.cat.remove_unused_categories().cat.categories)
+    if pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        return int(values.str.len().max())
+    if values.dtype == object:
+        # Mixed column - numbers and booleans display differently from their str()
+        return int(values.map(cell_display_length).max())
+    return max(cell_display_length(value) for value in pd.unique(values).tolist())
+
+
+def column_widths(df, sample_rows=None):
+    """Auto-fit column widths (header included) capped at MAX_COLUMN_WIDTH.
+
+    With ``sample_rows`` only that many evenly spaced rows are measured.
+    """
+    if sample_rows and len(df) > sample_rows:
+        df = df.iloc[np.linspace(0, len(df) - 1, sample_rows).astype(np.int64)]
+    widths = []
+    for col in df.columns:
+        max_length = max(cell_display_length(col), _column_display_length(df[col]))
+        widths.append(min(max_length + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def chunked_column_widths(columns, chunks, row_count, sample_rows=None):
+    """column_widths of the frame that ``chunks`` (``row_count`` rows in all) make up, measured chunk by chunk"""
+    positions = None
+    if sample_rows and row_count > sample_rows:
+        positions = np.linspace(0, row_count - 1, sample_rows).astype(np.int64)
+    lengths = [cell_display_length(col) for col in columns]
+    offset = 0
+    for chunk in chunks:
+        if positions is not None:
+            first, last = np.searchsorted(positions, [offset, offset + len(chunk)])
+            measured = chunk.iloc[positions[first:last] - offset]
+        else:
+            measured = chunk
+        offset += len(chunk)
+        lengths = [max(length, _column_display_length(measured[col])) for length, col in zip(lengths, columns)]
+    return [min(length + 2, MAX_COLUMN_WIDTH) for length in lengths]
+
+
+class FormatPlan:
+    """Precomputed formatting of one sheet: column widths and the fill band of every data row.
+
+    ``band_colors`` holds each distinct fill color once and ``band_index`` maps
+    data row i (sheet row i + 2) to its color, so per-row lookups are O(1)
+    whatever the number of areas.
+    """
+
+    def __init__(self, widths, band_colors, band_index):
+        self.widths = widths
+        self.band_colors = band_colors
+        self.band_index = band_index
+
+    def row_color(self, row_idx):
+        """Fill color of a sheet row (row 2 is the first data row)"""
+        return self.band_colors[self.band_index[row_idx - 2]]
+
+
+def plan_bands(row_count, area_rows=None):
+    """Resolve the ``area_rows`` start/end table into (band_colors, band_index)"""
+    band_colors = [ALT_ROW_COLOR]
+    band_index = np.zeros(row_count, dtype=np.int64)
+    if area_rows:
+        color_index = {ALT_ROW_COLOR: 0}
+        # Reversed so that, as with a top-down scan, the first matching area wins
+        for area_info in reversed(list(area_rows.values())):
+            color = area_info['color']
+            if color not in color_index:
+                color_index[color] = len(band_colors)
+                band_colors.append(color)
+            start = max(area_info['start'], 2) - 2
+            end = min(area_info['end'], row_count + 1) - 1
+            if end > start:
+                band_index[start:end] = color_index[color]
+    return band_colors, band_index
+
+
+def plan_formatting(df, area_rows=None, width_sample=None):
+    """Build the FormatPlan for writing ``df`` as a sheet"""
+    band_colors, band_index = plan_bands(len(df), area_rows)
+    return FormatPlan(column_widths(df, width_sample), band_colors, band_index)
+
+
+def format_worksheet(ws, is_scada=False, area_color=None, area_rows=None, plan=None):
+    """Apply professional formatting to worksheet.
+
+    Pass the ``plan`` from plan_formatting() to skip the cell scan for column widths.
+    """
+    header_fill = PatternFill(start_color='0078d4', end_color='0078d4', fill_type='solid')
+    scada_header_fill = PatternFill(start_color=SCADA_HEADER_COLOR, end_color=SCADA_HEADER_COLOR, fill_type='solid')
+
+    if area_color:
+        header_fill = PatternFill(start_color=area_color, end_color=area_color, fill_type='solid')
+
+    header_font = Font(name='Calibri', size=11, bold=True, color='FFFFFF')
+    header_alignment = Alignment(horizontal='center', vertical='center')
+    cell_font = Font(name='Calibri', size=10)
+    cell_alignment = Alignment(vertical='center')
+    thin_border = _thin_border()
+
+    for cell in ws[1]:
+        cell.fill = scada_header_fill if is_scada else header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        cell.border = thin_border
+
+    if plan is not None:
+        band_colors, band_index = plan.band_colors, plan.band_index
+    else:
+        band_colors, band_index = plan_bands(ws.max_row - 1, area_rows if is_scada else None)
+    # One fill object per distinct color, looked up by band index
+    band_fills = [PatternFill(start_color=color, end_color=color, fill_type='solid') for color in band_colors]
+
+    for row, band in zip(ws.iter_rows(min_row=2), band_index.tolist()):
+        row_fill = band_fills[band]
+        for cell in row:
+            cell.font = cell_font
+            cell.border = thin_border
+            cell.alignment = cell_alignment
+            cell.fill = row_fill
+
+    if plan is not None:
+        for col_idx, width in enumerate(plan.widths, start=1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+    else:
+        for column in ws.columns:
+            max_length = 0
+            column_letter = get_column_letter(column[0].column)
+
+            for cell in column:
+                try:
+                    if cell.value:
+                        max_length = max(max_length, len(str(cell.value)))
+                except:
+                    pass
+
+            adjusted_width = min(max_length + 2, MAX_COLUMN_WIDTH)
+            ws.column_dimensions[column_letter].width = adjusted_width
+
+    ws.auto_filter.ref = ws.dimensions
+    ws.freeze_panes = 'A2'
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+from .categorize import CATEGORY_RULES
+from .expansion import ORDER_COLUMNS, SCADA_COLUMNS
+
+# Bump when categorization or expansion output changes so cached fragments are rebuilt
+# (2: fragments carry the signal order key columns and Categorical value columns)
+FRAGMENT_VERSION = 2
+
+
+def area_groups(df, columns):
+    """Incremental group of each row: its area as SCADA_SIGNAL sees it (string, stripped)"""
+    return df[columns.area].map(str).str.strip()
+
+
+def run_fingerprint(data_type_mapping, columns):
+    """Hash of everything besides the rows themselves that a fragment depends on"""
+    mapping = {
+        udt: [info['signals'], info['is_array'], info['array_start'], info['array_end'], info['data_types']]
+        for udt, info in data_type_mapping.items()
+    }
+    payload = json.dumps([FRAGMENT_VERSION, mapping, asdict(columns), CATEGORY_RULES, SCADA_COLUMNS + ORDER_COLUMNS],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _atomic_write(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+class FragmentStore:
+    """Sidecar cache of per-area tag frames and expanded SCADA fragments.
+
+    Lives in '<output>.incremental/' next to the output workbook: a
+    manifest.json mapping each area group to the content hash of its input
+    rows, plus one pickle per hash. A fragment is reused when the hash of its
+    rows (combined with the mapping and column configuration) is unchanged.
+    """
+
+    def __init__(self, output_file, fingerprint):
+        output_file = Path(output_file)
+        self.directory = output_file.with_name(f"{output_file.name}.incremental")
+        self.fingerprint = fingerprint
+        self.areas = {}
+        self.previous = self._read_manifest()
+
+    def _read_manifest(self):
+        try:
+            manifest = json.loads((self.directory / 'manifest.json').read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != FRAGMENT_VERSION or manifest.get('fingerprint') != self.fingerprint:
+            return {}
+        return manifest.get('areas', {})
+
+    def digest(self, rows):
+        """Content hash of one area's input rows, in input order"""
+        h = hashlib.sha256(self.fingerprint.encode('ascii'))
+        # repr keeps value types apart (1 vs '1' vs 1.0) and, unlike pickle, does not depend on object identity
+        h.update(repr([list(rows.columns), rows.to_numpy(dtype=object).tolist()]).encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def has(self, area, digest):
+        """Whether the previous run stored a fragment for an area whose rows hash to ``digest``"""
+        return self.previous.get(area) == digest
+
+    def load(self, area, digest):
+        """Cached fragment for an area whose rows hash to ``digest``, or None"""
+        if not self.has(area, digest):
+            return None
+        try:
+            with open(self.directory / f"{digest}.pickle", 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def keep(self, area, digest):
+        self.areas[area] = digest
+
+    def store(self, area, digest, fragment):
+        self.keep(area, digest)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self.directory / f"{digest}.pickle", pickle.dumps(fragment, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            # An unwritable cache only costs the next run a rebuild
+            self.areas.pop(area, None)
+
+    def save(self):
+        """Write the manifest for this run and drop fragments no longer referenced"""
+        manifest = {'version': FRAGMENT_VERSION, 'fingerprint': self.fingerprint, 'areas': self.areas}
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self.directory / 'manifest.json', json.dumps(manifest, indent=2).encode('utf-8'))
+            current = {f"{digest}.pickle" for digest in self.areas.values()}
+            for path in self.directory.glob('*.pickle'):
+                if path.name not in current:
+                    path.unlink()
+        except OSError:
+            pass
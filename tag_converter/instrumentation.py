@@ -0,0 +1,153 @@
+import json
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_VERSION = 1
+
+
+def _windows_peak_working_set():
+    """PeakWorkingSetSize of this process in bytes, from GetProcessMemoryInfo"""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.WinDLL('kernel32')
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    # K32GetProcessMemoryInfo is kernel32's export of psapi's GetProcessMemoryInfo (Windows 7 and later)
+    get_info = kernel32.K32GetProcessMemoryInfo
+    get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    get_info.restype = wintypes.BOOL
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    if not get_info(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def peak_rss_mb():
+    """Peak resident memory (peak working set on Windows) of this process so far in MB, or None if unknown"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    if sys.platform != 'win32':
+        return None
+    try:
+        peak = _windows_peak_working_set()
+    except (AttributeError, OSError):
+        return None
+    return round(peak / (1024 * 1024), 1) if peak is not None else None
+
+
+class StageTimer:
+    """Accumulated wall time, CPU time and rows of one pipeline stage"""
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rows = 0
+        self.peak_rss_mb = None
+
+    def count(self, rows):
+        self.rows += rows
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'wall_s': round(self.wall, 4),
+            'cpu_s': round(self.cpu, 4),
+            'rows': self.rows,
+            'peak_rss_mb': self.peak_rss_mb,
+        }
+
+
+class RunReport:
+    """Per-stage instrumentation of one conversion, written as a JSON run report.
+
+    Stages may be entered many times (e.g. once per input chunk); their times
+    and row counts add up. ``peak_rss_mb`` is the process's peak memory when
+    the stage last finished, so the stage where it jumps is the one to look at.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        timer = self.stages.setdefault(name, StageTimer())
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield timer
+        finally:
+            timer.calls += 1
+            timer.wall += time.perf_counter() - wall
+            timer.cpu += time.process_time() - cpu
+            timer.rows += rows
+            timer.peak_rss_mb = peak_rss_mb()
+
+    def timed_iter(self, name, iterable):
+        """Yield from ``iterable``, timing each step (and counting rows of each item) as ``name``"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as timer:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                timer.count(len(item))
+            yield item
+
+    def as_dict(self, stats, **extra):
+        report = {
+            'report_version': REPORT_VERSION,
+            'started_at': self.started_at,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'stages': {name: timer.as_dict() for name, timer in self.stages.items()},
+            'total': {
+                'wall_s': round(time.perf_counter() - self._wall_start, 4),
+                'cpu_s': round(time.process_time() - self._cpu_start, 4),
+                'peak_rss_mb': peak_rss_mb(),
+            },
+            'stats': stats,
+        }
+        report.update(extra)
+        return report
+
+    def write(self, path, stats, **extra):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(stats, **extra), f, indent=2, default=str)
+
+    def summary_lines(self):
+        lines = ["⏱️ Stage timings:"]
+        for name, timer in self.stages.items():
+            memory = f"  peak {timer.peak_rss_mb:,.0f} MB" if timer.peak_rss_mb is not None else ""
+            lines.append(f"  {name:<10} {timer.wall:8.2f}s wall {timer.cpu:8.2f}s cpu {timer.rows:>10,} rows{memory}")
+        lines.append(f"  {'total':<10} {time.perf_counter() - self._wall_start:8.2f}s wall "
+                     f"{time.process_time() - self._cpu_start:8.2f}s cpu")
+        return lines
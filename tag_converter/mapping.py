@@ -0,0 +1,197 @@
+import hashlib
+import io
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from . import mapping_cache
+from .reader import ARROW_FORMATS, csv_options, detect_format
+
+ALARM_PATTERN = re.compile(r'(?:ALR|ALARM|HIHI|HI|LOLO|LO)', re.IGNORECASE)
+SIGNAL_DATA_TYPE_PATTERN = re.compile(r'[A-Z0-9]+')
+ARRAY_TYPE_PATTERN = re.compile(r'ARRAY\[(\d+)\.\.(\d+)\]\s+OF\s+(.+)', re.IGNORECASE)
+DATA_TYPE_ARRAY_PATTERN = re.compile(r'ARRAY\[\d+\.\.\d+\]\s+of\s+(.+)', re.IGNORECASE)
+
+
+def parse_array_type(udt_type):
+    """Parse array type like 'ARRAY[0..16] OF ANL' and return base type and array info"""
+    array_match = ARRAY_TYPE_PATTERN.match(udt_type)
+
+    if array_match:
+        return {
+            'is_array': True,
+            'array_start': int(array_match.group(1)),
+            'array_end': int(array_match.group(2)),
+            'base_type': array_match.group(3).strip()
+        }
+    else:
+        return {
+            'is_array': False,
+            'array_start': None,
+            'array_end': None,
+            'base_type': udt_type
+        }
+
+
+def parse_data_type_array(data_type):
+    """Parse data type array like 'ARRAY[0..1] of BOOL' and return (indices, base_type) or (None, data_type)"""
+    array_match = ARRAY_TYPE_PATTERN.match(str(data_type))
+
+    if array_match:
+        array_start = int(array_match.group(1))
+        array_end = int(array_match.group(2))
+        base_type = array_match.group(3).strip().upper()
+        indices = list(range(array_start, array_end + 1))
+        return (indices, base_type)
+    else:
+        return (None, str(data_type).upper() if data_type else '')
+
+
+def format_signal_label(signal_type):
+    """Format signal type: replace underscores, insert spaces before uppercase, collapse spaces, uppercase."""
+    if not signal_type:
+        return ''
+    s = str(signal_type)
+    if s.replace('_', '').isupper():
+        return s.replace('_', '').upper()
+
+    s = s.replace('_', ' ')
+    s = re.sub(r'(?<!^)(?=[A-Z])', ' ', s)
+    s = ' '.join(s.split())
+    s = s.upper()
+    s = re.sub(r'\bHI\s+HI\b', 'HIHI', s)
+    s = re.sub(r'\bLO\s+LO\b', 'LOLO', s)
+    return s
+
+
+def signal_description_label(signal_type):
+    """Label appended to the tag description for a signal, or None to keep the description as is"""
+    formatted_signal = format_signal_label(signal_type)
+    sig_raw = str(signal_type) if signal_type is not None else ''
+    is_data_type = bool(SIGNAL_DATA_TYPE_PATTERN.fullmatch(sig_raw.replace('_', '')))
+    if formatted_signal and not is_data_type and signal_type.upper() != 'STATUS':
+        return formatted_signal
+    return None
+
+
+def is_alarm_signal(signal_type):
+    return bool(ALARM_PATTERN.search(str(signal_type) if signal_type is not None else ''))
+
+
+def element_data_type(signal_type, mapped_data_type):
+    """Data Type of a signal generated for an element of an array UDT tag ('ARRAY[0..3] OF ANL')"""
+    # If mapped_data_type is an array type (e.g., 'ARRAY[0..1] of BOOL'), extract the base type
+    array_type_match = DATA_TYPE_ARRAY_PATTERN.match(mapped_data_type) if mapped_data_type else None
+    if array_type_match:
+        data_type_col = array_type_match.group(1).strip().upper()
+    else:
+        data_type_col = mapped_data_type.upper() if mapped_data_type else signal_type.upper()
+    # If the data type is BOOL or base type is BOOL, always output BOOL
+    if data_type_col == 'BOOL' or signal_type.upper() == 'BOOL':
+        data_type_col = 'BOOL'
+    return data_type_col
+
+
+def signal_attributes(signal_type, mapped_data_type):
+    """Every value SCADA expansion derives from a (UDT, signal type) pair"""
+    data_type_indices, base_data_type = parse_data_type_array(mapped_data_type)
+    return {
+        'data_type_indices': data_type_indices,
+        'base_data_type': base_data_type,
+        'element_data_type': element_data_type(signal_type, mapped_data_type),
+        'label': signal_description_label(signal_type),
+        'alarm': is_alarm_signal(signal_type),
+    }
+
+
+def derive_signal_attributes(data_type_mapping):
+    """Precompute the per-signal values SCADA expansion needs into each UDT's 'signal_attributes'"""
+    for info in data_type_mapping.values():
+        info['signal_attributes'] = {
+            signal_type: signal_attributes(signal_type, mapped_data_type)
+            for signal_type, mapped_data_type in info['data_types'].items()
+        }
+    return data_type_mapping
+
+
+def prepare_mapping(data_type_mapping):
+    """Make sure a mapping built or loaded elsewhere carries its derived signal attributes"""
+    if any('signal_attributes' not in info for info in data_type_mapping.values()):
+        derive_signal_attributes(data_type_mapping)
+    return data_type_mapping
+
+
+def read_mapping_frame(source, fmt='xlsx'):
+    """Read a mapping file's rows: a workbook, CSV, Parquet or Feather file (path or file-like)"""
+    if fmt == 'csv':
+        data = source.read() if hasattr(source, 'read') else Path(source).read_bytes()
+        return pd.read_csv(io.BytesIO(data), dtype=str, **csv_options(data[:64 * 1024]))
+    if fmt in ARROW_FORMATS:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError(f"Reading {fmt.capitalize()} mapping files needs pyarrow (pip install pyarrow)") from None
+        return pd.read_parquet(source) if fmt == 'parquet' else pd.read_feather(source)
+    return pd.read_excel(source)
+
+
+def parse_mapping(source, fmt='xlsx'):
+    """Parse a mapping file (path or file-like, see read_mapping_frame) into the data_type_mapping dict"""
+    df_mapping = read_mapping_frame(source, fmt)
+
+    required_cols = ['UDT Type', 'Signal Type']
+    missing_cols = [col for col in required_cols if col not in df_mapping.columns]
+
+    if missing_cols:
+        raise ValueError(f"Mapping file must have 'UDT Type', 'Signal Type', and 'Data Type' columns.\nMissing: {', '.join(missing_cols)}")
+
+    if 'Data Type' not in df_mapping.columns:
+        raise ValueError("Mapping file must have 'Data Type' column")
+
+    data_type_mapping = {}
+    for _, row in df_mapping.iterrows():
+        udt_type = str(row['UDT Type']).strip()
+        signal_type = str(row['Signal Type']).strip()
+        mapped_data_type = str(row['Data Type']).strip() if pd.notna(row['Data Type']) else ''
+
+        array_info = parse_array_type(udt_type)
+        base_type = array_info['base_type']
+
+        if base_type not in data_type_mapping:
+            data_type_mapping[base_type] = {
+                'signals': [],
+                'is_array': array_info['is_array'],
+                'array_start': array_info['array_start'],
+                'array_end': array_info['array_end'],
+                'data_types': {}
+            }
+        data_type_mapping[base_type]['signals'].append(signal_type)
+        data_type_mapping[base_type]['data_types'][signal_type] = mapped_data_type
+
+    return derive_signal_attributes(data_type_mapping)
+
+
+def load_mapping(mapping_file, log=None, use_cache=True, cache_dir=None):
+    """Load the UDT type to signal type mapping from a mapping workbook, CSV, Parquet or Feather file.
+
+    The compiled mapping is cached on disk keyed by the file's content hash, so
+    an unchanged mapping file loads without being parsed again.
+    """
+    content = Path(mapping_file).read_bytes()
+    key = hashlib.sha256(content).hexdigest()
+
+    data_type_mapping = mapping_cache.load(key, cache_dir) if use_cache else None
+    cached = data_type_mapping is not None
+    if not cached:
+        data_type_mapping = parse_mapping(io.BytesIO(content), detect_format(mapping_file, content[:8]))
+        if use_cache:
+            mapping_cache.store(key, data_type_mapping, cache_dir)
+
+    if log:
+        log(f"✓ Loaded mapping for {len(data_type_mapping)} UDT types{' (cached)' if cached else ''}")
+        for udt, info in data_type_mapping.items():
+            array_str = f" [ARRAY {info['array_start']}..{info['array_end']}]" if info['is_array'] else ""
+            log(f"  → {udt}{array_str}: {', '.join(info['signals'])}")
+
+    return data_type_mapping
@@ -0,0 +1,54 @@
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+# Bump when the layout of the compiled mapping changes so stale entries are ignored
+CACHE_VERSION = 2
+
+
+def default_cache_dir():
+    """Per-user cache directory (TAG_CONVERTER_CACHE_DIR overrides)"""
+    override = os.environ.get('TAG_CONVERTER_CACHE_DIR')
+    if override:
+        return Path(override)
+    if sys.platform == 'win32' and os.environ.get('LOCALAPPDATA'):
+        base = Path(os.environ['LOCALAPPDATA'])
+    elif sys.platform == 'darwin':
+        base = Path.home() / 'Library' / 'Caches'
+    else:
+        base = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+    return base / 'ExcelTagConverter'
+
+
+def _entry_path(key, cache_dir):
+    return Path(cache_dir or default_cache_dir()) / 'mappings' / f"{key}.v{CACHE_VERSION}.pickle"
+
+
+def load(key, cache_dir=None):
+    """Return the cached compiled mapping for a content key, or None"""
+    try:
+        with open(_entry_path(key, cache_dir), 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing, unreadable or corrupt entries just mean a cache miss
+        return None
+
+
+def store(key, data_type_mapping, cache_dir=None):
+    """Write a compiled mapping to the cache; failures are ignored"""
+    path = _entry_path(key, cache_dir)
+    tmp_path = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(data_type_mapping, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,15 @@
+import openpyxl
+
+# openpyxl release series whose private writer internals the parallel row writer was tested against
+TESTED_OPENPYXL_SERIES = '3.1.'
+
+
+def tested_openpyxl():
+    """Whether the installed openpyxl is a tested release, which parallel row serialization requires.
+
+    writer.write_row_block uses private openpyxl classes and attributes that
+    may change in any release, so on other versions StyledWorkbookWriter
+    writes rows serially through the public write-only API. openpyxl itself
+    is not capped at the tested series.
+    """
+    return openpyxl.__version__.startswith(TESTED_OPENPYXL_SERIES)
@@ -0,0 +1,255 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .engine import AREA_SHEET_COLUMNS, SCADA_SHEET_COLUMNS, ColumnConfig, sanitize_sheet_name, split_runs
+from .expansion import SignalAttributeTable, compile_templates
+from .export import EXPORT_FORMATS
+from .incremental import area_groups
+from .mapping import load_mapping, prepare_mapping
+from .progress import NO_PROGRESS
+from .reader import DEFAULT_CHUNK_SIZE, SOURCE_SHEET_COLUMN, iter_tag_chunks
+from .writer import MAX_SHEET_ROWS
+
+PLAN_VERSION = 1
+# Excel's limits on sheet names and on the text of one cell
+MAX_SHEET_NAME = 31
+MAX_CELL_CHARS = 32767
+# Written workbook size per character of cell text, plus a fixed part per sheet
+# (measured on the streaming writer's output of the synthetic tag lists)
+XLSX_BYTES_PER_CHAR = 0.75
+XLSX_BYTES_PER_SHEET = 1000
+# Text of the constant area sheet cells: Is Alarm, Alarm Priority and Tag History ('False', '0', 'False')
+AREA_CONSTANT_CHARS = 11
+# Rough text length of an area sheet Signal Type, which the plan does not categorize
+AREA_SIGNAL_TYPE_CHARS = 8
+# Unmapped tag names listed in the log summary (the plan file lists all of them)
+LOG_UNMAPPED_TAGS = 10
+
+
+def _no_log(message):
+    pass
+
+
+def _text_lengths(series):
+    """Characters each value takes as cell text; missing values take none"""
+    return series.astype(object).where(series.notna(), '').map(str).str.len().to_numpy(dtype=np.int64)
+
+
+def _template_sizes(templates):
+    """Per UDT type: (signals, characters its entries add to the SCADA Scada Tag Path, Data Type and Description)"""
+    sizes = {}
+    for udt_type, template in templates.items():
+        label_chars = sum(len(label) + 1 for label in template['label'] if label)
+        chars = sum(map(len, template['suffix'])) + sum(len(str(value)) for value in template['data_type']) + label_chars
+        sizes[udt_type] = (len(template['suffix']), chars)
+    return sizes
+
+
+def _scada_area_runs(signals, scada_areas, areas):
+    """Signals per SCADA_SIGNAL area run, in the order build_scada_frame sorts areas"""
+    per_area = signals.groupby(scada_areas, sort=False).sum()
+    areas_list = [str(area) for area in areas]
+    if len(set(areas_list)) != len(areas_list):
+        # Area names that collide as strings: rows are sorted by the area values themselves
+        return per_area.sort_index().tolist()
+    known = per_area.index.isin(areas_list)
+    runs = per_area.reindex(areas_list, fill_value=0).tolist() + [per_area[~known].sum()]
+    return [run for run in runs if run]
+
+
+def _sheet_warnings(area_sheets, scada_parts, scada_signals, max_rows):
+    warnings = []
+    names = {}
+    for area, sheet in area_sheets.items():
+        if len(str(area)) > MAX_SHEET_NAME:
+            warnings.append({'sheet': sheet['sheet'], 'issue': 'name_truncated',
+                             'message': f"Area '{area}' is longer than {MAX_SHEET_NAME} characters; "
+                                        f"its sheet is named '{sheet['sheet']}'"})
+        elif sheet['sheet'] != str(area):
+            warnings.append({'sheet': sheet['sheet'], 'issue': 'name_changed',
+                             'message': f"Area '{area}' contains characters Excel forbids in sheet names; "
+                                        f"its sheet is named '{sheet['sheet']}'"})
+        names.setdefault(sheet['sheet'].lower(), []).append(str(area))
+        if sheet['rows'] > max_rows:
+            warnings.append({'sheet': sheet['sheet'], 'issue': 'too_many_rows',
+                             'message': f"Area sheet '{sheet['sheet']}' has {sheet['rows']:,} rows, more than "
+                                        f"Excel's {max_rows:,}; the workbook cannot hold it"})
+    for areas in names.values():
+        if len(areas) > 1:
+            warnings.append({'sheet': sanitize_sheet_name(areas[0]), 'issue': 'name_collision',
+                             'message': f"Areas {', '.join(repr(area) for area in areas)} map to the same sheet name"})
+    if len(scada_parts) > 1:
+        warnings.append({'sheet': 'SCADA_SIGNAL', 'issue': 'split',
+                         'message': f"{scada_signals:,} signals exceed Excel's {max_rows:,} rows; SCADA_SIGNAL "
+                                    f"is split into {len(scada_parts)} sheets on area boundaries"})
+    return warnings
+
+
+def plan_conversion(input_file, mapping, column_config=None, log=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                    progress=None, max_rows=MAX_SHEET_ROWS - 1, sheets=None):
+    """Dry run of convert(): what it would write, without expanding a single signal.
+
+    Reads the tag list, then counts each tag's SCADA signals from the length
+    of its compiled UDT template, so the per-area and per-UDT counts (and the
+    SCADA_SIGNAL split) are exactly what convert() produces. Also lists the
+    tags whose UDT type has no mapping, flags sheets that break Excel's limits
+    and estimates the size of the workbook and of the text exports.
+    ``mapping`` is a path, a loaded ``data_type_mapping`` dict or None, and
+    ``sheets`` the workbook sheets to read, as for convert(). Returns the
+    plan as a dict.
+    """
+    log = log or _no_log
+    columns = column_config or ColumnConfig()
+    started = time.perf_counter()
+    if mapping is None:
+        data_type_mapping = {}
+    elif isinstance(mapping, dict):
+        data_type_mapping = prepare_mapping(mapping)
+    else:
+        data_type_mapping = load_mapping(mapping, log)
+
+    chunks = list(iter_tag_chunks(input_file, columns, chunk_size, log, progress or NO_PROGRESS, sheets))
+    if not chunks:
+        raise ValueError(f"No tag rows found in {Path(input_file).name}")
+    df = pd.concat(chunks)
+    read_s = time.perf_counter() - started
+
+    udt_types = df[columns.udt_type].map(str).str.strip()
+    templates = compile_templates(udt_types.unique(), data_type_mapping, SignalAttributeTable(data_type_mapping))
+    sizes = _template_sizes(templates)
+    signals = udt_types.map({udt_type: size[0] for udt_type, size in sizes.items()})
+    mapped = signals.notna()
+    signals = signals.fillna(0).astype(np.int64)
+
+    # Area sheets, one per distinct input area in convert()'s sheet order
+    areas = sorted(df[columns.area].unique())
+    area_tags = df.groupby(columns.area, sort=False, dropna=False).size()
+    area_signals = signals.groupby(df[columns.area], sort=False, dropna=False).sum()
+    area_sheets = {}
+    for area in areas:
+        area_sheets[area] = {
+            'sheet': sanitize_sheet_name(area),
+            'rows': int(area_tags.get(area, 0)),
+            'scada_signals': int(area_signals.get(area, 0)),
+        }
+
+    # UDT types, largest signal count first
+    udt_tags = udt_types.value_counts(sort=False)
+    udt_summary = {}
+    for udt_type, tags in udt_tags.items():
+        per_tag = sizes[udt_type][0] if udt_type in sizes else None
+        udt_summary[udt_type] = {
+            'mapped': per_tag is not None,
+            'tags': int(tags),
+            'signals_per_tag': per_tag,
+            'scada_signals': int(tags) * (per_tag or 0),
+        }
+    udt_summary = dict(sorted(udt_summary.items(), key=lambda item: (-item[1]['scada_signals'], -item[1]['tags'])))
+
+    scada_signals = int(signals.sum())
+    unmapped = ~mapped if data_type_mapping else pd.Series(False, index=df.index)
+    scada_sheets = {}
+    if scada_signals:
+        parts = split_runs(_scada_area_runs(signals, area_groups(df, columns), areas), max_rows)
+        for part_idx, (part_start, part_end) in enumerate(parts, start=1):
+            scada_sheets[f"SCADA_SIGNAL_{part_idx}" if len(parts) > 1 else 'SCADA_SIGNAL'] = part_end - part_start
+    else:
+        parts = []
+
+    warnings = _sheet_warnings(area_sheets, parts, scada_signals, max_rows)
+    text_columns = [columns.tag_name, columns.data_block, columns.description, columns.udt_type, columns.area,
+                    columns.comments, columns.origin]
+    lengths = {col: _text_lengths(df[col]) for col in dict.fromkeys(text_columns)}
+    for col, col_lengths in lengths.items():
+        too_long = int((col_lengths > MAX_CELL_CHARS).sum())
+        if too_long:
+            warnings.append({'sheet': None, 'issue': 'cell_too_long',
+                             'message': f"{too_long:,} '{col}' values exceed Excel's {MAX_CELL_CHARS:,} characters per cell"})
+
+    # Text the sheets hold: per tag on its area sheet, per signal on SCADA_SIGNAL
+    area_chars = (lengths[columns.data_block] + lengths[columns.tag_name] + lengths[columns.udt_type]
+                  + lengths[columns.comments] + lengths[columns.origin] + lengths[columns.description]
+                  + AREA_SIGNAL_TYPE_CHARS + AREA_CONSTANT_CHARS)
+    signal_chars = (lengths[columns.area] + 2 * lengths[columns.data_block] + 1 + lengths[columns.tag_name]
+                    + lengths[columns.comments] + lengths[columns.origin] + lengths[columns.description])
+    entry_chars = udt_types.map({udt_type: size[1] for udt_type, size in sizes.items()}).fillna(0).to_numpy(dtype=np.int64)
+    scada_chars = int((signals.to_numpy() * signal_chars + entry_chars).sum())
+    header_chars = sum(map(len, AREA_SHEET_COLUMNS)) * len(area_sheets) + sum(map(len, SCADA_SHEET_COLUMNS)) * len(parts)
+    sheet_count = len(area_sheets) + len(parts)
+    workbook_chars = int(area_chars.sum()) + scada_chars + header_chars
+    estimated_bytes = {'workbook': round(workbook_chars * XLSX_BYTES_PER_CHAR + sheet_count * XLSX_BYTES_PER_SHEET)}
+    if scada_signals:
+        # One separator per field plus the line end; JSON Lines also repeat the quoted keys
+        json_keys = len(json.dumps(dict.fromkeys(SCADA_SHEET_COLUMNS, ''))) + 1
+        estimated_bytes['csv'] = scada_chars + scada_signals * len(SCADA_SHEET_COLUMNS) + len(','.join(SCADA_SHEET_COLUMNS)) + 1
+        estimated_bytes['jsonl'] = scada_chars + scada_signals * json_keys
+
+    plan = {
+        'plan_version': PLAN_VERSION,
+        'input_file': str(input_file),
+        'input_rows': len(df),
+        'mapped_tags': int(mapped.sum()),
+        'scada_signals': scada_signals,
+        'areas': {str(area): info for area, info in area_sheets.items()},
+        'scada_sheets': scada_sheets,
+        'udt_types': udt_summary,
+        'unmapped': {
+            'tags': int(unmapped.sum()),
+            'udt_types': {udt_type: info['tags'] for udt_type, info in udt_summary.items() if not info['mapped']}
+                         if data_type_mapping else {},
+            'tag_names': df.loc[unmapped.to_numpy(), columns.tag_name].map(str).tolist(),
+        },
+        'warnings': warnings,
+        'estimated_bytes': estimated_bytes,
+        'read_s': round(read_s, 4),
+        'plan_s': round(time.perf_counter() - started - read_s, 4),
+    }
+    if SOURCE_SHEET_COLUMN in df.columns:
+        plan['input_sheets'] = {sheet: int(rows) for sheet, rows in df[SOURCE_SHEET_COLUMN].value_counts(sort=False).items()}
+    return plan
+
+
+def format_size(num_bytes):
+    return f"{num_bytes / (1024 * 1024):,.1f} MB" if num_bytes >= 1024 * 1024 else f"{num_bytes / 1024:,.0f} KB"
+
+
+def format_plan(plan):
+    """Log lines summarizing a plan"""
+    lines = [f"🧮 Dry run: {plan['input_rows']:,} tags → {plan['scada_signals']:,} SCADA signals "
+             f"(planned in {plan['plan_s'] * 1000:,.0f} ms after {plan['read_s']:.2f}s reading)"]
+    if 'input_sheets' in plan:
+        lines.append(f"  📑 Read {len(plan['input_sheets'])} input sheets: "
+                     + ', '.join(f"{sheet} ({rows:,})" for sheet, rows in plan['input_sheets'].items()))
+    lines.append(f"  {len(plan['areas'])} area sheets:")
+    for area, info in plan['areas'].items():
+        lines.append(f"    {info['sheet']:<31} {info['rows']:>9,} tags {info['scada_signals']:>11,} signals")
+    for sheet, rows in plan['scada_sheets'].items():
+        lines.append(f"  {sheet}: {rows:,} rows")
+    mapped_udts = {udt: info for udt, info in plan['udt_types'].items() if info['mapped']}
+    if mapped_udts:
+        lines.append(f"  {len(mapped_udts)} mapped UDT types:")
+        for udt_type, info in mapped_udts.items():
+            lines.append(f"    {udt_type:<31} {info['tags']:>9,} tags × {info['signals_per_tag']:>4} "
+                         f"= {info['scada_signals']:>11,} signals")
+    unmapped = plan['unmapped']
+    if unmapped['tags']:
+        lines.append(f"  ⚠️ {unmapped['tags']:,} tags have a UDT type without mapping: "
+                     + ', '.join(f"{udt_type} ({tags:,})" for udt_type, tags in unmapped['udt_types'].items()))
+        names = unmapped['tag_names'][:LOG_UNMAPPED_TAGS]
+        more = len(unmapped['tag_names']) - len(names)
+        lines.append(f"    {', '.join(names)}" + (f" and {more:,} more" if more else ""))
+    for warning in plan['warnings']:
+        lines.append(f"  ⚠️ {warning['message']}")
+    estimates = plan['estimated_bytes']
+    lines.append(f"  📦 Estimated size: workbook ~{format_size(estimates['workbook'])}"
+                 + ''.join(f", {fmt} ~{format_size(estimates[fmt])}" for fmt in EXPORT_FORMATS if fmt in estimates))
+    return lines
+
+
+def write_plan(plan, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=2, default=str)
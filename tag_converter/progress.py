@@ -0,0 +1,43 @@
+import time
+
+# Rows between progress checks in per-row loops
+PROGRESS_INTERVAL = 1000
+
+
+class ConversionCancelled(Exception):
+    """Raised inside convert() when its cancel event is set"""
+
+
+class ProgressReporter:
+    """Rate-limited progress callback with cooperative cancellation for convert().
+
+    ``callback(stage, done, total)`` is called at most once per ``interval``
+    seconds per stage (plus when a stage starts or ``force`` is set); ``total``
+    is None when unknown. Every update first checks ``cancel_event`` (e.g. a
+    threading.Event) and raises ConversionCancelled once it is set.
+    """
+
+    def __init__(self, callback=None, cancel_event=None, interval=0.1):
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.interval = interval
+        self._stage = None
+        self._last = 0.0
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ConversionCancelled("Conversion cancelled")
+
+    def update(self, stage, done, total=None, force=False):
+        self.check_cancelled()
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if force or stage != self._stage or now - self._last >= self.interval:
+            self._stage = stage
+            self._last = now
+            self.callback(stage, done, total)
+
+
+# Used when convert() is called without a reporter
+NO_PROGRESS = ProgressReporter()
@@ -0,0 +1,449 @@
+import csv
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
+
+from .constants import ALL_SHEETS, DEFAULT_CHUNK_SIZE, SOURCE_SHEET_COLUMN
+from .progress import NO_PROGRESS, PROGRESS_INTERVAL
+
+# Rows parsed per step while a whole sheet is read for a multi-sheet input
+SHEET_CHUNK_ROWS = 50000
+
+# Extensions openpyxl can stream; anything else (e.g. legacy .xls) goes through pd.read_excel
+OPENPYXL_EXTENSIONS = {'.xlsx', '.xlsm', '.xltx', '.xltm'}
+# Input formats by file extension; files with other extensions are sniffed by content
+FORMAT_EXTENSIONS = {
+    **{extension: 'xlsx' for extension in OPENPYXL_EXTENSIONS},
+    '.xls': 'xls',
+    '.csv': 'csv',
+    '.txt': 'csv',
+    '.tsv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+}
+# Leading bytes of the binary formats
+FORMAT_MAGIC = [(b'PK\x03\x04', 'xlsx'), (b'\xd0\xcf\x11\xe0', 'xls'), (b'PAR1', 'parquet'), (b'ARROW1', 'feather')]
+# Formats read through pyarrow
+ARROW_FORMATS = {'parquet', 'feather'}
+CSV_DELIMITERS = ',;\t|'
+
+
+def _no_log(message):
+    pass
+
+
+def _convert_value(value, data_type):
+    # Same conversion pd.read_excel applies to openpyxl cells
+    if value is None:
+        return ''
+    elif data_type == TYPE_ERROR:
+        return np.nan
+    elif data_type == TYPE_NUMERIC:
+        val = int(value)
+        if val == value:
+            return val
+        return float(value)
+    return value
+
+
+def _convert_cell(cell):
+    return _convert_value(cell.value, cell.data_type)
+
+
+def _header_names(values):
+    """Column names as pandas builds them from a header row (blank -> 'Unnamed: i', duplicates -> 'X.1')"""
+    names = []
+    seen = {}
+    for idx, value in enumerate(values):
+        name = f"Unnamed: {idx}" if value is None or value == '' else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def sniff_format(head):
+    """Format of a file from its first bytes: a known binary signature, else text (CSV)"""
+    for magic, fmt in FORMAT_MAGIC:
+        if head.startswith(magic):
+            return fmt
+    return 'csv'
+
+
+def detect_format(input_file, head=None):
+    """Input format ('xlsx', 'xls', 'csv', 'parquet' or 'feather') by extension, else by content.
+
+    ``head`` are the file's first bytes when already read.
+    """
+    fmt = FORMAT_EXTENSIONS.get(Path(input_file).suffix.lower())
+    if fmt is None:
+        if head is None:
+            with open(input_file, 'rb') as f:
+                head = f.read(8)
+        fmt = sniff_format(head)
+    return fmt
+
+
+def _require_pyarrow(fmt):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError(f"Reading {fmt.capitalize()} files needs pyarrow (pip install pyarrow)") from None
+
+
+def csv_options(sample):
+    """read_csv options (delimiter, encoding) for a CSV file from a sample of its first bytes"""
+    encoding = 'utf-8-sig'
+    try:
+        text = sample.decode(encoding)
+    except UnicodeDecodeError as e:
+        # A sample can end inside a multi-byte character; anything earlier means another encoding
+        if e.start < len(sample) - 4:
+            encoding = 'cp1252'
+        text = sample.decode(encoding, errors='ignore')
+    first_line = text.splitlines()[0] if text else ''
+    try:
+        delimiter = csv.Sniffer().sniff(first_line, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        delimiter = ','
+    return {'sep': delimiter, 'encoding': encoding}
+
+
+def _csv_options_for(input_file):
+    with open(input_file, 'rb') as f:
+        return csv_options(f.read(64 * 1024))
+
+
+def read_header(input_file):
+    """Read only the header row (of the first sheet, for workbooks)"""
+    fmt = detect_format(input_file)
+    if fmt == 'csv':
+        return list(pd.read_csv(input_file, nrows=0, **_csv_options_for(input_file)).columns)
+    if fmt in ARROW_FORMATS:
+        _require_pyarrow(fmt)
+        import pyarrow.parquet as pq
+        from pyarrow import ipc
+
+        if fmt == 'parquet':
+            return list(pq.ParquetFile(input_file).schema_arrow.names)
+        return list(ipc.open_file(input_file).schema.names)
+    if fmt != 'xlsx':
+        return list(pd.read_excel(input_file, nrows=0).columns)
+
+    wb = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        ws.reset_dimensions()
+        return _sheet_header(ws)
+    finally:
+        wb.close()
+
+
+def _sheet_header(ws):
+    """Header row of a read-only worksheet, with the column names pandas would give it"""
+    for row in ws.iter_rows(max_row=1):
+        values = [_convert_cell(cell) for cell in row]
+        while values and values[-1] == '':
+            values.pop()
+        return _header_names(values)
+    return []
+
+
+def list_sheets(input_file):
+    """Sheet names of an Excel workbook, in workbook order"""
+    fmt = detect_format(input_file)
+    if fmt == 'xlsx':
+        wb = load_workbook(input_file, read_only=True)
+        try:
+            return wb.sheetnames
+        finally:
+            wb.close()
+    if fmt == 'xls':
+        return list(pd.ExcelFile(input_file).sheet_names)
+    raise ValueError(f"{Path(input_file).name} is not an Excel workbook: only workbooks have sheets to select")
+
+
+def select_sheets(sheet_names, sheets):
+    """The sheets to read: every sheet for ALL_SHEETS, else the named ones (a name or a list) in the given order"""
+    if isinstance(sheets, str):
+        sheets = [sheets]
+    if ALL_SHEETS in sheets:
+        return list(sheet_names)
+    missing = [sheet for sheet in sheets if sheet not in sheet_names]
+    if missing:
+        raise ValueError(f"Sheets not found: {', '.join(missing)}\nAvailable: {', '.join(sheet_names)}")
+    return list(dict.fromkeys(sheets))
+
+
+def validate_header(header, columns):
+    """Fail fast when a required column is missing from the header row"""
+    missing_cols = [col for col in columns.required if col not in header]
+    if missing_cols:
+        raise ValueError(f"Required columns not found: {', '.join(missing_cols)}\nAvailable: {', '.join(map(str, header))}")
+
+
+def projected_columns(header, columns):
+    """Configured columns present in the input, in header order"""
+    wanted = set(columns.required + [columns.comments, columns.origin])
+    return [col for col in header if col in wanted]
+
+
+def _parse_chunk(rows, names):
+    # Let pandas apply the NA handling pd.read_excel would ('' , 'NA', '#N/A', ...)
+    return TextParser(rows, names=names, header=None, dtype=object).read()
+
+
+def _estimated_rows(ws):
+    # The stored sheet dimension is only a hint (it can be missing or stale)
+    try:
+        return max(ws.max_row - 1, 0) if ws.max_row else None
+    except Exception:
+        return None
+
+
+def _iter_openpyxl_chunks(input_file, header, usecols, chunk_size, progress=NO_PROGRESS):
+    wb = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        total = _estimated_rows(ws)
+        ws.reset_dimensions()
+        yield from _iter_worksheet_chunks(ws, header, usecols, chunk_size, total, progress)
+    finally:
+        wb.close()
+
+
+def _iter_worksheet_chunks(ws, header, usecols, chunk_size, total=None, progress=NO_PROGRESS):
+    """Projected body rows of a read-only worksheet in DataFrame chunks"""
+    positions = [header.index(col) for col in usecols]
+    last_position = max(positions) + 1 if positions else 0
+    rows = []
+    blank_rows = []
+    for row_count, row in enumerate(ws.iter_rows(min_row=2), start=1):
+        if row_count % PROGRESS_INTERVAL == 0:
+            progress.update('read', row_count, max(total, row_count) if total else None)
+        cells = row[:last_position]
+        values = [_convert_cell(cells[pos]) if pos < len(cells) else '' for pos in positions]
+        # Blank rows are kept between data rows but trimmed at the end, like pd.read_excel
+        if all(value == '' for value in values):
+            blank_rows.append(values)
+            continue
+        if blank_rows:
+            rows.extend(blank_rows)
+            blank_rows = []
+        rows.append(values)
+        if len(rows) >= chunk_size:
+            yield _parse_chunk(rows, usecols)
+            rows = []
+    if rows:
+        yield _parse_chunk(rows, usecols)
+
+
+def _iter_frame_chunks(input_file, usecols, chunk_size, progress=NO_PROGRESS):
+    df = pd.read_excel(input_file, usecols=usecols, dtype=object)
+    for start in range(0, len(df), chunk_size):
+        progress.update('read', start, len(df))
+        yield df.iloc[start:start + chunk_size]
+
+
+def _read_sheet(input_file, sheet_name, columns):
+    """Read one sheet of an .xlsx workbook into (header, projected DataFrame); the frame is None when a required column is missing.
+
+    Runs in a worker process when sheets are read concurrently, so it opens
+    the workbook itself and only takes and returns plain data.
+    """
+    wb = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name]
+        ws.reset_dimensions()
+        header = _sheet_header(ws)
+        if any(col not in header for col in columns.required):
+            return header, None
+        usecols = projected_columns(header, columns)
+        chunks = list(_iter_worksheet_chunks(ws, header, usecols, SHEET_CHUNK_ROWS))
+    finally:
+        wb.close()
+    return header, pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=usecols, dtype=object)
+
+
+def _iter_workbook_sheets(input_file, sheet_names, columns, executor=None, progress=NO_PROGRESS):
+    """Yield (sheet name, header, projected frame or None) of the given sheets of an .xlsx workbook, in order.
+
+    Each sheet is streamed through openpyxl's read-only mode, concurrently
+    in ``executor``'s worker processes when given.
+    """
+    wb = load_workbook(input_file, read_only=True)
+    try:
+        estimates = [_estimated_rows(wb[sheet_name]) for sheet_name in sheet_names]
+    finally:
+        wb.close()
+    total = sum(estimates) if all(estimate is not None for estimate in estimates) else None
+    if executor is not None:
+        futures = [executor.submit(_read_sheet, input_file, sheet_name, columns) for sheet_name in sheet_names]
+        results = (future.result() for future in futures)
+    else:
+        results = (_read_sheet(input_file, sheet_name, columns) for sheet_name in sheet_names)
+    done = 0
+    for sheet_name, (header, frame) in zip(sheet_names, results):
+        done += len(frame) if frame is not None else 0
+        progress.update('read', done, max(total, done) if total else None)
+        yield sheet_name, header, frame
+
+
+def _iter_excel_sheets(input_file, sheet_names, columns, progress=NO_PROGRESS):
+    """_iter_workbook_sheets through pd.read_excel, for .xls files"""
+    frames = pd.read_excel(input_file, sheet_name=sheet_names, dtype=object)
+    done = 0
+    for sheet_name in sheet_names:
+        header = list(frames[sheet_name].columns)
+        if any(col not in header for col in columns.required):
+            yield sheet_name, header, None
+            continue
+        frame = frames[sheet_name][projected_columns(header, columns)].copy()
+        done += len(frame)
+        progress.update('read', done)
+        yield sheet_name, header, frame
+
+
+def _iter_sheet_chunks(input_file, fmt, sheets, columns, chunk_size, log=_no_log, progress=NO_PROGRESS,
+                       executor=None):
+    """Chunks of several sheets, one after another, each row tagged with its sheet in SOURCE_SHEET_COLUMN.
+
+    Every sheet has its own header row. With ALL_SHEETS, sheets lacking a
+    required column (cover or notes sheets) are skipped; a named sheet
+    lacking one is an error.
+    """
+    sheet_names = select_sheets(list_sheets(input_file), sheets)
+    log(f"📑 Reading {len(sheet_names)} sheet(s): {', '.join(sheet_names)}")
+    if fmt == 'xlsx':
+        results = _iter_workbook_sheets(input_file, sheet_names, columns, executor, progress)
+    else:
+        results = _iter_excel_sheets(input_file, sheet_names, columns, progress)
+    optional = [col for col in (columns.comments, columns.origin) if col != SOURCE_SHEET_COLUMN]
+    found = 0
+    for sheet_name, header, frame in results:
+        if frame is None:
+            missing_cols = [col for col in columns.required if col not in header]
+            if ALL_SHEETS not in ([sheets] if isinstance(sheets, str) else sheets):
+                raise ValueError(f"Required columns not found in sheet '{sheet_name}': {', '.join(missing_cols)}\n"
+                                 f"Available: {', '.join(map(str, header))}")
+            log(f"  ℹ️ Skipped sheet '{sheet_name}': missing {', '.join(missing_cols)}")
+            continue
+        found += 1
+        for col in optional:
+            if col not in frame.columns:
+                frame[col] = ''
+        frame[SOURCE_SHEET_COLUMN] = sheet_name
+        log(f"  ✓ Read '{sheet_name}': {len(frame)} rows")
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size]
+    if not found:
+        raise ValueError(f"No sheet of {Path(input_file).name} has the required columns: {', '.join(columns.required)}")
+
+
+def _iter_csv_chunks(input_file, usecols, chunk_size, progress=NO_PROGRESS):
+    # Text stays text: no type inference, so tag names like '007' keep their leading zeros
+    reader = pd.read_csv(input_file, usecols=usecols, dtype=str, chunksize=chunk_size,
+                         **_csv_options_for(input_file))
+    with reader:
+        done = 0
+        for chunk in reader:
+            yield chunk[usecols].astype(object)
+            done += len(chunk)
+            progress.update('read', done)
+
+
+def _iter_arrow_chunks(input_file, fmt, usecols, chunk_size, progress=NO_PROGRESS):
+    # Typed columnar reads of only the projected columns, converted to object columns per chunk
+    _require_pyarrow(fmt)
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    if fmt == 'parquet':
+        parquet = pq.ParquetFile(input_file)
+        total = parquet.metadata.num_rows
+        batches = parquet.iter_batches(batch_size=chunk_size, columns=usecols)
+    else:
+        table = feather.read_table(input_file, columns=usecols, memory_map=True)
+        total = table.num_rows
+        batches = table.to_batches(max_chunksize=chunk_size)
+    done = 0
+    for batch in batches:
+        chunk = batch.to_pandas().astype(object)
+        yield chunk.where(chunk.notna(), np.nan)
+        done += len(chunk)
+        progress.update('read', done, total)
+
+
+def iter_tag_chunks(input_file, columns, chunk_size=DEFAULT_CHUNK_SIZE, log=_no_log, progress=NO_PROGRESS,
+                    sheets=None, executor=None):
+    """Validate the header, then stream the configured input columns in DataFrame chunks.
+
+    Excel workbooks, CSV, Parquet and Feather files are accepted (see
+    detect_format); Parquet and Feather need pyarrow.
+    Only the configured columns are materialized, all as object dtype so tag names
+    and other text keep their values as typed. Missing optional columns are
+    added empty. Chunks carry a running RangeIndex over the whole input.
+    Workbooks are read from their first sheet unless ``sheets`` names the
+    sheets to read (or is ALL_SHEETS); those are concatenated in order with
+    a SOURCE_SHEET_COLUMN column, and parsed concurrently in ``executor``'s
+    worker processes when given (see _iter_sheet_chunks).
+    Reading progress is reported to ``progress`` as the 'read' stage.
+    """
+    log(f"📖 Reading {Path(input_file).name}...")
+    fmt = detect_format(input_file)
+    if sheets is not None:
+        if fmt not in ('xlsx', 'xls'):
+            raise ValueError(f"{Path(input_file).name} is not an Excel workbook: only workbooks have sheets to select")
+        missing_optional = []
+        chunks = _iter_sheet_chunks(input_file, fmt, sheets, columns, chunk_size, log, progress, executor)
+    else:
+        missing_optional, chunks = _iter_first_sheet_chunks(input_file, fmt, columns, chunk_size, log, progress)
+
+    offset = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        for col in missing_optional:
+            chunk[col] = ''
+        if len(chunk):
+            yield chunk
+    progress.update('read', offset, offset, force=True)
+
+
+def _iter_first_sheet_chunks(input_file, fmt, columns, chunk_size, log, progress):
+    """(missing optional columns, chunks) of a single-table input: a CSV/columnar file or a workbook's first sheet"""
+    header = read_header(input_file)
+    validate_header(header, columns)
+    usecols = projected_columns(header, columns)
+
+    # Create empty columns for optional fields if they don't exist
+    missing_optional = [col for col in (columns.comments, columns.origin) if col not in usecols]
+    for col in missing_optional:
+        log(f"ℹ️ Created empty '{col}' column")
+
+    if fmt == 'xlsx':
+        chunks = _iter_openpyxl_chunks(input_file, header, usecols, chunk_size, progress)
+    elif fmt == 'csv':
+        chunks = _iter_csv_chunks(input_file, usecols, chunk_size, progress)
+    elif fmt in ARROW_FORMATS:
+        chunks = _iter_arrow_chunks(input_file, fmt, usecols, chunk_size, progress)
+    else:
+        chunks = _iter_frame_chunks(input_file, usecols, chunk_size, progress)
+    return missing_optional, chunks
+
+
+def read_tags(input_file, columns, log=_no_log):
+    """Read the whole projected input into one DataFrame"""
+    chunks = list(iter_tag_chunks(input_file, columns, log=log))
+    if not chunks:
+        return pd.DataFrame(columns=projected_columns(read_header(input_file), columns))
+    return pd.concat(chunks)
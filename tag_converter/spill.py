@@ -0,0 +1,245 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .expansion import ORDER_COLUMNS
+
+# Sorted signal rows read back from the spill per step
+SPILL_CHUNK_ROWS = 10000
+# SQLite's 64-bit integer range; larger Python ints are pickled like other types
+SQLITE_INT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def _no_log(message):
+    pass
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(index=False, deep=True).sum())
+
+
+def _stripped_values(series):
+    """``series.astype(str).str.strip()`` as an object array, stripping each distinct value once for a Categorical"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        stripped = np.append(series.cat.categories.astype(str).str.strip().to_numpy(dtype=object), 'nan')
+        return stripped[series.cat.codes.to_numpy()]
+    return series.astype(str).str.strip().to_numpy(dtype=object)
+
+
+def _sql_value(value):
+    """A cell value SQLite stores and returns unchanged (None, str, int, float), else its pickle"""
+    value_type = type(value)
+    if value is None or value_type is str or value_type is float:
+        return value
+    if value_type is int and SQLITE_INT_RANGE[0] <= value <= SQLITE_INT_RANGE[1]:
+        return value
+    if isinstance(value, np.integer) and not isinstance(value, np.bool_):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    # Booleans, dates and the like keep their type through the pickle
+    return pickle.dumps(value)
+
+
+def _sql_values(series):
+    """(values as SQLite parameters, whether any was pickled) of a column, encoding a Categorical's dictionary once"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = [_sql_value(value) for value in series.cat.categories.tolist()]
+        pickled = any(isinstance(value, bytes) for value in categories)
+        return np.array(categories + [None], dtype=object)[series.cat.codes.to_numpy()], pickled
+    values = series.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=True) == 'string':
+        return values, False
+    values = [_sql_value(value) for value in values.tolist()]
+    return np.array(values, dtype=object), any(isinstance(value, bytes) for value in values)
+
+
+def _unpickled(values):
+    return [pickle.loads(value) if isinstance(value, bytes) else value for value in values]
+
+
+class SignalSpill:
+    """Expanded SCADA frames kept in memory up to a byte budget, then spilled to a temporary SQLite database.
+
+    Frames are added in input order. While their in-memory size stays within
+    ``budget_bytes`` they are only held (see ``frames``), so a run that fits
+    takes the normal in-memory path unchanged. Past the budget every held
+    frame, and each one added later, is written to the database with its
+    SCADA_SIGNAL sort keys; sort() then orders the rows there as
+    build_scada_frame() would and returns them as SpilledSignals, streamed
+    back in chunks. Only ``columns`` (the SCADA_SIGNAL sheet columns) are
+    kept. The database file is removed by close().
+    """
+
+    def __init__(self, budget_bytes, columns, log=_no_log, directory=None):
+        self.budget_bytes = int(budget_bytes)
+        self.columns = list(columns)
+        self.log = log
+        self.directory = directory
+        self.frames = []
+        self.held_bytes = 0
+        self.rows = 0
+        self.spilled_rows = 0
+        self.spilled_bytes = 0
+        self.spills = 0
+        self.path = None
+        self.db = None
+        # Columns holding pickled values, decoded when read back
+        self._pickled = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def spilled(self):
+        return self.db is not None
+
+    def add(self, frame):
+        """Hold an expanded frame, spilling once past the budget; returns the rows written to disk"""
+        if not len(frame):
+            return 0
+        self.rows += len(frame)
+        self.frames.append(frame)
+        self.held_bytes += _frame_bytes(frame)
+        if self.held_bytes > self.budget_bytes or self.spilled:
+            return self._spill()
+        return 0
+
+    def _open(self):
+        fd, self.path = tempfile.mkstemp(dir=self.directory, prefix='tag_converter.', suffix='.spill.sqlite')
+        os.close(fd)
+        self.db = sqlite3.connect(self.path)
+        # A scratch database: nothing to recover after a crash
+        self.db.execute('PRAGMA journal_mode = OFF')
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.db.execute('PRAGMA temp_store = FILE')
+        value_columns = ', '.join(f"c{idx}" for idx in range(len(self.columns)))
+        self.db.execute(f"CREATE TABLE signals (seq INTEGER PRIMARY KEY, area TEXT, base_tag TEXT, index_key INTEGER, "
+                        f"{value_columns})")
+        self.log(f"  💽 Expanded signals passed the {self.budget_bytes / (1024 * 1024):,.1f} MB memory budget; "
+                 f"spilling them to {self.path}")
+
+    def _spill(self):
+        """Move every held frame to the database; returns their rows"""
+        if self.db is None:
+            self._open()
+        rows = sum(len(frame) for frame in self.frames)
+        value_columns = ', '.join(f"c{idx}" for idx in range(len(self.columns)))
+        placeholders = ', '.join('?' * (len(self.columns) + 3))
+        for frame in self.frames:
+            area = _stripped_values(frame['Area'])
+            values = {}
+            for col in self.columns:
+                if col == 'Area':
+                    values[col] = area
+                elif col == 'Scada Tag Path':
+                    values[col] = _stripped_values(frame[col])
+                else:
+                    values[col], pickled = _sql_values(frame[col])
+                    if pickled:
+                        self._pickled.add(col)
+            params = zip(area, frame[ORDER_COLUMNS[0]].to_numpy(dtype=object),
+                       frame[ORDER_COLUMNS[1]].to_numpy(dtype=np.int64).tolist(),
+                       *(values[col] for col in self.columns))
+            self.db.executemany(f"INSERT INTO signals (area, base_tag, index_key, {value_columns}) "
+                                f"VALUES ({placeholders})", params)
+            self.spilled_rows += len(frame)
+        self.spilled_bytes += self.held_bytes
+        self.spills += 1
+        self.frames = []
+        self.held_bytes = 0
+        return rows
+
+    def sort(self, areas, order_keys):
+        """Spill what is still held, then order all rows by area, base tag and array indices.
+
+        ``areas`` and ``order_keys`` are those the in-memory sort would get;
+        rows with equal keys keep their input order.
+        """
+        if self.frames:
+            self._spill()
+        db = self.db
+        db.execute('CREATE TABLE area_ranks (area TEXT PRIMARY KEY, rank INTEGER)')
+        db.executemany('INSERT OR IGNORE INTO area_ranks VALUES (?, ?)',
+                       ((str(area), rank) for rank, area in enumerate(areas)))
+        db.execute('CREATE TABLE index_ranks (index_key INTEGER PRIMARY KEY, rank INTEGER)')
+        db.executemany('INSERT INTO index_ranks VALUES (?, ?)', enumerate(order_keys.index_ranks().tolist()))
+        value_columns = [f"c{idx}" for idx in range(len(self.columns))]
+        area_position = self.columns.index('Area')
+        # Areas outside the sheet's area list are left empty and sort last, as in build_scada_frame
+        selected = ["CASE WHEN a.rank IS NULL THEN NULL ELSE s.area END" if idx == area_position else f"s.{col}"
+                    for idx, col in enumerate(value_columns)]
+        db.execute(f"CREATE TABLE sorted (pos INTEGER PRIMARY KEY, {', '.join(value_columns)})")
+        db.execute(f"INSERT INTO sorted ({', '.join(value_columns)}) "
+                   f"SELECT {', '.join(selected)} FROM signals s "
+                   f"LEFT JOIN area_ranks a ON a.area = s.area JOIN index_ranks i ON i.index_key = s.index_key "
+                   f"ORDER BY COALESCE(a.rank, {len(areas)}), s.base_tag, i.rank, s.seq")
+        db.execute('DROP TABLE signals')
+        db.commit()
+        return SpilledSignals(self)
+
+    def counters(self):
+        """How much was spilled, for the run statistics"""
+        return {
+            'budget_bytes': self.budget_bytes,
+            'spilled_rows': self.spilled_rows,
+            'spilled_bytes': self.spilled_bytes,
+            'spills': self.spills,
+            'file_bytes': os.path.getsize(self.path) if self.path and os.path.exists(self.path) else 0,
+        }
+
+    def close(self):
+        """Drop the held frames and remove the database file"""
+        self.frames = []
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+class SpilledSignals:
+    """The sorted SCADA_SIGNAL rows of a SignalSpill, read back in DataFrame chunks"""
+
+    def __init__(self, spill):
+        self.spill = spill
+        self.columns = spill.columns
+        self.rows = spill.rows
+
+    def __len__(self):
+        return self.rows
+
+    def area_runs(self):
+        """(area, rows) of each consecutive area run in sheet order; rows of unlisted areas come last as None"""
+        area = f"c{self.columns.index('Area')}"
+        return self.spill.db.execute(f"SELECT {area}, COUNT(*) FROM sorted GROUP BY {area} ORDER BY MIN(pos)").fetchall()
+
+    def iter_chunks(self, start=0, end=None, columns=None, chunk_rows=SPILL_CHUNK_ROWS):
+        """Sorted rows ``start``..``end`` (0-based, end exclusive) as object DataFrames of ``chunk_rows`` rows.
+
+        ``columns`` picks a subset of the spilled columns (default: all).
+        """
+        end = self.rows if end is None else end
+        columns = list(columns or self.columns)
+        value_columns = ', '.join(f"c{self.columns.index(col)}" for col in columns)
+        pickled = [col for col in columns if col in self.spill._pickled]
+        for chunk_start in range(start, end, chunk_rows):
+            chunk_end = min(chunk_start + chunk_rows, end)
+            rows = self.spill.db.execute(f"SELECT {value_columns} FROM sorted WHERE pos > ? AND pos <= ? ORDER BY pos",
+                                         (chunk_start, chunk_end)).fetchall()
+            chunk = pd.DataFrame(rows, columns=columns, dtype=object)
+            for col in pickled:
+                chunk[col] = _unpickled(chunk[col].tolist())
+            chunk.index = pd.RangeIndex(chunk_start, chunk_end)
+            yield chunk
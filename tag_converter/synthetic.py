@@ -0,0 +1,115 @@
+import random
+from dataclasses import asdict, dataclass
+
+INPUT_COLUMNS = ['Tag Name', 'Data Block', 'Description', 'UDT Type', 'Area', 'Comments', 'Origin']
+
+# UDT types of the synthetic mapping and their (signal type, data type) rows
+SYNTHETIC_UDTS = {
+    'ANL': [('Status', 'REAL'), ('Value', 'REAL'), ('HiAlarm', 'BOOL'), ('LoAlarm', 'BOOL'),
+            ('HiHiAlarm', 'BOOL'), ('LoLoAlarm', 'BOOL')],
+    'TANK': [('Level', 'REAL'), ('Volume', 'REAL'), ('HiAlarm', 'BOOL'), ('LoAlarm', 'BOOL')],
+    'DIG_ALR': [('Status', 'BOOL'), ('Alarm', 'BOOL'), ('Inhibit', 'BOOL')],
+    'PUMP': [('Running', 'BOOL'), ('Fault', 'BOOL'), ('Cmd', 'BOOL'), ('Speed', 'REAL')],
+    'VALVE': [('Open', 'BOOL'), ('Closed', 'BOOL'), ('PositionFailure', 'BOOL')],
+    'BILGE': [('High', 'BOOL'), ('HighAlarm', 'BOOL')],
+    'DEIF_ANALOG': [('Value', 'REAL'), ('Status', 'INT')],
+    'INT': [('Value', 'INT')],
+}
+UNMAPPED_UDTS = ['MOTOR_X', 'SPARE']
+
+PLAIN_DESCRIPTIONS = ['Temperature', 'Pressure', 'Level', 'Flow', 'Running', 'Open', 'Closed', 'Speed']
+KEYWORD_DESCRIPTIONS = ['DEIF generator', 'Modbus link', 'GPS position', 'Setpoint', 'Position failure', 'Level_SP']
+
+
+@dataclass
+class SyntheticSpec:
+    """Parameters of a synthetic tag list and mapping"""
+    rows: int = 10000
+    areas: int = 20
+    # Share of tags typed 'ARRAY[0..n] OF <UDT>', with n + 1 drawn from 2..array_width
+    array_share: float = 0.1
+    array_width: int = 16
+    # Share of BOOL mapping signals turned into 'ARRAY[0..1] of BOOL' data types
+    data_type_array_share: float = 0.2
+    # Share of mapping UDTs typed 'ARRAY[1..n] OF <UDT>', with n drawn from 2..array_width
+    mapping_array_share: float = 0.0
+    # Share of tags whose description/data block hits a COMM or CALCULATED keyword
+    keyword_density: float = 0.1
+    # Share of tags with a UDT type the mapping does not know
+    unmapped_share: float = 0.05
+    seed: int = 0
+
+    def file_stem(self):
+        """File name stem that identifies these parameters"""
+        return '_'.join(f"{key}{value}" for key, value in asdict(self).items())
+
+    def mapping_stem(self):
+        """File name stem of the mapping, which only depends on the array shares, array width and seed"""
+        return (f"mapping_data_type_array_share{self.data_type_array_share}"
+                f"_mapping_array_share{self.mapping_array_share}_array_width{self.array_width}_seed{self.seed}")
+
+
+def mapping_rows(spec):
+    """(UDT Type, Signal Type, Data Type) rows of the synthetic mapping"""
+    rng = random.Random(spec.seed)
+    rows = [(udt, signal_type, data_type) for udt, signals in SYNTHETIC_UDTS.items() for signal_type, data_type in signals]
+    bool_rows = [idx for idx, row in enumerate(rows) if row[2] == 'BOOL']
+    for idx in rng.sample(bool_rows, round(len(bool_rows) * spec.data_type_array_share)):
+        rows[idx] = (rows[idx][0], rows[idx][1], 'ARRAY[0..1] of BOOL')
+    if spec.mapping_array_share:
+        # Every row of a UDT carries its array type, the mapping reads it from the first one
+        array_udts = {udt: f"ARRAY[1..{rng.randint(2, max(spec.array_width, 2))}] OF {udt}"
+                      for udt in rng.sample(list(SYNTHETIC_UDTS), round(len(SYNTHETIC_UDTS) * spec.mapping_array_share))}
+        rows = [(array_udts.get(udt, udt), signal_type, data_type) for udt, signal_type, data_type in rows]
+    return rows
+
+
+def iter_tag_rows(spec):
+    """Rows of the synthetic tag list, in INPUT_COLUMNS order"""
+    rng = random.Random(spec.seed + 1)
+    udts = list(SYNTHETIC_UDTS)
+    areas = [f"Area {idx:03d}" for idx in range(spec.areas)]
+    if spec.areas > 1:
+        areas[-1] = 'Diagnostics'
+    for idx in range(spec.rows):
+        udt = rng.choice(UNMAPPED_UDTS) if rng.random() < spec.unmapped_share else rng.choice(udts)
+        if rng.random() < spec.array_share:
+            udt = f"ARRAY[0..{rng.randint(2, max(spec.array_width, 2)) - 1}] OF {udt}"
+        data_block = f"DB{rng.randint(1, 200)}"
+        description = rng.choice(PLAIN_DESCRIPTIONS)
+        if rng.random() < spec.keyword_density:
+            if rng.random() < 0.3:
+                data_block = f"DB_Comm{rng.randint(1, 20)}"
+            else:
+                description = rng.choice(KEYWORD_DESCRIPTIONS)
+        yield [
+            f"TAG_{idx:07d}",
+            data_block,
+            f"{description} {idx}",
+            udt,
+            rng.choice(areas),
+            'Synthetic' if idx % 7 == 0 else None,
+            None,
+        ]
+
+
+def _write_rows(path, header, rows):
+    # Imported here so the CLI can build SyntheticSpec defaults without loading openpyxl
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def generate_mapping(path, spec):
+    """Write the synthetic mapping workbook"""
+    _write_rows(path, ['UDT Type', 'Signal Type', 'Data Type'], mapping_rows(spec))
+
+
+def generate_tag_list(path, spec):
+    """Write the synthetic input tag list workbook"""
+    _write_rows(path, INPUT_COLUMNS, iter_tag_rows(spec))
@@ -0,0 +1,255 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .export import check_export_formats, export_signal_chunks
+from .formatting import AREA_COLORS, SCADA_HEADER_COLOR
+from .writer import DEFAULT_WRITER, MAX_SHEET_ROWS, create_writer
+
+# Display column -> database column of each stored table, in output order
+TAG_FIELDS = {
+    'Area': 'area',
+    'Data Block': 'data_block',
+    'Tag Name': 'tag_name',
+    'UDT Type': 'udt_type',
+    'Signal Type': 'signal_type',
+    'Description': 'description',
+    'Comments': 'comments',
+    'Origin': 'origin',
+}
+SIGNAL_FIELDS = {
+    'Area': 'area',
+    'DB': 'db',
+    'Scada Tag Path': 'scada_tag_path',
+    'Type': 'type',
+    'Signal Type': 'signal_type',
+    'Data Type': 'data_type',
+    'Is Alarm': 'is_alarm',
+    'Description': 'description',
+    'Comments': 'comments',
+    'Origin': 'origin',
+}
+TABLE_FIELDS = {'tags': TAG_FIELDS, 'signals': SIGNAL_FIELDS}
+# Query filter -> database column it matches, per table; each filter has an index
+FILTER_COLUMNS = {
+    'tags': {'area': 'area', 'db': 'data_block', 'type': 'udt_type', 'signal_type': 'signal_type',
+             'path': 'tag_name'},
+    'signals': {'area': 'area', 'db': 'db', 'type': 'type', 'signal_type': 'signal_type',
+                'path': 'scada_tag_path'},
+}
+INPUT_FILE_COLUMN = 'Input File'
+# Rows read back per step when exporting a query result
+QUERY_CHUNK_ROWS = 50000
+# Seconds a writer waits for another conversion (e.g. a batch worker) to finish writing the database
+LOCK_TIMEOUT = 60
+
+
+def _db_value(value):
+    """A cell value as SQLite stores it: None, str, int or float (booleans as 0/1, anything else as text)"""
+    value_type = type(value)
+    if value is None or value_type is str or value_type is int:
+        return value
+    if value_type is bool or isinstance(value, np.bool_):
+        return int(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return str(value)
+
+
+def _db_values(series):
+    """A column as SQLite parameters, converting a Categorical's dictionary once"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = [_db_value(value) for value in series.cat.categories.tolist()]
+        return np.array(categories + [None], dtype=object)[series.cat.codes.to_numpy()]
+    values = series.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        return values
+    return np.array([_db_value(value) for value in values.tolist()], dtype=object)
+
+
+def _schema(table, fields):
+    columns = ', '.join(fields.values())
+    indexes = [f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column});"
+               for column in FILTER_COLUMNS[table].values()]
+    return (f"CREATE TABLE IF NOT EXISTS {table} (conversion_id INTEGER NOT NULL, pos INTEGER NOT NULL, {columns}, "
+            f"PRIMARY KEY (conversion_id, pos)) WITHOUT ROWID;\n" + '\n'.join(indexes))
+
+
+class TagDatabase:
+    """Local SQLite database of converted tags and SCADA signals, indexed for queries.
+
+    Each conversion is stored under its input file: converting the same file
+    again replaces its rows, other inputs (e.g. the files of a batch) are
+    kept side by side. A conversion is only stored once its outputs are
+    written, so a failed or cancelled one leaves the database as it was.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.db = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        self.db.executescript(
+            'CREATE TABLE IF NOT EXISTS conversions (id INTEGER PRIMARY KEY, input_file TEXT UNIQUE, name TEXT, '
+            'output_file TEXT, converted_at TEXT, tags INTEGER, signals INTEGER);\n'
+            + _schema('tags', TAG_FIELDS) + '\n' + _schema('signals', SIGNAL_FIELDS))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def save(self, input_file, output_file, tags, signal_chunks):
+        """Store a conversion of ``input_file``, replacing what was stored for it before.
+
+        ``tags`` is the tag frame (area sheet columns plus Area) in input
+        order, ``signal_chunks`` the expanded SCADA signal frames in sheet
+        order. Everything is written in one transaction, so queries never see
+        a partly stored conversion. Returns the database path and row counts.
+        """
+        input_file = Path(input_file)
+        key = str(input_file.resolve())
+        with self.db:
+            for (conversion_id,) in self.db.execute('SELECT id FROM conversions WHERE input_file = ?',
+                                                    (key,)).fetchall():
+                for table in TABLE_FIELDS:
+                    self.db.execute(f"DELETE FROM {table} WHERE conversion_id = ?", (conversion_id,))
+                self.db.execute('DELETE FROM conversions WHERE id = ?', (conversion_id,))
+            conversion_id = self.db.execute(
+                'INSERT INTO conversions (input_file, name, output_file, converted_at) VALUES (?, ?, ?, ?)',
+                (key, input_file.name, str(Path(output_file).resolve()) if output_file is not None else None,
+                 datetime.now().isoformat(timespec='seconds'))).lastrowid
+            counts = {'tags': self._add('tags', conversion_id, 0, tags), 'signals': 0}
+            for chunk in signal_chunks:
+                counts['signals'] += self._add('signals', conversion_id, counts['signals'], chunk)
+            self.db.execute('UPDATE conversions SET tags = ?, signals = ? WHERE id = ?',
+                            (counts['tags'], counts['signals'], conversion_id))
+        return {'path': str(self.path), **counts}
+
+    def _add(self, table, conversion_id, start, frame):
+        fields = TABLE_FIELDS[table]
+        values = [_db_values(frame[col]) if col in frame else [None] * len(frame) for col in fields]
+        placeholders = ', '.join('?' * (len(fields) + 2))
+        self.db.executemany(f"INSERT INTO {table} VALUES ({placeholders})",
+                            zip([conversion_id] * len(frame), range(start, start + len(frame)), *values))
+        return len(frame)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def _where(table, filters, alarms, input_files):
+    clauses = []
+    params = []
+    for name, values in filters.items():
+        if not values:
+            continue
+        column = FILTER_COLUMNS[table][name]
+        if name == 'path':
+            # Shell-style wildcards; a fixed prefix still uses the index
+            clauses.append('(' + ' OR '.join(f"t.{column} GLOB ?" for _ in values) + ')')
+        else:
+            clauses.append(f"t.{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if alarms is not None:
+        if table != 'signals':
+            raise ValueError("The alarm filter only applies to signals")
+        clauses.append('t.is_alarm = ?')
+        params.append(int(alarms))
+    if input_files:
+        marks = ', '.join('?' * len(input_files))
+        clauses.append(f"(c.name IN ({marks}) OR c.input_file IN ({marks}))")
+        params.extend(input_files)
+        params.extend(str(Path(input_file).resolve()) for input_file in input_files)
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+class TagQuery:
+    """Rows of one stored table matching filters, counted and read back in DataFrame chunks.
+
+    ``filters`` maps 'area', 'db', 'type' (UDT type for tags, signal type
+    name for signals), 'signal_type' and 'path' (tag name or SCADA tag path,
+    with * and ? wildcards) to lists of accepted values. ``alarms`` True/False
+    keeps only alarm/non-alarm signals; ``input_files`` limits the rows to
+    those conversions (file names or paths). Results come in conversion and
+    sheet order with an 'Input File' column.
+    """
+
+    def __init__(self, path, table='signals', filters=None, alarms=None, input_files=None, limit=None):
+        if table not in TABLE_FIELDS:
+            raise ValueError(f"Unknown table '{table}'; expected one of: {', '.join(TABLE_FIELDS)}")
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Tag database not found: {path}")
+        self.db = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        self.table = table
+        self.columns = list(TABLE_FIELDS[table]) + [INPUT_FILE_COLUMN]
+        where, self.params = _where(table, filters or {}, alarms, input_files)
+        self.source = f"FROM {table} t JOIN conversions c ON c.id = t.conversion_id{where}"
+        self.limit = limit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.close()
+
+    def count(self):
+        rows = self.db.execute(f"SELECT COUNT(*) {self.source}", self.params).fetchone()[0]
+        return rows if self.limit is None else min(rows, self.limit)
+
+    def iter_chunks(self, chunk_rows=QUERY_CHUNK_ROWS):
+        """Matching rows as DataFrames of ``chunk_rows`` rows"""
+        selected = ', '.join(f"t.{column}" for column in TABLE_FIELDS[self.table].values())
+        limit = f" LIMIT {int(self.limit)}" if self.limit is not None else ''
+        cursor = self.db.execute(f"SELECT {selected}, c.name {self.source} ORDER BY t.conversion_id, t.pos{limit}",
+                                 self.params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            chunk = pd.DataFrame(rows, columns=self.columns, dtype=object)
+            if 'Is Alarm' in chunk:
+                chunk['Is Alarm'] = chunk['Is Alarm'].map(bool)
+            yield chunk
+
+    def frame(self):
+        """All matching rows as one DataFrame"""
+        chunks = list(self.iter_chunks())
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=self.columns)
+
+
+def list_conversions(path):
+    """The stored conversions: input file, output file, when, and tag and signal counts"""
+    with TagQuery(path) as query:
+        rows = query.db.execute('SELECT name, input_file, output_file, converted_at, tags, signals '
+                                'FROM conversions ORDER BY id').fetchall()
+    return [dict(zip(['name', 'input_file', 'output_file', 'converted_at', 'tags', 'signals'], row)) for row in rows]
+
+
+def export_query(query, path, writer_backend=DEFAULT_WRITER):
+    """Write a query's rows to ``path``: a workbook (.xlsx) or an export format by extension; returns the rows"""
+    path = Path(path)
+    fmt = path.suffix[1:].lower()
+    rows = query.count()
+    if fmt == 'xlsx':
+        if rows > MAX_SHEET_ROWS - 1:
+            raise ValueError(f"{rows:,} rows exceed Excel's {MAX_SHEET_ROWS:,} row limit; export them to CSV instead")
+        if query.table == 'signals':
+            sheet_name, header_color = 'SCADA_SIGNAL', SCADA_HEADER_COLOR
+        else:
+            sheet_name, header_color = 'TAGS', AREA_COLORS[0]
+        with create_writer(writer_backend, path) as writer:
+            writer.write_sheet(sheet_name, query.frame(), header_color)
+        return rows
+    check_export_formats([fmt])
+    export_signal_chunks(query.columns, query.iter_chunks(), rows, path, fmt)
+    return rows
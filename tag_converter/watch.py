@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .batch import convert_in_worker, output_path, start_pool
+from .constants import DEFAULT_INTERVAL, DEFAULT_SETTLE
+from .export import check_export_formats
+from .mapping import load_mapping
+from .reader import FORMAT_EXTENSIONS
+from .writer import DEFAULT_WRITER, check_writer_backend
+
+
+
+def _no_log(message):
+    pass
+
+
+def _signature(path):
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def is_watched_file(path):
+    """Tag list files the watcher picks up: known extensions, no hidden files or Office lock files (~$...)"""
+    return (path.suffix.lower() in FORMAT_EXTENSIONS and not path.name.startswith(('.', '~$'))
+            and not path.name.endswith('.tmp'))
+
+
+class FolderWatcher:
+    """Convert every new or changed tag list dropped into a folder, in a pool of warm worker processes.
+
+    The mapping is loaded once and handed to each worker process when it
+    starts, so conversions skip interpreter start-up, imports and mapping
+    loads; the pool is only restarted when the mapping file's content changes
+    (which also converts every input again). A file is converted once its
+    size and modification time have stayed the same for ``settle`` seconds,
+    so files still being copied in are left alone. At most ``jobs``
+    conversions run at once; further ready files wait in the folder. Each
+    conversion writes its run report next to its output, and a failed one an
+    error report in the same place.
+    """
+
+    def __init__(self, input_dir, output_dir, mapping_file=None, column_config=None, jobs=1,
+                 interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE, log=None, use_cache=True, cache_dir=None,
+                 **convert_options):
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        if self.output_dir.resolve() == self.input_dir.resolve():
+            raise ValueError("The output folder must differ from the watched folder")
+        check_export_formats(convert_options.get('export_formats', ()))
+        check_writer_backend(convert_options.get('writer_backend', DEFAULT_WRITER))
+        self.mapping_file = Path(mapping_file) if mapping_file else None
+        self.jobs = max(1, jobs)
+        self.interval = interval
+        self.settle = settle
+        self.log = log or _no_log
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.convert_options = dict(convert_options, column_config=column_config)
+        self.data_type_mapping = None
+        self._mapping_signature = None
+        self._mapping_digest = None
+        self._pool = None
+        self._pool_stale = False
+        # path -> (signature, monotonic time it was first seen with it)
+        self._candidates = {}
+        # path -> signature of the version last converted (or found already converted)
+        self._done = {}
+        # future -> (path, signature, output file)
+        self._running = {}
+        # Stems shared by more than one watched file, as of the last scan
+        self._shared_stems = set()
+        self.converted = 0
+        self.failed = 0
+
+    def _load_mapping(self):
+        """(Re)load the mapping when its file changed; returns True when its content did"""
+        if self.mapping_file is None:
+            if self.data_type_mapping is None:
+                self.data_type_mapping = {}
+                return True
+            return False
+        signature = _signature(self.mapping_file)
+        if signature == self._mapping_signature:
+            return False
+        self._mapping_signature = signature
+        digest = hashlib.sha256(self.mapping_file.read_bytes()).hexdigest()
+        if digest == self._mapping_digest:
+            return False
+        try:
+            data_type_mapping = load_mapping(self.mapping_file, self.log, self.use_cache, self.cache_dir)
+        except Exception as e:
+            if self.data_type_mapping is None:
+                raise
+            self.log(f"❌ Could not reload {self.mapping_file.name}, keeping the previous mapping: {e}")
+            return False
+        self.data_type_mapping = data_type_mapping
+        self._mapping_digest = digest
+        return True
+
+    def _check_mapping(self):
+        if not self._load_mapping() or self._pool is None:
+            return
+        self.log(f"🔄 {self.mapping_file.name} changed; converting all inputs again with the new mapping")
+        self._pool_stale = True
+        # Forget what was converted, but keep the inputs known so existing outputs do not count as up to date
+        self._done = dict.fromkeys(self._done)
+
+    def _ensure_pool(self):
+        """The worker pool for the current mapping, or None while a stale pool still has conversions running"""
+        if self._pool is not None and self._pool_stale:
+            if self._running:
+                return None
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_stale = False
+        if self._pool is None:
+            self._pool = start_pool(self.jobs, self.data_type_mapping)
+        return self._pool
+
+    def _drop_pool(self):
+        """Forget a pool whose worker died (e.g. killed when out of memory); the next submit starts a new one"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pool_stale = False
+
+    def _output_file(self, path):
+        return output_path(path, self.output_dir, path.stem.lower() in self._shared_stems)
+
+    def _already_converted(self, path, signature):
+        """Inputs whose workbook is newer than themselves are not converted again after a restart"""
+        output_file = self._output_file(path)
+        try:
+            return output_file.stat().st_mtime_ns >= signature[1]
+        except OSError:
+            return False
+
+    def scan(self):
+        """Settled input files that need converting, oldest first"""
+        now = time.monotonic()
+        seen = set()
+        ready = []
+        paths = [Path(entry.path) for entry in os.scandir(self.input_dir)
+                 if entry.is_file() and is_watched_file(Path(entry.path))]
+        stems = Counter(path.stem.lower() for path in paths)
+        self._shared_stems = {stem for stem, count in stems.items() if count > 1}
+        for path in paths:
+            try:
+                signature = _signature(path)
+            except OSError:
+                continue
+            seen.add(path)
+            if self._done.get(path) == signature or any(info[0] == path for info in self._running.values()):
+                continue
+            if path not in self._done and self._already_converted(path, signature):
+                self._done[path] = signature
+                continue
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate[0] != signature:
+                self._candidates[path] = (signature, now)
+            elif now - candidate[1] >= self.settle:
+                ready.append((signature[1], path))
+        for path in list(self._candidates):
+            if path not in seen:
+                del self._candidates[path]
+        return [path for _, path in sorted(ready)]
+
+    def _submit(self, path):
+        pool = self._ensure_pool()
+        if pool is None:
+            return False
+        output_file = self._output_file(path)
+        try:
+            future = pool.submit(convert_in_worker, path, output_file, self.convert_options)
+        except BrokenProcessPool:
+            self.log("⚠️ A worker process died; restarting the worker pool")
+            self._drop_pool()
+            return False
+        self.log(f"📥 Converting {path.name}...")
+        self._running[future] = (path, self._candidates.pop(path)[0], output_file)
+        return True
+
+    def _finish(self, future):
+        path, signature, output_file = self._running.pop(future)
+        self._done[path] = signature
+        try:
+            stats, seconds = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # The pool cannot run anything else; conversions still in it fail the same way
+                self._drop_pool()
+            self.failed += 1
+            report_file = output_file.with_suffix('.report.json')
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump({'input_file': str(path), 'output_file': str(output_file), 'error': str(e),
+                           'error_type': type(e).__name__}, f, indent=2)
+            self.log(f"❌ {path.name} failed: {e} (see {report_file.name})")
+            return
+        self.converted += 1
+        self.log(f"✅ {path.name} → {output_file.name}: {stats['input_rows']:,} tags, "
+                 f"{stats['scada_signals']:,} signals in {seconds:.1f}s")
+
+    def poll(self, timeout=0):
+        """One watcher step: collect finished conversions, rescan and start ready files"""
+        if self._running:
+            done, _ = wait(list(self._running), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._finish(future)
+        self._check_mapping()
+        for path in self.scan():
+            if len(self._running) >= self.jobs or not self._submit(path):
+                break
+
+    @property
+    def idle(self):
+        return not self._running and not self._candidates
+
+    def run(self, once=False, stop_event=None):
+        """Watch until ``stop_event`` is set (or Ctrl+C); with ``once`` stop when everything present is converted"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._check_mapping()
+        self.log(f"👀 Watching {self.input_dir} → {self.output_dir} with {self.jobs} worker process(es)")
+        try:
+            while stop_event is None or not stop_event.is_set():
+                self.poll(timeout=self.interval if self._running else 0)
+                if once and self.idle:
+                    break
+                if not self._running:
+                    time.sleep(self.interval)
+        finally:
+            self.close()
+            self.log(f"⏹ Stopped watching: {self.converted} converted, {self.failed} failed")
+
+    def close(self):
+        """Let running conversions finish and stop the worker processes"""
+        if self._pool is None:
+            return
+        self._pool.shutdown(cancel_futures=True)
+        for future in list(self._running):
+            if future.cancelled():
+                del self._running[future]
+            else:
+                self._finish(future)
+        self._pool = None
@@ -0,0 +1,506 @@
+import importlib
+import io
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.xml.functions import xmlfile
+
+try:
+    from openpyxl.worksheet._writer import WorksheetWriter
+except ImportError:  # rows are then written serially
+    WorksheetWriter = None
+
+from .constants import DEFAULT_WRITER
+from .formatting import FormatPlan, body_named_style, format_worksheet, header_named_style, plan_bands, plan_formatting
+from .instrumentation import RunReport
+from .openpyxl_support import tested_openpyxl
+from .progress import NO_PROGRESS, PROGRESS_INTERVAL
+
+# Excel's row limit per sheet, header row included
+MAX_SHEET_ROWS = 1048576
+# Rows serialized per worker task when sheets are written in parallel
+BLOCK_ROWS = 5000
+SHEET_DATA_OPEN = b'<sheetData>'
+SHEET_DATA_CLOSE = b'</sheetData>'
+
+
+def cell_values(df):
+    """Object copy of a DataFrame with missing values as None (written as empty cells)"""
+    values = df.astype(object)
+    return values.where(df.notna(), None)
+
+
+def iter_row_values(df, block_rows=BLOCK_ROWS):
+    """Row value tuples of a DataFrame, converted with cell_values one block at a time.
+
+    Dictionary-encoded (categorical) columns are only expanded into cell
+    values block by block, never for the whole sheet at once.
+    """
+    for start in range(0, len(df), block_rows):
+        yield from cell_values(df.iloc[start:start + block_rows]).itertuples(index=False, name=None)
+
+
+def parallel_rows_supported():
+    """Whether sheet rows can be serialized in worker processes, which relies on openpyxl internals"""
+    return (tested_openpyxl() and WorksheetWriter is not None and hasattr(WorksheetWriter, 'write_row')
+            and hasattr(Workbook(write_only=True), '_cell_styles'))
+
+
+if WorksheetWriter is not None:
+    class _RowWriter(WorksheetWriter):
+        """WorksheetWriter's row serialization, without the worksheet stream it opens"""
+
+        def __init__(self, ws):
+            self.ws = ws
+            self.ws._comments = []
+
+
+def write_row_block(rows, band_index, band_styles, cell_styles, first_row, path):
+    """Serialize sheet rows starting at sheet row ``first_row`` to a '<sheetData>' XML fragment at ``path``.
+
+    Runs in a worker process. ``cell_styles`` is the main workbook's style
+    list, so the style ids written here are the ones the main workbook saves.
+    Returns the number of rows written.
+    """
+    wb = Workbook(write_only=True)
+    wb._cell_styles = IndexedList(cell_styles)
+    ws = wb.create_sheet()
+    writer = _RowWriter(ws)
+    with xmlfile(path) as xf:
+        with xf.element('sheetData'):
+            for row_idx, (values, band) in enumerate(zip(rows, band_index), start=first_row):
+                row = []
+                for col_idx, value in enumerate(values, start=1):
+                    cell = WriteOnlyCell(ws, value)
+                    cell._style = band_styles[band]
+                    cell.row, cell.column = row_idx, col_idx
+                    row.append(cell)
+                writer.write_row(xf, row, row_idx)
+    return len(rows)
+
+
+def _file_mode():
+    """Permissions a new file gets under the process umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def publish_file(tmp_path, path):
+    """Move a finished temporary file into place with the permissions a plain open() would have given it"""
+    # mkstemp creates files only their owner can read
+    os.chmod(tmp_path, _file_mode())
+    os.replace(tmp_path, path)
+
+
+class WorkbookWriter(ABC):
+    """Common part of the workbook writer backends: progress, timing and the atomic save.
+
+    A backend writes each DataFrame passed to write_sheet() as one sheet and
+    implements _save(path) and abort(). The output file is only replaced once
+    the whole workbook has been saved, so a failed or cancelled run leaves no
+    partial file behind. Written rows are reported to ``progress`` as the
+    'write' stage, out of ``total_rows``, and timed on ``report`` as the
+    'format', 'write' and 'save' stages.
+    """
+
+    def __init__(self, output_file, width_sample=None, progress=NO_PROGRESS, report=None, executor=None):
+        self.output_file = output_file
+        self.width_sample = width_sample
+        self.progress = progress
+        self.report = report or RunReport()
+        self.executor = executor
+        self.total_rows = None
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _count_row(self):
+        self.rows_written += 1
+        if self.rows_written % PROGRESS_INTERVAL == 0:
+            self.progress.update('write', self.rows_written, self.total_rows)
+
+    @abstractmethod
+    def write_sheet(self, sheet_name, df, header_color, area_rows=None):
+        """Write ``df`` as one sheet named ``sheet_name``"""
+
+    def write_sheet_chunks(self, sheet_name, columns, chunks, row_count, widths, header_color, area_rows=None):
+        """Write one sheet from DataFrame ``chunks`` of ``row_count`` rows in all, with precomputed column ``widths``.
+
+        Backends that stream rows never hold more than a chunk; this default
+        assembles the whole frame and writes it with write_sheet().
+        """
+        return self.write_sheet(sheet_name, pd.concat(list(chunks)), header_color, area_rows)
+
+    @abstractmethod
+    def _save(self, path):
+        """Save the workbook to ``path``"""
+
+    def abort(self):
+        """Discard the workbook and any temporary files"""
+
+    def close(self):
+        """Save to a temporary file next to the output, then move it into place"""
+        output_file = Path(self.output_file)
+        self.progress.update('save', 0, force=True)
+        fd, tmp_path = tempfile.mkstemp(dir=output_file.parent, prefix=f".{output_file.stem}.", suffix='.tmp')
+        os.close(fd)
+        try:
+            with self.report.stage('save', self.rows_written):
+                self._save(tmp_path)
+            publish_file(tmp_path, output_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class StyledWorkbookWriter(WorkbookWriter):
+    """Write formatted sheets straight from DataFrames in a single pass (the 'streaming' backend).
+
+    Uses openpyxl's write-only workbook: rows are styled as they are streamed
+    out with shared named styles, and column widths are computed from the
+    DataFrame up front, so the workbook is never reloaded or restyled and
+    memory stays flat however many rows are written.
+
+    With an ``executor`` (a ProcessPoolExecutor) the body rows of each sheet
+    are serialized in blocks of ``BLOCK_ROWS`` by worker processes while the
+    next sheet is planned; close() splices the fragments into the sheets in
+    order, so the saved workbook is the same as a serial write. That relies
+    on openpyxl internals, so on an untested openpyxl release (see
+    parallel_rows_supported) rows are written serially instead.
+    """
+
+    def __init__(self, output_file, width_sample=None, progress=NO_PROGRESS, report=None, executor=None):
+        if executor is not None and not parallel_rows_supported():
+            executor = None
+        super().__init__(output_file, width_sample, progress, report, executor)
+        self.wb = Workbook(write_only=True)
+        self._styles = {}
+        self._fragment_dir = None
+        self._pending = []
+
+    def _style_array(self, ws, kind, color):
+        """Style of the shared named style for (kind, color), registered on first use"""
+        name = f"Tag {kind} {color}"
+        if name not in self._styles:
+            builder = header_named_style if kind == 'Header' else body_named_style
+            self.wb.add_named_style(builder(name, color))
+            prototype = WriteOnlyCell(ws)
+            prototype.style = name
+            self._styles[name] = prototype._style
+        return self._styles[name]
+
+    def _row(self, ws, values, style_array):
+        row = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value)
+            # Cells never restyle, so they can share the resolved style array of their named style
+            cell._style = style_array
+            row.append(cell)
+        return row
+
+    def _start_sheet(self, sheet_name, columns, row_count, plan, header_color):
+        """Create a sheet with its widths, frozen header and filter, write the header; returns (ws, band styles)"""
+        ws = self.wb.create_sheet(sheet_name)
+        for col_idx, width in enumerate(plan.widths, start=1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+        ws.freeze_panes = 'A2'
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(columns))}{row_count + 1}"
+
+        ws.append(self._row(ws, columns, self._style_array(ws, 'Header', header_color)))
+        used_bands = set(np.unique(plan.band_index).tolist())
+        band_styles = [self._style_array(ws, 'Body', color) if band in used_bands else None
+                       for band, color in enumerate(plan.band_colors)]
+        return ws, band_styles
+
+    def _append_rows(self, ws, rows, band_index, band_styles):
+        for row_values, band in zip(rows, band_index.tolist()):
+            ws.append(self._row(ws, row_values, band_styles[band]))
+            self._count_row()
+        self.progress.update('write', self.rows_written, self.total_rows, force=True)
+
+    def write_sheet(self, sheet_name, df, header_color, area_rows=None):
+        """Write one sheet; rows are banded by ``area_rows`` when given, else alternate-row filled"""
+        with self.report.stage('format', len(df)):
+            plan = plan_formatting(df, area_rows, self.width_sample)
+        with self.report.stage('write', len(df)):
+            ws, band_styles = self._start_sheet(sheet_name, df.columns, len(df), plan, header_color)
+            if self.executor is not None:
+                self._submit_rows(ws, df, plan.band_index, band_styles)
+                return ws
+            self._append_rows(ws, iter_row_values(df), plan.band_index, band_styles)
+        return ws
+
+    def write_sheet_chunks(self, sheet_name, columns, chunks, row_count, widths, header_color, area_rows=None):
+        """write_sheet() streaming the rows from DataFrame chunks; only one chunk is in memory at a time"""
+        plan = FormatPlan(widths, *plan_bands(row_count, area_rows))
+        with self.report.stage('write', row_count):
+            ws, band_styles = self._start_sheet(sheet_name, columns, row_count, plan, header_color)
+            rows = (row_values for chunk in chunks for row_values in iter_row_values(chunk))
+            self._append_rows(ws, rows, plan.band_index, band_styles)
+        return ws
+
+    def _submit_rows(self, ws, df, band_index, band_styles):
+        """Hand a sheet's body rows to the executor and finish the sheet's header-only XML"""
+        # Register the body styles in the order a serial write first uses them, so style ids match
+        _, first_use = np.unique(band_index, return_index=True)
+        for band in band_index[np.sort(first_use)].tolist():
+            self.wb._cell_styles.add(band_styles[band])
+        cell_styles = list(self.wb._cell_styles)
+        ws.close()
+
+        if self._fragment_dir is None:
+            self._fragment_dir = tempfile.mkdtemp(prefix='tag_converter.')
+        futures = []
+        for start in range(0, len(df), BLOCK_ROWS):
+            path = os.path.join(self._fragment_dir, f"{len(self._pending)}_{start}.xml")
+            rows = list(cell_values(df.iloc[start:start + BLOCK_ROWS]).itertuples(index=False, name=None))
+            futures.append((path, self.executor.submit(
+                write_row_block, rows, band_index[start:start + BLOCK_ROWS].tolist(), band_styles,
+                cell_styles, start + 2, path,
+            )))
+        self._pending.append((ws, futures))
+
+    def _splice_rows(self):
+        """Wait for the row fragments and insert them into their sheets' XML, in row order"""
+        for ws, futures in self._pending:
+            sheet_xml = Path(ws._writer.out).read_bytes()
+            split = sheet_xml.rindex(SHEET_DATA_CLOSE)
+            with open(ws._writer.out, 'wb') as out:
+                out.write(sheet_xml[:split])
+                for path, future in futures:
+                    self.rows_written += future.result()
+                    self.progress.update('write', self.rows_written, self.total_rows)
+                    with open(path, 'rb') as fragment:
+                        fragment.seek(len(SHEET_DATA_OPEN))
+                        block = fragment.read()
+                    out.write(block[:-len(SHEET_DATA_CLOSE)])
+                    os.unlink(path)
+                out.write(sheet_xml[split:])
+        self._pending = []
+        self.progress.update('write', self.rows_written, self.total_rows, force=True)
+
+    def _discard_fragments(self):
+        futures = [future for _, sheet_futures in self._pending for _, future in sheet_futures]
+        for future in futures:
+            future.cancel()
+        # Running blocks still write into the fragment directory
+        wait(futures)
+        self._pending = []
+        if self._fragment_dir is not None:
+            shutil.rmtree(self._fragment_dir, ignore_errors=True)
+            self._fragment_dir = None
+
+    def abort(self):
+        """Discard the workbook, closing and removing the sheets' temporary row files"""
+        self._discard_fragments()
+        for ws in self.wb.worksheets:
+            try:
+                if not ws.closed:
+                    ws.close()
+                ws._writer.cleanup()
+            except Exception:
+                pass
+
+    def close(self):
+        if self._pending:
+            try:
+                with self.report.stage('write'):
+                    self._splice_rows()
+            except BaseException:
+                self.abort()
+                raise
+            finally:
+                self._discard_fragments()
+        super().close()
+
+    def _save(self, path):
+        self.wb.save(path)
+
+
+class RawWorkbookWriter(StyledWorkbookWriter):
+    """Values only: no styles, fills or column widths (the 'raw' backend), for the fastest possible write"""
+
+    def write_sheet(self, sheet_name, df, header_color, area_rows=None):
+        return self.write_sheet_chunks(sheet_name, df.columns, [df], len(df), None, header_color, area_rows)
+
+    def write_sheet_chunks(self, sheet_name, columns, chunks, row_count, widths, header_color, area_rows=None):
+        ws = self.wb.create_sheet(sheet_name)
+        ws.freeze_panes = 'A2'
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(columns))}{row_count + 1}"
+        with self.report.stage('write', row_count):
+            ws.append(list(columns))
+            for chunk in chunks:
+                for row_values in iter_row_values(chunk):
+                    ws.append(row_values)
+                    self._count_row()
+            self.progress.update('write', self.rows_written, self.total_rows, force=True)
+        return ws
+
+
+class OpenpyxlWorkbookWriter(WorkbookWriter):
+    """The original output path (the 'openpyxl' backend): pandas' to_excel, then a restyle of every cell.
+
+    Every cell of every sheet stays an openpyxl object in memory until the
+    workbook is saved; kept for comparison and as a fallback.
+    """
+
+    def __init__(self, output_file, width_sample=None, progress=NO_PROGRESS, report=None, executor=None):
+        super().__init__(output_file, width_sample, progress, report, executor)
+        # The book is saved by _save(); the buffer pandas would write to on close is never used
+        self.excel = pd.ExcelWriter(io.BytesIO(), engine='openpyxl')
+
+    def write_sheet(self, sheet_name, df, header_color, area_rows=None):
+        with self.report.stage('format', len(df)):
+            plan = plan_formatting(df, area_rows, self.width_sample)
+        with self.report.stage('write', len(df)):
+            df.to_excel(self.excel, sheet_name=sheet_name, index=False)
+            ws = self.excel.sheets[sheet_name]
+            format_worksheet(ws, area_color=header_color, plan=plan)
+            self.rows_written += len(df)
+            self.progress.update('write', self.rows_written, self.total_rows, force=True)
+        return ws
+
+    def _save(self, path):
+        self.excel.book.save(path)
+
+
+def _xlsxwriter_color(color):
+    return f"#{color[-6:]}"
+
+
+class XlsxWriterWorkbookWriter(WorkbookWriter):
+    """Styled rows streamed with xlsxwriter in constant_memory mode (the 'xlsxwriter' backend).
+
+    Each row is flushed to a temporary file as soon as it is written, so
+    memory stays flat like the 'streaming' backend but with xlsxwriter's
+    faster serializer. Needs the optional xlsxwriter package.
+    """
+
+    def __init__(self, output_file, width_sample=None, progress=NO_PROGRESS, report=None, executor=None):
+        super().__init__(output_file, width_sample, progress, report, executor)
+        import xlsxwriter
+
+        # The file name is only set in _save(), once the temporary output file exists
+        self.wb = xlsxwriter.Workbook(None, {'constant_memory': True, 'strings_to_urls': False})
+        self._formats = {}
+
+    def _format(self, kind, color):
+        key = (kind, color)
+        if key not in self._formats:
+            properties = {
+                'font_name': 'Calibri',
+                'bg_color': _xlsxwriter_color(color),
+                'pattern': 1,
+                'border': 1,
+                'border_color': '#D0D0D0',
+                'valign': 'vcenter',
+            }
+            if kind == 'Header':
+                properties.update({'font_size': 11, 'bold': True, 'font_color': '#FFFFFF', 'align': 'center'})
+            else:
+                properties['font_size'] = 10
+            self._formats[key] = self.wb.add_format(properties)
+        return self._formats[key]
+
+    def write_sheet(self, sheet_name, df, header_color, area_rows=None):
+        with self.report.stage('format', len(df)):
+            plan = plan_formatting(df, area_rows, self.width_sample)
+        return self._write_rows(sheet_name, df.columns, iter_row_values(df), len(df), plan, header_color)
+
+    def write_sheet_chunks(self, sheet_name, columns, chunks, row_count, widths, header_color, area_rows=None):
+        rows = (row_values for chunk in chunks for row_values in iter_row_values(chunk))
+        plan = FormatPlan(widths, *plan_bands(row_count, area_rows))
+        return self._write_rows(sheet_name, columns, rows, row_count, plan, header_color)
+
+    def _write_rows(self, sheet_name, columns, rows, row_count, plan, header_color):
+        ws = self.wb.add_worksheet(sheet_name)
+        for col_idx, width in enumerate(plan.widths):
+            ws.set_column(col_idx, col_idx, width)
+        ws.freeze_panes(1, 0)
+        ws.autofilter(0, 0, row_count, len(columns) - 1)
+
+        with self.report.stage('write', row_count):
+            ws.write_row(0, 0, [str(column) for column in columns], self._format('Header', header_color))
+            band_formats = [self._format('Body', color) for color in plan.band_colors]
+            for row_idx, (row_values, band) in enumerate(zip(rows, plan.band_index.tolist()), start=1):
+                ws.write_row(row_idx, 0, row_values, band_formats[band])
+                self._count_row()
+            self.progress.update('write', self.rows_written, self.total_rows, force=True)
+        return ws
+
+    def _save(self, path):
+        self.wb.filename = path
+        self.wb.close()
+
+    def abort(self):
+        # Keeps xlsxwriter from complaining about a workbook that was never closed
+        self.wb.fileclosed = True
+        for ws in self.wb.worksheets():
+            try:
+                if ws.row_data_fh is not None:
+                    ws.row_data_fh.close()
+                    os.unlink(ws.row_data_filename)
+            except Exception:
+                pass
+
+
+# Writer backend name -> (class, optional module it needs)
+WRITER_BACKENDS = {
+    'streaming': (StyledWorkbookWriter, None),
+    'openpyxl': (OpenpyxlWorkbookWriter, None),
+    'xlsxwriter': (XlsxWriterWorkbookWriter, 'xlsxwriter'),
+    'raw': (RawWorkbookWriter, None),
+}
+
+
+def available_writers():
+    """Backend names whose optional dependencies are installed"""
+    return [name for name in WRITER_BACKENDS if _missing_module(name) is None]
+
+
+def _missing_module(backend):
+    module = WRITER_BACKENDS[backend][1]
+    if module is None:
+        return None
+    try:
+        importlib.import_module(module)
+    except ImportError:
+        return module
+    return None
+
+
+def check_writer_backend(backend):
+    """Fail before any work is done on an unknown backend or a missing optional dependency"""
+    if backend not in WRITER_BACKENDS:
+        raise ValueError(f"Unknown writer backend '{backend}' (expected one of: {', '.join(WRITER_BACKENDS)})")
+    module = _missing_module(backend)
+    if module is not None:
+        raise ValueError(f"The '{backend}' writer needs {module} (pip install {module})")
+
+
+def create_writer(backend, output_file, width_sample=None, progress=NO_PROGRESS, report=None, executor=None):
+    """Workbook writer for a backend name; only 'streaming' uses the ``executor``"""
+    check_writer_backend(backend)
+    writer_class = WRITER_BACKENDS[backend][0]
+    return writer_class(output_file, width_sample, progress, report, executor if backend == 'streaming' else None)
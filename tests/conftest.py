@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+from tag_converter.mapping import load_mapping
+
+DATA_DIR = Path(__file__).parent / 'data'
+# Synthetic tag list and mapping (tag and mapping side arrays, data type arrays, unmapped UDTs, COMM/CALCULATED
+# keywords, a Diagnostics area); the expected workbook was written by the original single-file GUI converter
+FIXTURE_TAGS = DATA_DIR / 'fixture_tags.xlsx'
+FIXTURE_MAPPING = DATA_DIR / 'fixture_mapping.xlsx'
+FIXTURE_EXPECTED = DATA_DIR / 'fixture_expected.xlsx'
+
+
+@pytest.fixture(scope='session')
+def fixture_mapping():
+    return load_mapping(FIXTURE_MAPPING, use_cache=False)
+
+
+def sheet_values(path):
+    """Sheet name -> list of row value tuples of a workbook"""
+    wb = load_workbook(path, read_only=True)
+    try:
+        return {ws.title: list(ws.iter_rows(values_only=True)) for ws in wb.worksheets}
+    finally:
+        wb.close()
+
+
+def sheet_styles(path):
+    """Sheet name -> fill, font, border and alignment of each cell, plus column widths, frozen panes and filter"""
+    wb = load_workbook(path)
+    styles = {}
+    for ws in wb.worksheets:
+        cells = [tuple((cell.fill.fgColor.rgb if cell.fill.fill_type else None, cell.font.b, cell.font.sz,
+                        cell.font.color.rgb if cell.font.color else None, cell.border.left.style,
+                        cell.alignment.horizontal, cell.alignment.vertical) for cell in row)
+                 for row in ws.iter_rows()]
+        widths = {key: dim.width for key, dim in ws.column_dimensions.items()}
+        styles[ws.title] = (cells, widths, ws.freeze_panes, ws.auto_filter.ref)
+    return styles
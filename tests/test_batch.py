@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+from conftest import sheet_values
+
+from tag_converter.batch import merge_signal_lists, read_signal_list, write_signal_list
+from tag_converter.engine import SCADA_SHEET_COLUMNS
+from tag_converter.export import check_export_formats
+
+
+def _signals(areas, name):
+    return pd.DataFrame([[area, 'DB1', f"{name}.{idx}", 'REAL', None, None, name] for idx, area in enumerate(areas)],
+                        columns=SCADA_SHEET_COLUMNS)
+
+
+def test_merge_sorts_mixed_area_types_and_keeps_input_order(tmp_path):
+    lists = {'a': _signals([7, 7, 'Engine', None], 'a'), 'b': _signals([10, 'Deck', 'Engine'], 'b')}
+    paths = []
+    for name, frame in lists.items():
+        paths.append(tmp_path / f"{name}.signals.pickle")
+        write_signal_list(paths[-1], SCADA_SHEET_COLUMNS, [frame.iloc[:2], frame.iloc[2:]])
+    assert read_signal_list(paths[0]).equals(lists['a'])
+    sheets = merge_signal_lists(paths, tmp_path / 'merged.xlsx')
+    rows = sheet_values(tmp_path / 'merged.xlsx')['SCADA_SIGNAL'][1:]
+    assert sheets == {'SCADA_SIGNAL': 7}
+    assert [(row[0], row[2]) for row in rows] == [(10, 'b.0'), (7, 'a.0'), (7, 'a.1'), ('Deck', 'b.1'),
+                                                  ('Engine', 'a.2'), ('Engine', 'b.2'), (None, 'a.3')]
+
+
+def test_signal_lists_are_not_an_export_format():
+    with pytest.raises(ValueError, match="Unknown export format 'pickle'"):
+        check_export_formats(['pickle'])
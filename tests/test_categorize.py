@@ -0,0 +1,67 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+from tag_converter.categorize import CATEGORY_RULES, categorize, compile_rules
+
+COMM_KEYWORDS = ['deif', 'automaskin', 'mtu', 'consilium', 'nmea', 'modbus', 'gps']
+
+
+def original_category(udt_type, description='', data_block='', area=''):
+    """The scalar category function of the original GUI converter, which CATEGORY_RULES replaces"""
+    udt_lower = str(udt_type).lower().strip()
+    desc_lower = str(description).lower().strip()
+    data_block_lower = str(data_block).lower().strip()
+    area_lower = str(area).lower().strip()
+    if 'comm' in data_block_lower:
+        return 'COMM'
+    if any(keyword in data_block_lower for keyword in COMM_KEYWORDS):
+        return 'COMM'
+    if any(keyword in desc_lower for keyword in COMM_KEYWORDS):
+        return 'COMM'
+    if any(keyword in udt_lower for keyword in COMM_KEYWORDS):
+        return 'COMM'
+    if 'position failure' in desc_lower or 'setpoint' in desc_lower or '_sp' in desc_lower or area_lower == 'diagnostics':
+        return 'CALCULATED'
+    if udt_lower in ['tank', 'anl', 'anl_tank', 'analog', 'comm_analog', 'deif_analog'] or 'anl' in udt_lower \
+            or 'analog' in udt_lower:
+        return 'ANALOG'
+    if any(keyword in udt_lower for keyword in ['dig_alr', 'dig_alr_wo_inh', 'pump', 'bilge', 'valve', 'int', 'bool']):
+        return 'DIGITAL'
+    return ''
+
+
+UDT_TYPES = ['ANL', ' Tank ', 'COMM_ANALOG', 'DEIF_ANALOG', 'DIG_ALR_WO_INH', 'Pump', 'UINT', 'MOTOR_X', 'ModbusDev', None]
+DESCRIPTIONS = ['Temperature', 'DEIF generator', 'Position Failure', 'Level_SP', 'Setpoint', None]
+DATA_BLOCKS = ['DB1', 'DB_Comm3', 'GPS_DB', float('nan')]
+AREAS = ['Engine', ' DIAGNOSTICS ', 'Diagnostics 2', None]
+
+
+def test_rules_match_original_category_function():
+    cases = list(itertools.product(UDT_TYPES, DESCRIPTIONS, DATA_BLOCKS, AREAS))
+    udt_type, description, data_block, area = (pd.Series(values, dtype=object) for values in zip(*cases))
+    expected = [original_category(*case) for case in cases]
+    assert categorize(udt_type, description, data_block, area).tolist() == expected
+
+
+@pytest.mark.parametrize('udt_type, description, data_block, area, category', [
+    # COMM in the data block wins over everything else
+    ('ANL', 'Setpoint', 'DB_COMM1', 'Diagnostics', 'COMM'),
+    ('PUMP', 'Pump running', 'DB1', 'Diagnostics', 'CALCULATED'),
+    ('TANK', 'Level', 'DB1', 'Engine', 'ANALOG'),
+    ('VALVE', 'Open', 'DB1', 'Engine', 'DIGITAL'),
+    ('SPARE', 'Open', 'DB1', 'Engine', ''),
+])
+def test_rule_precedence(udt_type, description, data_block, area, category):
+    result = categorize(pd.Series([udt_type]), pd.Series([description]), pd.Series([data_block]), pd.Series([area]))
+    assert result.tolist() == [category]
+
+
+def test_every_rule_names_a_known_field():
+    assert {rule['field'] for rule in CATEGORY_RULES} <= {'udt_type', 'description', 'data_block', 'area'}
+
+
+def test_unknown_match_type_is_rejected():
+    with pytest.raises(ValueError, match='Unknown match type'):
+        compile_rules([{'category': 'X', 'field': 'area', 'match': 'startswith', 'keywords': ['a']}])
@@ -0,0 +1,111 @@
+import io
+import re
+
+import pandas as pd
+import pytest
+
+from tag_converter.columns import ColumnConfig
+from tag_converter.engine import build_scada_frame
+from tag_converter.expansion import SignalAttributeTable, SignalOrderKeys, compile_template, expand_signals, split_path_key
+from tag_converter.mapping import parse_mapping
+
+MAPPING_CSV = b"""UDT Type,Signal Type,Data Type
+ANL,Value,Real
+ANL,HiAlarm,BOOL
+ANL,Status,
+VALVE,Open,ARRAY[0..1] of BOOL
+ARRAY[1..2] OF PUMP,Running,BOOL
+ARRAY[1..2] OF PUMP,Speed,
+"""
+
+
+@pytest.fixture
+def mapping():
+    return parse_mapping(io.BytesIO(MAPPING_CSV), 'csv')
+
+
+def test_template_of_plain_udt(mapping):
+    template = compile_template('ANL', mapping)
+    assert template['suffix'] == ['.Value', '.HiAlarm', '']
+    assert template['type'] == ['Value', 'HiAlarm', 'Status']
+    # A signal without a mapped data type is the tag itself, typed by its signal type
+    assert template['data_type'] == ['Real', 'BOOL', 'Status']
+    assert template['label'] == ['VALUE', 'HI ALARM', None]
+    assert template['alarm'] == [False, True, False]
+    assert template['tag_alarm'] == [False, False, True]
+
+
+def test_template_of_data_type_array(mapping):
+    template = compile_template('VALVE', mapping)
+    assert template['suffix'] == ['.Open[0]', '.Open[1]']
+    assert template['data_type'] == ['BOOL', 'BOOL']
+
+
+def test_template_of_mapping_side_array(mapping):
+    template = compile_template('PUMP', mapping)
+    # Signal by signal, each over the mapping's index range
+    assert template['suffix'] == ['[1].Running', '[2].Running', '[1]', '[2]']
+    assert template['data_type'] == ['BOOL', 'BOOL', 'Speed', 'Speed']
+    assert template['tag_alarm'] == [False, False, True, True]
+
+
+def test_template_of_tag_side_array(mapping):
+    template = compile_template('ARRAY[3..4] OF ANL', mapping)
+    # Index by index, each with every signal; element data types are uppercased and never labelled or alarms
+    assert template['suffix'] == ['[3]'] * 3 + ['[4]'] * 3
+    assert template['data_type'] == ['REAL', 'BOOL', 'STATUS'] * 2
+    assert template['label'] == [None] * 6
+    assert template['alarm'] == [False] * 6
+
+
+def test_template_of_unmapped_udt(mapping):
+    assert compile_template('MOTOR_X', mapping) is None
+    assert compile_template('ARRAY[0..1] OF MOTOR_X', mapping) is None
+
+
+def test_attribute_table_counts_template_lookups(mapping):
+    table = SignalAttributeTable(mapping)
+    compile_template('ANL', mapping, table)
+    assert table.hits == 3
+    assert table.misses == 0
+
+
+def test_split_path_key():
+    assert split_path_key('DB1.T[2].Open[10]') == ('DB1.T.Open', (2, 10))
+    assert split_path_key('DB1.T.Value') == ('DB1.T.Value', ())
+
+
+def test_order_keys_rank_index_tuples_numerically():
+    keys = SignalOrderKeys()
+    tuples = [(10,), (2,), (), (1, 0), (1,), (0, 5)]
+    ids = [keys.index_id(indices) for indices in tuples]
+    # Paths without indices share the (0,) key
+    assert ids[2] == keys.index_id((0,))
+    ranks = keys.index_ranks()
+    ordered = sorted(tuples, key=lambda indices: ranks[keys.index_id(indices)])
+    assert ordered == [(), (0, 5), (1,), (1, 0), (2,), (10,)]
+
+
+def test_scada_frame_order_matches_sorting_the_paths(mapping):
+    tags = pd.DataFrame({
+        'Tag Name': ['T[10]', 'T[2]', 'B', 'A', 'P'],
+        'Data Block': ['DB1'] * 5,
+        'Description': ['d'] * 5,
+        'UDT Type': ['ANL', 'ANL', 'VALVE', 'ARRAY[0..11] OF ANL', 'PUMP'],
+        'Area': ['Z', 'Z', 'Y', 'Z', 'Y'],
+        'Comments': [None] * 5,
+        'Origin': [None] * 5,
+    })
+    order_keys = SignalOrderKeys()
+    signals = expand_signals(tags, ColumnConfig(), mapping, pd.Series([''] * 5), order_keys=order_keys)
+    paths = signals['Scada Tag Path'].tolist()
+    areas = signals['Area'].tolist()
+    frame = build_scada_frame(signals, ['Y', 'Z'], order_keys)
+
+    def original_key(pair):
+        area, path = pair
+        indices = tuple(int(idx) for idx in re.findall(r'\[(\d+)\]', path)) or (0,)
+        return ['Y', 'Z'].index(area), re.sub(r'\[\d+\]', '', path), indices
+
+    expected = sorted(zip(areas, paths), key=original_key)
+    assert list(zip(frame['Area'].astype(str), frame['Scada Tag Path'])) == expected
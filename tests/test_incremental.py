@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+from tag_converter import incremental
+from tag_converter.columns import ColumnConfig
+from tag_converter.incremental import FragmentStore, run_fingerprint
+
+MAPPING = {'ANL': {'signals': ['Value'], 'is_array': False, 'array_start': None, 'array_end': None,
+                   'data_types': {'Value': 'REAL'}}}
+
+
+@pytest.fixture
+def output_file(tmp_path):
+    return tmp_path / 'out.xlsx'
+
+
+@pytest.fixture
+def rows():
+    return pd.DataFrame({'Tag Name': ['T1', 'T2'], 'Area': ['Engine', 'Engine'],
+                         'Comments': pd.Series([1, None], dtype=object)})
+
+
+def _store_run(output_file, fingerprint, rows, fragment='fragment'):
+    store = FragmentStore(output_file, fingerprint)
+    digest = store.digest(rows)
+    store.store('Engine', digest, fragment)
+    store.save()
+    return digest
+
+
+def test_unchanged_rows_reuse_the_fragment(output_file, rows):
+    fingerprint = run_fingerprint(MAPPING, ColumnConfig())
+    digest = _store_run(output_file, fingerprint, rows)
+    store = FragmentStore(output_file, fingerprint)
+    assert store.digest(rows.copy()) == digest
+    assert store.has('Engine', digest)
+    assert store.load('Engine', digest) == 'fragment'
+
+
+def test_changed_rows_miss(output_file, rows):
+    fingerprint = run_fingerprint(MAPPING, ColumnConfig())
+    digest = _store_run(output_file, fingerprint, rows)
+    changed = rows.copy()
+    changed.loc[1, 'Comments'] = 'note'
+    store = FragmentStore(output_file, fingerprint)
+    assert store.digest(changed) != digest
+    assert store.load('Engine', store.digest(changed)) is None
+
+
+def test_value_types_are_part_of_the_digest(output_file, rows):
+    store = FragmentStore(output_file, run_fingerprint(MAPPING, ColumnConfig()))
+    as_text = rows.copy()
+    as_text.loc[0, 'Comments'] = '1'
+    assert store.digest(as_text) != store.digest(rows)
+
+
+@pytest.mark.parametrize('change', ['mapping', 'columns'])
+def test_changed_configuration_invalidates_every_fragment(output_file, rows, change):
+    digest = _store_run(output_file, run_fingerprint(MAPPING, ColumnConfig()), rows)
+    mapping, columns = MAPPING, ColumnConfig()
+    if change == 'mapping':
+        mapping = {'ANL': {**MAPPING['ANL'], 'data_types': {'Value': 'INT'}}}
+    else:
+        columns = ColumnConfig(area='Zone')
+    store = FragmentStore(output_file, run_fingerprint(mapping, columns))
+    assert store.previous == {}
+    assert not store.has('Engine', digest)
+
+
+def test_fragment_version_bump_invalidates_the_cache(output_file, rows, monkeypatch):
+    fingerprint = run_fingerprint(MAPPING, ColumnConfig())
+    digest = _store_run(output_file, fingerprint, rows)
+    monkeypatch.setattr(incremental, 'FRAGMENT_VERSION', incremental.FRAGMENT_VERSION + 1)
+    # Both the manifest check and the fingerprint reject fragments of the previous layout
+    assert run_fingerprint(MAPPING, ColumnConfig()) != fingerprint
+    assert not FragmentStore(output_file, fingerprint).has('Engine', digest)
+
+
+def test_save_drops_unreferenced_fragments(output_file, rows):
+    fingerprint = run_fingerprint(MAPPING, ColumnConfig())
+    old_digest = _store_run(output_file, fingerprint, rows)
+    changed = rows.iloc[:1]
+    new_digest = _store_run(output_file, fingerprint, changed, 'new fragment')
+    pickles = {path.name for path in (output_file.parent / 'out.xlsx.incremental').glob('*.pickle')}
+    assert pickles == {f"{new_digest}.pickle"}
+    store = FragmentStore(output_file, fingerprint)
+    assert not store.has('Engine', old_digest)
+    assert store.load('Engine', new_digest) == 'new fragment'
+
+
+def test_corrupt_manifest_starts_over(output_file, rows):
+    fingerprint = run_fingerprint(MAPPING, ColumnConfig())
+    _store_run(output_file, fingerprint, rows)
+    (output_file.parent / 'out.xlsx.incremental' / 'manifest.json').write_text('{not json', encoding='utf-8')
+    assert FragmentStore(output_file, fingerprint).previous == {}
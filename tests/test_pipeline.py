@@ -0,0 +1,66 @@
+import importlib.util
+
+import pytest
+from conftest import FIXTURE_EXPECTED, FIXTURE_TAGS, sheet_styles, sheet_values
+
+from tag_converter import convert
+from tag_converter.export import export_path
+
+STYLED_CONFIGS = {
+    'serial': {},
+    'small-chunks': {'chunk_size': 37},
+    'workers': {'workers': 2},
+    'spill': {'memory_budget': 0.001},
+    'spill-workers': {'memory_budget': 0.001, 'workers': 2},
+    'openpyxl-writer': {'writer_backend': 'openpyxl'},
+}
+
+
+@pytest.fixture(scope='module')
+def expected_values():
+    return sheet_values(FIXTURE_EXPECTED)
+
+
+@pytest.fixture(scope='module')
+def expected_styles():
+    return sheet_styles(FIXTURE_EXPECTED)
+
+
+@pytest.mark.parametrize('options', STYLED_CONFIGS.values(), ids=list(STYLED_CONFIGS))
+def test_matches_original_converter(tmp_path, fixture_mapping, expected_values, expected_styles, options):
+    output_file = tmp_path / 'out.xlsx'
+    stats = convert(FIXTURE_TAGS, fixture_mapping, output_file, report=False, **options)
+    assert sheet_values(output_file) == expected_values
+    assert sheet_styles(output_file) == expected_styles
+    assert stats['scada_signals'] == len(expected_values['SCADA_SIGNAL']) - 1
+
+
+def test_raw_writer_matches_original_values(tmp_path, fixture_mapping, expected_values):
+    output_file = tmp_path / 'out.xlsx'
+    convert(FIXTURE_TAGS, fixture_mapping, output_file, report=False, writer_backend='raw')
+    assert sheet_values(output_file) == expected_values
+
+
+@pytest.mark.skipif(importlib.util.find_spec('xlsxwriter') is None, reason='xlsxwriter is not installed')
+def test_xlsxwriter_matches_original_values(tmp_path, fixture_mapping, expected_values):
+    output_file = tmp_path / 'out.xlsx'
+    convert(FIXTURE_TAGS, fixture_mapping, output_file, report=False, writer_backend='xlsxwriter')
+    assert sheet_values(output_file) == expected_values
+
+
+def test_incremental_rerun_reuses_every_area(tmp_path, fixture_mapping, expected_values):
+    output_file = tmp_path / 'out.xlsx'
+    first = convert(FIXTURE_TAGS, fixture_mapping, output_file, report=False, incremental=True)
+    second = convert(FIXTURE_TAGS, fixture_mapping, output_file, report=False, incremental=True)
+    assert first['incremental']['rebuilt'] == first['incremental']['areas']
+    assert second['incremental']['reused'] == second['incremental']['areas']
+    assert second['incremental']['rebuilt'] == 0
+    assert sheet_values(output_file) == expected_values
+
+
+def test_csv_export_matches_scada_sheet(tmp_path, fixture_mapping, expected_values):
+    output_file = tmp_path / 'out.xlsx'
+    convert(FIXTURE_TAGS, fixture_mapping, output_file, report=False, export_formats=['csv'], workbook=False)
+    assert not output_file.exists()
+    lines = export_path(output_file, 'csv').read_text(encoding='utf-8').splitlines()
+    assert len(lines) == len(expected_values['SCADA_SIGNAL'])
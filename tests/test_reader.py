@@ -0,0 +1,62 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from tag_converter.columns import ColumnConfig
+from tag_converter.reader import ALL_SHEETS, SOURCE_SHEET_COLUMN, iter_tag_chunks
+
+HEADER = ['Tag Name', 'Data Block', 'Description', 'UDT Type', 'Area', 'Comments']
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = Workbook()
+    wb.active.title = 'Notes'
+    wb.active['A1'] = 'Converted from the PLC project'
+    plc1 = wb.create_sheet('PLC1')
+    plc1.append(HEADER)
+    plc1.append(['T1', 'DB1', 'Temperature', 'ANL', 'Engine', 3])
+    plc1.append([])
+    plc1.append(['T2', 'DB1', 'Level', 'TANK', 7, 2.5])
+    plc1.append([])
+    plc2 = wb.create_sheet('PLC2')
+    plc2.append(['Area', 'UDT Type', 'Tag Name', 'Description', 'Data Block'])
+    plc2.append(['Deck', 'VALVE', 'V1', 'Open', 'DB2'])
+    path = tmp_path / 'plcs.xlsx'
+    wb.save(path)
+    return path
+
+
+def _read(path, sheets, executor=None):
+    return pd.concat(list(iter_tag_chunks(path, ColumnConfig(), chunk_size=2, sheets=sheets, executor=executor)))
+
+
+def _expected(path, sheet_names):
+    frames = []
+    for sheet_name in sheet_names:
+        frame = pd.read_excel(path, sheet_name=sheet_name, dtype=object)
+        frame = frame[[col for col in frame.columns if col in HEADER]]
+        for col in ('Comments', 'Origin'):
+            if col not in frame:
+                frame[col] = ''
+        frame[SOURCE_SHEET_COLUMN] = sheet_name
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_all_sheets_match_read_excel(workbook, workers):
+    with ProcessPoolExecutor(workers) if workers else nullcontext() as executor:
+        result = _read(workbook, ALL_SHEETS, executor)
+    expected = _expected(workbook, ['PLC1', 'PLC2'])
+    assert result.columns.tolist() == expected.columns.tolist()
+    assert result.index.tolist() == list(range(len(expected)))
+    assert repr(result.values.tolist()) == repr(expected.values.tolist())
+
+
+def test_named_sheet_without_required_columns_is_an_error(workbook):
+    with pytest.raises(ValueError, match="Required columns not found in sheet 'Notes'"):
+        _read(workbook, ['PLC2', 'Notes'])
@@ -0,0 +1,101 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from tag_converter.columns import ColumnConfig
+from tag_converter.engine import SCADA_SHEET_COLUMNS, build_scada_frame, scada_area_runs
+from tag_converter.expansion import SignalOrderKeys, concat_signal_frames, expand_signals
+from tag_converter.mapping import parse_mapping
+from tag_converter.spill import SignalSpill
+
+MAPPING_CSV = b"""UDT Type,Signal Type,Data Type
+ANL,Value,REAL
+ANL,HiAlarm,BOOL
+VALVE,Open,ARRAY[0..1] of BOOL
+"""
+AREAS = ['Deck', 'Engine']
+
+
+def _chunks(order_keys):
+    """Two expanded chunks with tags in and outside the sheet's area list, arrays and duplicate paths"""
+    mapping = parse_mapping(io.BytesIO(MAPPING_CSV), 'csv')
+    tags = pd.DataFrame({
+        'Tag Name': ['T[10]', 'T[2]', 'V', 'T[2]', 'X', 'W', 'A'],
+        'Data Block': ['DB1', 'DB1', 'DB2', 'DB1', 'DB1', 'DB3', 'DB1'],
+        'Description': ['first', 'second', 'valve', 'duplicate', 'elsewhere', 'no area', 'array'],
+        'UDT Type': ['ANL', 'ANL', 'VALVE', 'ANL', 'ANL', 'VALVE', 'ARRAY[0..10] OF ANL'],
+        'Area': ['Engine', 'Engine ', 'Deck', 'Engine', 'Spare', None, 'Deck'],
+        'Comments': [1, None, 'c', None, None, None, 2.5],
+        'Origin': [None] * 7,
+    })
+    return [expand_signals(part, ColumnConfig(), mapping, pd.Series([''] * len(part), index=part.index),
+                           order_keys=order_keys)
+            for part in (tags.iloc[:4], tags.iloc[4:])]
+
+
+def _in_memory(order_keys, chunks):
+    frame = build_scada_frame(concat_signal_frames(chunks), AREAS, order_keys)[SCADA_SHEET_COLUMNS]
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def test_sort_matches_in_memory_order(tmp_path):
+    order_keys = SignalOrderKeys()
+    chunks = _chunks(order_keys)
+    expected = _in_memory(order_keys, chunks)
+    with SignalSpill(0, SCADA_SHEET_COLUMNS, directory=tmp_path) as spill:
+        for chunk in chunks:
+            spill.add(chunk)
+        assert spill.spilled
+        signals = spill.sort(AREAS, order_keys)
+        assert len(signals) == len(expected)
+        result = pd.concat(list(signals.iter_chunks(chunk_rows=5)))
+        assert result.where(result.notna(), None).values.tolist() == expected.values.tolist()
+        # Unlisted and missing areas come last, with the area left empty
+        assert signals.area_runs() == [(area, rows) for area, rows in scada_area_runs(expected['Area'])]
+        assert signals.area_runs()[-1][0] is None
+
+
+def test_iter_chunks_reads_a_row_range_and_column_subset(tmp_path):
+    order_keys = SignalOrderKeys()
+    chunks = _chunks(order_keys)
+    expected = _in_memory(order_keys, chunks)
+    with SignalSpill(0, SCADA_SHEET_COLUMNS, directory=tmp_path) as spill:
+        for chunk in chunks:
+            spill.add(chunk)
+        signals = spill.sort(AREAS, order_keys)
+        part = pd.concat(list(signals.iter_chunks(3, 11, ['Scada Tag Path', 'Comments'], chunk_rows=4)))
+    assert part.index.tolist() == list(range(3, 11))
+    assert part.values.tolist() == expected[['Scada Tag Path', 'Comments']].iloc[3:11].values.tolist()
+
+
+def test_frames_within_budget_stay_in_memory(tmp_path):
+    order_keys = SignalOrderKeys()
+    with SignalSpill(1024 * 1024 * 1024, SCADA_SHEET_COLUMNS, directory=tmp_path) as spill:
+        for chunk in _chunks(order_keys):
+            assert spill.add(chunk) == 0
+        assert not spill.spilled
+        assert len(spill.frames) == 2
+        assert list(tmp_path.iterdir()) == []
+
+
+def test_close_removes_the_database(tmp_path):
+    order_keys = SignalOrderKeys()
+    spill = SignalSpill(0, SCADA_SHEET_COLUMNS, directory=tmp_path)
+    spill.add(_chunks(order_keys)[0])
+    path = spill.path
+    assert os.path.exists(path)
+    spill.close()
+    assert not os.path.exists(path)
+    assert spill.counters()['file_bytes'] == 0
+
+
+@pytest.mark.parametrize('budget', [0, 1])
+def test_counters_report_spilled_rows(tmp_path, budget):
+    order_keys = SignalOrderKeys()
+    chunks = _chunks(order_keys)
+    with SignalSpill(budget, SCADA_SHEET_COLUMNS, directory=tmp_path) as spill:
+        for chunk in chunks:
+            spill.add(chunk)
+        assert spill.counters()['spilled_rows'] == sum(len(chunk) for chunk in chunks)
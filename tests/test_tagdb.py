@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+
+from tag_converter.tagdb import TagDatabase, TagQuery, export_query, list_conversions
+
+
+def _signals(db_name, area, paths, alarms):
+    return pd.DataFrame({
+        'Area': area, 'DB': db_name, 'Scada Tag Path': paths, 'Type': ['Value', 'HiAlarm'][:len(paths)],
+        'Signal Type': 'ANALOG', 'Data Type': ['REAL', 'BOOL'][:len(paths)], 'Is Alarm': alarms,
+        'Description': 'd', 'Comments': '', 'Origin': '',
+    })
+
+
+@pytest.fixture
+def tag_db(tmp_path):
+    path = tmp_path / 'tags.sqlite'
+    tags = pd.DataFrame({'Area': ['Engine', 'Deck'], 'Data Block': ['DB1', 'DB2'], 'Tag Name': ['T1', 'T2'],
+                         'UDT Type': ['ANL', 'VALVE'], 'Signal Type': ['ANALOG', 'DIGITAL'], 'Description': 'd',
+                         'Comments': [None, 3], 'Origin': ''})
+    with TagDatabase(path) as database:
+        database.save(tmp_path / 'a.xlsx', tmp_path / 'a_tagged.xlsx', tags,
+                      [_signals('DB1', 'Engine', ['DB1.T1.Value', 'DB1.T1.HiAlarm'], [False, True]),
+                       _signals('DB2', 'Deck', ['DB2.T2.Value'], [False])])
+        database.save(tmp_path / 'b.xlsx', None, tags.iloc[:1],
+                      [_signals('DB9', 'Engine', ['DB9.P1.Value', 'DB9.P1.HiAlarm'], [False, True])])
+    return path
+
+
+def _paths(query):
+    with query:
+        return query.frame()['Scada Tag Path'].tolist()
+
+
+def test_unfiltered_query_returns_rows_in_conversion_order(tag_db):
+    with TagQuery(tag_db) as query:
+        frame = query.frame()
+        assert query.count() == 5
+    assert frame['Scada Tag Path'].tolist() == ['DB1.T1.Value', 'DB1.T1.HiAlarm', 'DB2.T2.Value', 'DB9.P1.Value',
+                                                'DB9.P1.HiAlarm']
+    assert frame['Input File'].tolist() == ['a.xlsx'] * 3 + ['b.xlsx'] * 2
+    assert frame['Is Alarm'].tolist() == [False, True, False, False, True]
+
+
+def test_filters_combine(tag_db):
+    assert _paths(TagQuery(tag_db, filters={'area': ['Engine']})) == ['DB1.T1.Value', 'DB1.T1.HiAlarm',
+                                                                       'DB9.P1.Value', 'DB9.P1.HiAlarm']
+    assert _paths(TagQuery(tag_db, filters={'area': ['Engine'], 'db': ['DB9']})) == ['DB9.P1.Value', 'DB9.P1.HiAlarm']
+    assert _paths(TagQuery(tag_db, filters={'type': ['HiAlarm', 'Missing']})) == ['DB1.T1.HiAlarm', 'DB9.P1.HiAlarm']
+    # Empty filter lists are ignored
+    assert len(_paths(TagQuery(tag_db, filters={'area': []}))) == 5
+
+
+def test_path_filter_takes_wildcards(tag_db):
+    assert _paths(TagQuery(tag_db, filters={'path': ['DB?.T*.Value']})) == ['DB1.T1.Value', 'DB2.T2.Value']
+    assert _paths(TagQuery(tag_db, filters={'path': ['*.HiAlarm', 'DB2.*']})) == ['DB1.T1.HiAlarm', 'DB2.T2.Value',
+                                                                                  'DB9.P1.HiAlarm']
+
+
+def test_alarm_filter(tag_db):
+    assert _paths(TagQuery(tag_db, alarms=True)) == ['DB1.T1.HiAlarm', 'DB9.P1.HiAlarm']
+    assert len(_paths(TagQuery(tag_db, alarms=False))) == 3
+    with pytest.raises(ValueError, match='only applies to signals'):
+        TagQuery(tag_db, 'tags', alarms=True)
+
+
+def test_input_file_filter_accepts_names_and_paths(tag_db, tmp_path):
+    assert _paths(TagQuery(tag_db, input_files=['b.xlsx'])) == ['DB9.P1.Value', 'DB9.P1.HiAlarm']
+    assert len(_paths(TagQuery(tag_db, input_files=[str(tmp_path / 'a.xlsx')]))) == 3
+
+
+def test_limit_caps_count_and_rows(tag_db):
+    with TagQuery(tag_db, filters={'area': ['Engine']}, limit=3) as query:
+        assert query.count() == 3
+        assert len(query.frame()) == 3
+
+
+def test_tag_table_query(tag_db):
+    with TagQuery(tag_db, 'tags', filters={'type': ['VALVE']}) as query:
+        frame = query.frame()
+    assert frame['Tag Name'].tolist() == ['T2']
+    assert frame['Comments'].tolist() == [3]
+
+
+def test_reconverting_an_input_replaces_its_rows(tag_db, tmp_path):
+    with TagDatabase(tag_db) as database:
+        database.save(tmp_path / 'b.xlsx', None, pd.DataFrame(columns=['Area']), [])
+    assert [(row['name'], row['signals']) for row in list_conversions(tag_db)] == [('a.xlsx', 3), ('b.xlsx', 0)]
+    assert _paths(TagQuery(tag_db, input_files=['b.xlsx'])) == []
+
+
+def test_unknown_table_and_missing_database(tag_db, tmp_path):
+    with pytest.raises(ValueError, match='Unknown table'):
+        TagQuery(tag_db, 'areas')
+    with pytest.raises(FileNotFoundError):
+        TagQuery(tmp_path / 'missing.sqlite')
+
+
+def test_export_query_to_csv(tag_db, tmp_path):
+    with TagQuery(tag_db, alarms=True) as query:
+        assert export_query(query, tmp_path / 'alarms.csv') == 2
+    lines = (tmp_path / 'alarms.csv').read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 3
+    assert 'DB9.P1.HiAlarm' in lines[2]
@@ -0,0 +1,43 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from conftest import sheet_styles, sheet_values
+
+from tag_converter import writer
+from tag_converter.constants import WRITER_NAMES
+from tag_converter.writer import StyledWorkbookWriter
+
+FRAME = pd.DataFrame({'Area': ['A'] * 3 + ['B'] * 4, 'Tag': [f"T{idx}" for idx in range(7)],
+                      'Value': [1, 2.5, None, 'x', 4, 5, 6]})
+AREA_ROWS = {'A': {'start': 2, 'end': 4, 'color': 'FF4472C4'}, 'B': {'start': 5, 'end': 8, 'color': 'FF70AD47'}}
+
+
+def _write(path, executor=None):
+    with StyledWorkbookWriter(path, executor=executor) as workbook:
+        workbook.write_sheet('SCADA_SIGNAL', FRAME, 'FF203764', AREA_ROWS)
+        workbook.write_sheet('Plain', FRAME, 'FF4472C4')
+        return workbook.executor
+
+
+def test_parallel_rows_match_a_serial_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer, 'BLOCK_ROWS', 2)
+    _write(tmp_path / 'serial.xlsx')
+    with ProcessPoolExecutor(2) as executor:
+        used = _write(tmp_path / 'parallel.xlsx', executor)
+    assert (used is not None) == writer.parallel_rows_supported()
+    assert sheet_values(tmp_path / 'parallel.xlsx') == sheet_values(tmp_path / 'serial.xlsx')
+    assert sheet_styles(tmp_path / 'parallel.xlsx') == sheet_styles(tmp_path / 'serial.xlsx')
+
+
+def test_untested_openpyxl_writes_rows_serially(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer, 'tested_openpyxl', lambda: False)
+    assert not writer.parallel_rows_supported()
+    _write(tmp_path / 'serial.xlsx')
+    with ProcessPoolExecutor(1) as executor:
+        assert _write(tmp_path / 'fallback.xlsx', executor) is None
+    assert sheet_values(tmp_path / 'fallback.xlsx') == sheet_values(tmp_path / 'serial.xlsx')
+    assert sheet_styles(tmp_path / 'fallback.xlsx') == sheet_styles(tmp_path / 'serial.xlsx')
+
+
+def test_writer_names_match_the_backends():
+    assert WRITER_NAMES == list(writer.WRITER_BACKENDS)